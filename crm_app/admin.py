@@ -1,30 +1,142 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR
+from .counters import get_counters
 from .models import Company, Customer, Interaction
+from .pagination import CachedCountPaginator
+
+
+class SoftDeleteFilter(admin.SimpleListFilter):
+    """Muestra por defecto solo las filas vivas (índices parciales); las eliminadas bajo petición"""
+    title = 'eliminación'
+    parameter_name = 'deleted'
+
+    def lookups(self, request, model_admin):
+        return [('dead', 'Eliminadas'), ('all', 'Todas')]
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.value() is None,
+            'query_string': changelist.get_query_string(remove=[self.parameter_name]),
+            'display': 'Vivas',
+        }
+        for lookup, title in self.lookup_choices:
+            yield {
+                'selected': self.value() == lookup,
+                'query_string': changelist.get_query_string({self.parameter_name: lookup}),
+                'display': title,
+            }
+
+    def queryset(self, request, queryset):
+        if self.value() == 'dead':
+            return queryset.dead()
+        if self.value() == 'all':
+            return queryset
+        return queryset.alive()
+
+
+class CompanyNameFilter(admin.SimpleListFilter):
+    """Filtro por nombre de empresa con un campo de texto en lugar de listar todas las empresas"""
+    title = 'empresa'
+    parameter_name = 'company_name'
+    template = 'admin/crm_app/input_filter.html'
+
+    def lookups(self, request, model_admin):
+        return []
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.value() is None,
+            'query_string': changelist.get_query_string(remove=[self.parameter_name]),
+            'display': 'Todas',
+            'parameter_name': self.parameter_name,
+            'value': self.value(),
+            'hidden_params': [
+                (key, value) for key, value in changelist.params.items()
+                if key != self.parameter_name
+            ],
+        }
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(company__in=Company.objects.filter(name__icontains=self.value()))
+        return queryset
+
+
+class SoftDeleteAdmin(admin.ModelAdmin):
+    """Eliminación y recuperación con un único UPDATE (soft_delete/restore del QuerySet)"""
+    actions = ['soft_delete_selected', 'restore_selected']
+
+    @admin.action(description='Eliminar (soft delete) los seleccionados', permissions=['delete'])
+    def soft_delete_selected(self, request, queryset):
+        count = queryset.soft_delete()
+        self.message_user(request, f'{count} {self.opts.verbose_name_plural.lower()} eliminados', messages.SUCCESS)
+
+    @admin.action(description='Recuperar los seleccionados', permissions=['change'])
+    def restore_selected(self, request, queryset):
+        count = queryset.restore()
+        self.message_user(request, f'{count} {self.opts.verbose_name_plural.lower()} recuperados', messages.SUCCESS)
+
+
+class LargeTableAdmin(SoftDeleteAdmin):
+    """
+    Changelist para tablas de millones de filas: sin el COUNT(*) del total sin
+    filtrar, con el total del snapshot (counter_name) en la lista por defecto
+    y un COUNT(*) cacheado hasta la siguiente escritura cuando hay filtros.
+    """
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    counter_name = None
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            total=self.get_known_total(request),
+        )
+
+    def get_known_total(self, request):
+        # El snapshot cuenta las filas vivas: vale solo para la lista por defecto
+        if self.counter_name is None or set(request.GET) - {PAGE_VAR, ORDER_VAR}:
+            return None
+        return get_counters()[self.counter_name]
+
 
 @admin.register(Company)
-class CompanyAdmin(admin.ModelAdmin):
+class CompanyAdmin(SoftDeleteAdmin):
     list_display = ['name', 'is_active', 'created_at', 'updated_at', 'deleted_at']
-    list_filter = ['is_active', 'created_at']
+    list_filter = [SoftDeleteFilter, 'is_active', 'created_at']
     search_fields = ['name']
     readonly_fields = ['created_at', 'updated_at', 'deleted_at']
 
 
 @admin.register(Customer)
-class CustomerAdmin(admin.ModelAdmin):
+class CustomerAdmin(LargeTableAdmin):
     list_display = ['get_full_name', 'birth_date', 'company', 'sales_rep', 'is_active', 'created_at', 'updated_at', 'deleted_at']
-    list_filter = ['is_active', 'company', 'sales_rep', 'created_at']
+    list_filter = [SoftDeleteFilter, 'is_active', CompanyNameFilter, 'sales_rep', 'created_at']
+    list_select_related = ['company', 'sales_rep']
     search_fields = ['first_name', 'last_name', 'company__name']
     readonly_fields = ['created_at', 'updated_at', 'deleted_at']
-    
+    autocomplete_fields = ['company']
+    raw_id_fields = ['sales_rep']
+    sortable_by = ['birth_date', 'created_at']
+    counter_name = 'customers_count'
+
     def get_full_name(self, obj):
         return obj.get_full_name()
     get_full_name.short_description = 'Nombre Completo'
 
 
 @admin.register(Interaction)
-class InteractionAdmin(admin.ModelAdmin):
+class InteractionAdmin(LargeTableAdmin):
     list_display = ['customer', 'interaction_type', 'interaction_date', 'is_active', 'created_at', 'updated_at', 'deleted_at']
-    list_filter = ['interaction_type', 'is_active', 'interaction_date']
+    list_filter = [SoftDeleteFilter, 'interaction_type', 'is_active', 'interaction_date']
+    list_select_related = ['customer__company']
     search_fields = ['customer__first_name', 'customer__last_name']
     readonly_fields = ['created_at', 'updated_at', 'deleted_at']
+    autocomplete_fields = ['customer']
+    sortable_by = ['interaction_date']
     date_hierarchy = 'interaction_date'
+    counter_name = 'interactions_count'
@@ -0,0 +1,267 @@
+"""
+API de solo lectura del CRM en NDJSON (una fila JSON por línea) o JSON.
+
+Las vistas heredan de las vistas de lista, así que aceptan exactamente los
+mismos filtros y ordenamientos (search, company, status, birthday,
+ordering...). Con ``limit`` la respuesta es una página de la paginación por
+cursor de las listas: la cabecera ``X-Next-Cursor`` (y ``Link`` con
+rel="next") indica cómo pedir la siguiente con ``?cursor=``. Los resultados se leen con QuerySet.iterator() y se envían
+con StreamingHttpResponse a medida que salen de la base de datos: la
+memoria usada no depende del número de filas y el primer byte sale de
+inmediato.
+
+Uso:
+    curl 'http://localhost:8000/api/customers/?company=3&status=active'
+    curl 'http://localhost:8000/api/companies/?ordering=-customer_count&format=json'
+    curl 'http://localhost:8000/api/interactions/?customer=42&since=2025-01-01'
+    curl -i 'http://localhost:8000/api/customers/?limit=500&cursor=eyJkIjog...'
+"""
+
+import json
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Value
+from django.db.models.functions import Concat
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.generic import ListView
+
+from .models import INTERACTION_TYPE_CHOICES, Interaction
+from .pagination import KeysetField, KeysetPaginator
+from .routers import ReplicaReadMixin
+from .views import CompanyListView, CustomerListView
+
+
+def iter_values(queryset, fields, chunk_size=2000):
+    """
+    Recorre el queryset como tuplas con values_list().iterator(), sin
+    instanciar modelos. ``fields`` son lookups del ORM o expresiones (que se
+    anotan antes de leerlas).
+    """
+    fields = list(fields)
+    expressions = {
+        f'_value_{index}': field for index, field in enumerate(fields)
+        if not isinstance(field, str)
+    }
+    lookups = [
+        field if isinstance(field, str) else f'_value_{index}'
+        for index, field in enumerate(fields)
+    ]
+    rows = queryset.annotate(**expressions).values_list(*lookups)
+    return rows.iterator(chunk_size=chunk_size)
+
+
+class StreamingAPIMixin:
+    """
+    Mixin para vistas basadas en get_queryset() que responde en NDJSON/JSON.
+
+    ``api_fields`` asocia cada clave de la salida con un lookup del ORM o una
+    expresión; las filas se leen con values_list(), sin instanciar modelos.
+    La vista define get_keyset() para paginar por cursor cuando hay ``limit``.
+    """
+
+    api_fields = {}
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        next_cursor = None
+        try:
+            queryset = self.get_queryset()
+            limit = request.GET.get('limit')
+            cursor = request.GET.get('cursor')
+            # get_keyset() después de get_queryset(): la búsqueda decide el orden por relevancia
+            keyset = self.get_keyset() if limit else None
+            if cursor and keyset is None:
+                raise ValueError('cursor necesita limit y un ordenamiento con paginación por cursor')
+            if limit:
+                limit = int(limit)
+                if limit < 1:
+                    raise ValueError(f'limit debe ser mayor que cero: {limit}')
+            if keyset is not None:
+                records, next_cursor = self.paginate_records(queryset, keyset, limit, cursor)
+            else:
+                if limit:
+                    queryset = queryset[:limit]
+                records = self.iter_records(queryset)
+        except ValueError as error:
+            return JsonResponse({'error': str(error)}, status=400)
+
+        if request.GET.get('format') == 'json':
+            response = StreamingHttpResponse(self.stream_json(records), content_type='application/json')
+        else:
+            response = StreamingHttpResponse(self.stream_ndjson(records), content_type='application/x-ndjson')
+        response['Cache-Control'] = 'no-store'
+        if next_cursor:
+            params = request.GET.copy()
+            params['cursor'] = next_cursor
+            response['X-Next-Cursor'] = next_cursor
+            response['Link'] = f'<{request.build_absolute_uri("?" + params.urlencode())}>; rel="next"'
+        return response
+
+    def iter_records(self, queryset):
+        names = list(self.api_fields)
+        for row in iter_values(queryset, self.api_fields.values(), self.chunk_size):
+            yield dict(zip(names, row))
+
+    def paginate_records(self, queryset, keyset, limit, cursor=None):
+        """
+        Página de ``limit`` filas después de ``cursor`` y el cursor de la
+        siguiente (None en la última). La página se lee entera para conocer
+        la última fila antes de enviar las cabeceras; su tamaño lo acota limit.
+        """
+        paginator = KeysetPaginator(queryset, keyset, limit)
+        values = None
+        if cursor:
+            decoded = paginator.decode(cursor)
+            # La API solo avanza: los cursores 'prev' de las listas no valen aquí
+            if decoded is None or decoded[0] != 'next':
+                raise ValueError(f'Cursor inválido: {cursor}')
+            values = decoded[1]
+
+        # Una fila extra indica si hay una página siguiente
+        fields = [*self.api_fields.values(), *paginator.aliases]
+        rows = list(iter_values(paginator.seek('next', values)[:limit + 1], fields, self.chunk_size))
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = paginator.encode_values(rows[-1][-len(paginator.aliases):], 'next')
+
+        names = list(self.api_fields)
+        records = (dict(zip(names, row)) for row in rows)
+        return records, next_cursor
+
+    def encode(self, record):
+        return json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+    def stream_ndjson(self, records):
+        # Se envía un bloque por cada chunk_size filas, no una escritura por fila
+        buffer = []
+        for record in records:
+            buffer.append(self.encode(record) + '\n')
+            if len(buffer) >= self.chunk_size:
+                yield ''.join(buffer)
+                buffer = []
+        if buffer:
+            yield ''.join(buffer)
+
+    def stream_json(self, records):
+        buffer = ['[']
+        separator = ''
+        for record in records:
+            buffer.append(separator + self.encode(record))
+            separator = ','
+            if len(buffer) >= self.chunk_size:
+                yield ''.join(buffer)
+                buffer = []
+        buffer.append(']')
+        yield ''.join(buffer)
+
+
+class CustomerAPIView(StreamingAPIMixin, CustomerListView):
+    """Clientes con los filtros de la lista de clientes"""
+
+    api_fields = {
+        'id': 'pk',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'birth_date': 'birth_date',
+        'company_id': 'company_id',
+        'company': 'company__name',
+        'sales_rep_id': 'sales_rep_id',
+        'sales_rep': Concat('sales_rep__first_name', Value(' '), 'sales_rep__last_name'),
+        'is_active': 'is_active',
+        'last_interaction_at': 'last_interaction_at',
+        'last_interaction_type': 'last_interaction_type',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+
+
+class CompanyAPIView(StreamingAPIMixin, CompanyListView):
+    """Empresas con los filtros de la lista de empresas"""
+
+    api_fields = {
+        'id': 'pk',
+        'name': 'name',
+        'customer_count': 'customer_count',
+        'is_active': 'is_active',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+
+
+class InteractionAPIView(ReplicaReadMixin, StreamingAPIMixin, ListView):
+    """Interacciones filtradas por cliente, tipo, estado y rango de fechas"""
+
+    model = Interaction
+
+    api_fields = {
+        'id': 'pk',
+        'customer_id': 'customer_id',
+        'interaction_type': 'interaction_type',
+        'interaction_date': 'interaction_date',
+        'is_active': 'is_active',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+
+    # Ordenamientos permitidos (todos cubiertos por índices)
+    ORDERINGS = {
+        '-interaction_date': ('-interaction_date', '-pk'),
+        'interaction_date': ('interaction_date', 'pk'),
+        'id': ('pk',),
+    }
+
+    # Los mismos ordenamientos para la paginación por cursor (el id se añade al final)
+    KEYSET_ORDERINGS = {
+        '-interaction_date': [KeysetField('interaction_date', descending=True)],
+        'interaction_date': [KeysetField('interaction_date')],
+        'id': [],
+    }
+
+    def get_keyset(self):
+        return self.KEYSET_ORDERINGS.get(self.request.GET.get('ordering') or '-interaction_date')
+
+    def get_queryset(self):
+        queryset = Interaction.objects.alive()
+
+        customer_id = self.request.GET.get('customer')
+        if customer_id:
+            queryset = queryset.filter(customer_id=int(customer_id))
+
+        interaction_type = self.request.GET.get('type')
+        if interaction_type:
+            if interaction_type not in dict(INTERACTION_TYPE_CHOICES):
+                raise ValueError(f'Tipo de interacción desconocido: {interaction_type}')
+            queryset = queryset.filter(interaction_type=interaction_type)
+
+        status = self.request.GET.get('status')
+        if status == 'active':
+            queryset = queryset.filter(is_active=True)
+        elif status == 'inactive':
+            queryset = queryset.filter(is_active=False)
+
+        # Rango de fechas: since incluido, until excluido (fecha o fecha y hora ISO)
+        for param, lookup in (('since', 'interaction_date__gte'), ('until', 'interaction_date__lt')):
+            value = self.request.GET.get(param)
+            if value:
+                queryset = queryset.filter(**{lookup: self.parse_moment(param, value)})
+
+        ordering = self.request.GET.get('ordering') or '-interaction_date'
+        if ordering not in self.ORDERINGS:
+            raise ValueError(f'Ordenamiento no permitido: {ordering}')
+        return queryset.order_by(*self.ORDERINGS[ordering])
+
+    def parse_moment(self, param, value):
+        """Fecha u hora ISO como datetime con zona horaria (las fechas empiezan a las 00:00)"""
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(f'Fecha inválida en {param}: {value}')
+            parsed = datetime.combine(day, time.min)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
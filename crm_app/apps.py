@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class CrmAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'crm_app'
+
+    def ready(self):
+        # Registra los receptores de señales
+        from . import handlers  # noqa: F401
+        # Instala el execute_wrapper de métricas en cada conexión
+        from . import metrics  # noqa: F401
+        # Aplica el perfil de PRAGMA de SQLite en cada conexión
+        from . import sqlite_profile  # noqa: F401
+        # Rechaza cachés locales al proceso para las invalidaciones del CRM
+        from . import checks  # noqa: F401
@@ -0,0 +1,141 @@
+"""
+Archivo de interacciones antiguas y purga de interacciones eliminadas.
+
+Las interacciones anteriores al horizonte (settings.CRM_ARCHIVE_AFTER_DAYS)
+se mueven de crm_app_interactions a crm_app_interactions_archive con el
+mismo id, de modo que las consultas habituales (estadísticas del dashboard,
+listas, detalle) solo recorren la historia reciente. Cada lote es un
+INSERT ... SELECT más un DELETE acotados por un rango de ids, en una
+transacción corta. La última interacción de cada cliente nunca se archiva:
+las columnas desnormalizadas de Customer siguen apuntando a la tabla activa.
+
+Las interacciones con deleted_at anterior a la retención
+(settings.CRM_SOFT_DELETE_RETENTION_DAYS) se eliminan definitivamente de
+ambas tablas.
+
+El historial completo de un cliente (tabla activa + archivo) solo se lee
+cuando se pide explícitamente: full_history().
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import DateTimeField, Value
+from django.utils import timezone
+
+from .counters import invalidate_customer_stats
+from .models import ArchivedInteraction, Customer, Interaction, interaction_type_counts
+
+# Columnas copiadas al archivo, en el mismo orden en ambas tablas
+ARCHIVED_FIELDS = (
+    'id', 'customer_id', 'interaction_type', 'interaction_date',
+    'is_active', 'created_at', 'updated_at', 'deleted_at',
+)
+
+
+def archive_cutoff(now=None, days=None):
+    days = settings.CRM_ARCHIVE_AFTER_DAYS if days is None else days
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def retention_cutoff(now=None, days=None):
+    days = settings.CRM_SOFT_DELETE_RETENTION_DAYS if days is None else days
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def archivable(cutoff):
+    """Interacciones anteriores a cutoff que no son la última de su cliente"""
+    return Interaction.objects.filter(interaction_date__lt=cutoff).exclude(
+        pk__in=Customer.objects.filter(last_interaction__isnull=False).values('last_interaction')
+    )
+
+
+def purgeable(model, cutoff):
+    """Filas eliminadas (deleted_at) antes de cutoff"""
+    return model.objects.filter(deleted_at__lt=cutoff)
+
+
+def archive_batch(cutoff, first_pk, last_pk, now=None):
+    """
+    Mueve al archivo las interacciones archivables con id entre first_pk y
+    last_pk en una transacción. Devuelve (filas movidas, ids de clientes afectados).
+    """
+    rows = archivable(cutoff).filter(pk__range=(first_pk, last_pk)).order_by()
+    quote = connection.ops.quote_name
+    archived_at = Value(now or timezone.now(), output_field=DateTimeField())
+
+    with transaction.atomic():
+        customer_ids = set(rows.values_list('customer_id', flat=True).distinct())
+        if not customer_ids:
+            return 0, customer_ids
+
+        select_sql, select_params = rows.values_list(*ARCHIVED_FIELDS, archived_at).query.sql_with_params()
+        columns = ', '.join(
+            quote(ArchivedInteraction._meta.get_field(name).column) for name in (*ARCHIVED_FIELDS, 'archived_at')
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {quote(ArchivedInteraction._meta.db_table)} ({columns}) {select_sql}',
+                select_params,
+            )
+            archived = cursor.rowcount
+            # Se borran de la tabla activa exactamente las filas que ya están en el archivo
+            archived_sql, archived_params = ArchivedInteraction.objects.filter(
+                pk__range=(first_pk, last_pk)
+            ).order_by().values('pk').query.sql_with_params()
+            cursor.execute(
+                f'DELETE FROM {quote(Interaction._meta.db_table)} '
+                f'WHERE {quote(Interaction._meta.pk.column)} IN ({archived_sql})',
+                archived_params,
+            )
+
+        # Las estadísticas cacheadas por cliente solo cuentan la tabla activa
+        transaction.on_commit(lambda: invalidate_customer_stats(customer_ids))
+    return archived, customer_ids
+
+
+def purge_batch(model, cutoff, first_pk, last_pk):
+    """Elimina las filas purgables con id entre first_pk y last_pk en una transacción"""
+    rows = purgeable(model, cutoff).filter(pk__range=(first_pk, last_pk)).order_by()
+
+    with transaction.atomic():
+        if model is ArchivedInteraction:
+            # Sin señales ni dependencias: Django lo borra con un único DELETE
+            return rows.delete()[0]
+
+        customer_ids = set(rows.values_list('customer_id', flat=True).distinct())
+        if not customer_ids:
+            return 0
+        # DELETE directo (sin cargar filas ni post_delete por fila) y
+        # recálculo de la última interacción antes del commit
+        sql, params = rows.values('pk').query.sql_with_params()
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote(model._meta.pk.column)} IN ({sql})',
+                params,
+            )
+            deleted = cursor.rowcount
+        Customer.objects.filter(pk__in=customer_ids).refresh_last_interaction()
+        transaction.on_commit(lambda: invalidate_customer_stats(customer_ids))
+    return deleted
+
+
+def full_history(customer, limit=None):
+    """
+    Historial completo del cliente (tabla activa + archivo): devuelve
+    (interacciones más recientes primero como diccionarios, estadísticas por tipo).
+    """
+    fields = ('id', 'interaction_type', 'interaction_date', 'is_active')
+    hot = Interaction.objects.alive().filter(customer=customer).order_by().values(*fields)
+    cold = ArchivedInteraction.objects.alive().filter(customer=customer).order_by().values(*fields)
+    timeline = hot.union(cold, all=True).order_by('-interaction_date', '-id')
+    if limit is not None:
+        timeline = timeline[:limit]
+
+    counts = interaction_type_counts()
+    stats = Interaction.objects.alive().filter(customer=customer).aggregate(**counts)
+    archived = ArchivedInteraction.objects.alive().filter(customer=customer).aggregate(**counts)
+    return list(timeline), {name: stats[name] + archived[name] for name in counts}
+
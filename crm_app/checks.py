@@ -0,0 +1,34 @@
+"""
+Comprobaciones del sistema del CRM (manage.py check).
+
+Los contadores del sidebar, la versión de los fragmentos (crm_app.counters) y
+las generaciones de tabla (crm_app.querycache) se invalidan en el proceso que
+escribe. Con LocMemCache cada worker tiene su propia copia y los demás siguen
+sirviendo datos viejos hasta que vence el timeout, así que esas cachés tienen
+que ser compartidas (archivos, base de datos o Redis).
+"""
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+LOCAL_CACHE_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+CRM_CACHE_SETTINGS = ('CRM_COUNTERS_CACHE', 'CRM_QUERY_CACHE')
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    errors = []
+    for setting in CRM_CACHE_SETTINGS:
+        alias = getattr(settings, setting, 'default')
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend in LOCAL_CACHE_BACKENDS:
+            errors.append(Error(
+                f"{setting} usa la caché '{alias}' ({backend}), que no se comparte entre procesos.",
+                hint=(
+                    'Configure una caché compartida (FileBasedCache, DatabaseCache o RedisCache). '
+                    'Con un solo proceso puede silenciarse con SILENCED_SYSTEM_CHECKS.'
+                ),
+                id='crm_app.E001',
+            ))
+    return errors
@@ -0,0 +1,29 @@
+"""
+Ejecución concurrente de bloques de consultas independientes (validate_data).
+
+El ORM async de Django (aget, acount, async for...) envía todas las consultas
+al mismo hilo (sync_to_async con thread_sensitive=True), así que un
+asyncio.gather sobre ellas las ejecuta una detrás de otra. gather_in_threads()
+ejecuta cada bloque en un hilo del pool con su propia conexión, de modo que
+las consultas se solapan y la latencia total se acerca a la del bloque más
+lento. Al terminar, cada hilo cierra su conexión según CONN_MAX_AGE, igual
+que al final de una petición.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def _run_in_own_connection(func):
+    try:
+        return func()
+    finally:
+        close_old_connections()
+
+
+async def gather_in_threads(*funcs):
+    """Ejecuta los callables (sin argumentos) a la vez y devuelve sus resultados en orden"""
+    run = sync_to_async(_run_in_own_connection, thread_sensitive=False)
+    return await asyncio.gather(*(run(func) for func in funcs))
@@ -1,26 +1,29 @@
-from .models import Customer, Company, Interaction
-from django.contrib.auth.models import User
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .counters import COUNTERS, get_counters, get_fragment_version
 
 
 def crm_context(request):
     """Context processor para datos globales del CRM"""
-    
+
+    # Clave y duración de los fragmentos {% cache %} que dependen de los datos
+    context = {
+        'crm_data_version': get_fragment_version,
+        'crm_fragment_timeout': getattr(settings, 'CRM_FRAGMENT_CACHE_TIMEOUT', 3600),
+    }
+
     # Solo calcular si el usuario está autenticado
     if not request.user.is_authenticated:
-        return {}
-    
-    try:
-        return {
-            'customers_count': Customer.objects.count(),
-            'companies_count': Company.objects.count(),
-            'interactions_count': Interaction.objects.count(),
-            'sales_reps_count': User.objects.filter(is_superuser=False).count(),
-        }
-    except Exception:
-        # En caso de error (ej: migraciones no aplicadas), retornar valores por defecto
-        return {
-            'customers_count': 0,
-            'companies_count': 0,
-            'interactions_count': 0,
-            'sales_reps_count': 0,
-        }
+        return context
+
+    # Evaluación perezosa: las plantillas que no muestran los badges (o los
+    # leen de un fragmento cacheado) no consultan nada.
+    # Las plantillas llaman a los callables al resolver la variable.
+    counters = SimpleLazyObject(get_counters)
+    context.update({
+        name: (lambda name=name: counters[name])
+        for name in COUNTERS
+    })
+    return context
+
@@ -0,0 +1,177 @@
+"""
+Contadores globales del CRM (badges del sidebar) servidos desde la caché de Django.
+
+Los valores salen del snapshot materializado del dashboard y se guardan en la
+caché configurada en CRM_COUNTERS_CACHE (alias de CACHES) durante
+CRM_COUNTERS_TIMEOUT segundos, que es el máximo de desfase tolerado. Los
+receptores de señales los ajustan con incr() o los invalidan al cambiar los datos.
+
+En la misma caché se guardan las estadísticas de interacciones de cada
+cliente (detalle del cliente), invalidadas cuando cambian sus interacciones
+o todas a la vez incrementando su versión (clear_data --fast), y la versión de los datos que llevan las claves de los fragmentos de
+plantilla cacheados (paneles del dashboard y sidebar): cualquier escritura
+en clientes, empresas o interacciones la incrementa y los fragmentos
+anteriores dejan de usarse.
+
+Los totales se leen siempre de la base principal, porque los receptores los
+ajustan con las escrituras; las estadísticas y los fragmentos leídos de la
+réplica se guardan bajo su propia clave (routers.read_source()).
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from .routers import read_source
+
+logger = logging.getLogger(__name__)
+
+# Nombre en el contexto de plantillas -> clave del total en DashboardSnapshot
+COUNTERS = {
+    'customers_count': 'customers',
+    'companies_count': 'companies',
+    'interactions_count': 'interactions',
+    'sales_reps_count': 'sales_reps',
+}
+
+KEY_PREFIX = 'crm:counter:'
+CUSTOMER_STATS_PREFIX = 'crm:customer-stats:'
+CUSTOMER_STATS_VERSION_KEY = 'crm:customer-stats-version'
+DATA_VERSION_KEY = 'crm:data-version'
+
+
+def _cache():
+    return caches[getattr(settings, 'CRM_COUNTERS_CACHE', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'CRM_COUNTERS_TIMEOUT', 300)
+
+
+def _load_totals():
+    """Lee los totales del snapshot (una consulta pequeña) y los reconstruye si faltan"""
+    from .models import DashboardSnapshot
+
+    totals = DashboardSnapshot.objects.using(DEFAULT_DB_ALIAS).filter(
+        scope=DashboardSnapshot.SCOPE_TOTAL
+    ).values_list('key', 'value')
+    totals = dict(totals)
+    if not totals:
+        DashboardSnapshot.objects.rebuild([DashboardSnapshot.SCOPE_TOTAL])
+        return _load_totals()
+    return totals
+
+
+def get_counters():
+    """Devuelve {nombre: valor} para todos los contadores, usando la caché"""
+    cache = _cache()
+    keys = {KEY_PREFIX + total: name for name, total in COUNTERS.items()}
+
+    try:
+        cached = cache.get_many(list(keys))
+        if len(cached) < len(keys):
+            totals = _load_totals()
+            missing = {
+                key: totals.get(key[len(KEY_PREFIX):], 0)
+                for key in keys if key not in cached
+            }
+            cache.set_many(missing, _timeout())
+            cached.update(missing)
+    except Exception:
+        # En caso de error (ej: migraciones no aplicadas), retornar valores por defecto
+        logger.exception('No se pudieron cargar los contadores del CRM')
+        return {name: 0 for name in COUNTERS}
+
+    return {name: cached[key] for key, name in keys.items()}
+
+
+def adjust_counter(total, delta):
+    """Suma delta al contador cacheado; si no está en caché se recalculará al leerlo"""
+    if not delta:
+        return
+    try:
+        _cache().incr(KEY_PREFIX + total, delta)
+    except ValueError:
+        pass
+
+
+def invalidate_counters(totals=None):
+    """Elimina de la caché los contadores indicados (todos por defecto)"""
+    totals = totals or COUNTERS.values()
+    _cache().delete_many([KEY_PREFIX + total for total in totals])
+
+
+def _customer_stats_key(customer_id, source=''):
+    key = f'{CUSTOMER_STATS_PREFIX}{customer_id}'
+    return f'{key}@{source}' if source else key
+
+
+def get_customer_stats(customer_id):
+    """Estadísticas de interacciones cacheadas del cliente, o None si no están"""
+    return _cache().get(
+        _customer_stats_key(customer_id, read_source()),
+        version=_get_version(CUSTOMER_STATS_VERSION_KEY),
+    )
+
+
+def set_customer_stats(customer_id, stats):
+    timeout = getattr(settings, 'CRM_CUSTOMER_STATS_TIMEOUT', 3600)
+    _cache().set(
+        _customer_stats_key(customer_id, read_source()), stats, timeout,
+        version=_get_version(CUSTOMER_STATS_VERSION_KEY),
+    )
+
+
+def invalidate_customer_stats(customer_ids):
+    """Elimina de la caché las estadísticas de los clientes indicados"""
+    _cache().delete_many(
+        [_customer_stats_key(customer_id) for customer_id in customer_ids],
+        version=_get_version(CUSTOMER_STATS_VERSION_KEY),
+    )
+
+
+def invalidate_all_customer_stats():
+    """Invalida las estadísticas de todos los clientes sin conocer sus ids"""
+    _bump_version(CUSTOMER_STATS_VERSION_KEY)
+
+
+def _initial_version():
+    # Si la caché pierde la versión no se vuelve a un valor ya usado
+    return time.time_ns() // 1000
+
+
+def _get_version(key):
+    cache = _cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+
+
+def get_data_version():
+    """Versión actual de los datos del CRM"""
+    return _get_version(DATA_VERSION_KEY)
+
+
+def get_fragment_version():
+    """Clave de los fragmentos cacheados: la versión de los datos y el origen de la lectura"""
+    source = read_source()
+    version = get_data_version()
+    return f'{version}@{source}' if source else version
+
+
+def bump_data_version():
+    """Invalida todos los fragmentos cacheados que dependen de los datos"""
+    _bump_version(DATA_VERSION_KEY)
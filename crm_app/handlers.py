@@ -0,0 +1,350 @@
+"""
+Receptores de señales que mantienen sincronizados los datos derivados del CRM.
+
+Se conectan en CrmAppConfig.ready().
+"""
+
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .counters import bump_data_version, invalidate_customer_stats
+from .models import Company, Customer, DashboardSnapshot, Interaction, birthday_key_expression
+from .querycache import bump_table_generations
+from .search import reset_fts_state
+from .signals import bulk_write, chunks, require_pks, schedule
+
+# Campos de Interaction que afectan a la última interacción del cliente
+LAST_INTERACTION_FIELDS = {'customer', 'customer_id', 'interaction_date', 'interaction_type', 'deleted_at'}
+
+# Campos de Interaction que afectan a las estadísticas por cliente
+STATS_FIELDS = {'customer', 'customer_id', 'interaction_type', 'deleted_at'}
+
+
+def updates_last_interaction(fields):
+    return bool(fields & LAST_INTERACTION_FIELDS)
+
+
+def updates_stats(fields):
+    return bool(fields & STATS_FIELDS)
+
+
+def updates_birth_date_only(fields):
+    # bulk_update escribe birth_date con un CASE: la clave se recalcula en SQL
+    return 'birth_date' in fields and 'birthday_key' not in fields
+
+
+# Solo estas actualizaciones masivas leen los ids afectados antes del UPDATE
+require_pks(Interaction, updates_last_interaction)
+require_pks(Interaction, updates_stats)
+require_pks(Customer, updates_birth_date_only)
+
+
+# ========== ÚLTIMA INTERACCIÓN DESNORMALIZADA ==========
+
+def refresh_last_interaction(customer_ids):
+    """Recalcula la última interacción de los clientes indicados"""
+    for chunk in chunks(customer_ids):
+        Customer.objects.filter(pk__in=chunk).refresh_last_interaction()
+
+
+@receiver(post_save, sender=Interaction)
+def interaction_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    if created:
+        # Camino rápido: una interacción nueva solo puede adelantar la última
+        if instance.deleted_at is None:
+            Customer.objects.filter(pk=instance.customer_id).filter(
+                Q(last_interaction_at__isnull=True) |
+                Q(last_interaction_at__lte=instance.interaction_date)
+            ).update(
+                last_interaction=instance,
+                last_interaction_at=instance.interaction_date,
+                last_interaction_type=instance.interaction_type,
+            )
+        return
+
+    if not instance.has_changed('customer_id', 'interaction_date', 'interaction_type', 'deleted_at'):
+        return
+
+    # Una edición puede retrasar la fecha o mover la interacción a otro cliente
+    previous_owners = Customer.objects.filter(
+        last_interaction=instance.pk
+    ).values_list('pk', flat=True)
+    schedule(refresh_last_interaction, {instance.customer_id, *previous_owners})
+
+
+@receiver(post_delete, sender=Interaction)
+def interaction_deleted(sender, instance, **kwargs):
+    if instance.deleted_at is None:
+        schedule(refresh_last_interaction, {instance.customer_id})
+
+
+@receiver(bulk_write, sender=Interaction)
+def interactions_bulk_written(sender, action, objs=None, pks=None, fields=None, **kwargs):
+    if action == 'bulk_create':
+        schedule(refresh_last_interaction, {obj.customer_id for obj in objs})
+    elif action == 'update' and updates_last_interaction(fields):
+        customer_ids = set()
+        for chunk in chunks(pks):
+            customer_ids.update(
+                Interaction.objects.filter(pk__in=chunk).values_list('customer_id', flat=True)
+            )
+            customer_ids.update(
+                Customer.objects.filter(last_interaction__in=chunk).values_list('pk', flat=True)
+            )
+        schedule(refresh_last_interaction, customer_ids)
+
+
+# ========== ESTADÍSTICAS POR CLIENTE ==========
+
+def invalidate_stats(customer_ids):
+    # Tras el commit: si no, una lectura concurrente podría volver a cachear datos viejos
+    transaction.on_commit(lambda: invalidate_customer_stats(customer_ids))
+
+
+@receiver(post_save, sender=Interaction)
+def interaction_saved_stats(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or instance.has_changed('customer_id', 'interaction_type', 'deleted_at'):
+        schedule(invalidate_stats, {instance.customer_id, instance.loaded_value('customer_id')})
+
+
+@receiver(post_delete, sender=Interaction)
+def interaction_deleted_stats(sender, instance, **kwargs):
+    schedule(invalidate_stats, {instance.customer_id})
+
+
+@receiver(bulk_write, sender=Interaction)
+def interactions_bulk_written_stats(sender, action, objs=None, pks=None, fields=None, **kwargs):
+    if action == 'bulk_create':
+        schedule(invalidate_stats, {obj.customer_id for obj in objs})
+    elif action == 'update' and updates_stats(fields):
+        # Tras reasignar con update() solo se conocen los clientes nuevos;
+        # los anteriores caducan por CRM_CUSTOMER_STATS_TIMEOUT
+        customer_ids = set()
+        for chunk in chunks(pks):
+            customer_ids.update(
+                Interaction.objects.filter(pk__in=chunk).values_list('customer_id', flat=True)
+            )
+        schedule(invalidate_stats, customer_ids)
+
+
+# ========== VERSIONES DE FRAGMENTOS Y QUERYSETS CACHEADOS ==========
+
+def bump_version(models):
+    # Tras el commit: con la versión nueva solo se leen datos ya confirmados
+    transaction.on_commit(bump_data_version)
+
+
+def bump_tables(tables):
+    transaction.on_commit(lambda: bump_table_generations(tables))
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Interaction)
+@receiver(post_delete, sender=Company)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Interaction)
+@receiver(bulk_write, sender=Company)
+@receiver(bulk_write, sender=Customer)
+@receiver(bulk_write, sender=Interaction)
+def data_changed_version(sender, **kwargs):
+    # Un borrado en cascada o un lote programan un único incremento
+    schedule(bump_version, {sender._meta.label})
+    schedule(bump_tables, {sender._meta.db_table})
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed_version(sender, update_fields=None, **kwargs):
+    # El dashboard muestra los nombres de los sales reps; los logins no los cambian
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    schedule(bump_version, {sender._meta.label})
+
+
+# ========== CLAVE DE CUMPLEAÑOS ==========
+
+@receiver(bulk_write, sender=Customer)
+def customers_bulk_written_birthday(sender, action, pks=None, fields=None, **kwargs):
+    if action == 'update' and updates_birth_date_only(fields):
+        for chunk in chunks(pks):
+            Customer.objects.filter(pk__in=chunk).update(birthday_key=birthday_key_expression())
+
+
+# ========== BÚSQUEDA FTS5 ==========
+
+@receiver(post_migrate)
+def migrated_search(sender, using='default', **kwargs):
+    # Las migraciones crean o reconstruyen tablas: se vuelve a comprobar FTS5
+    reset_fts_state(using)
+
+
+# ========== SNAPSHOT DEL DASHBOARD ==========
+
+TOTAL = DashboardSnapshot.SCOPE_TOTAL
+SALES_REP = DashboardSnapshot.SCOPE_SALES_REP
+INTERACTION_TYPE = DashboardSnapshot.SCOPE_INTERACTION_TYPE
+
+
+def apply_snapshot_deltas(deltas):
+    DashboardSnapshot.objects.apply_deltas(deltas)
+
+
+def rebuild_snapshot_scopes(scopes):
+    DashboardSnapshot.objects.rebuild(scopes)
+
+
+def counted(instance):
+    """El snapshot solo cuenta las filas vivas"""
+    return instance.deleted_at is None
+
+
+def soft_delete_changed(instance, created):
+    # Eliminar o recuperar una fila con save() cambia los totales: se recuentan
+    return not created and instance.has_changed('deleted_at')
+
+
+@receiver(post_save, sender=Company)
+def company_saved_snapshot(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created and counted(instance):
+        schedule(apply_snapshot_deltas, Counter({(TOTAL, 'companies'): 1}))
+    elif soft_delete_changed(instance, created):
+        schedule(rebuild_snapshot_scopes, {TOTAL})
+
+
+@receiver(post_delete, sender=Company)
+def company_deleted_snapshot(sender, instance, **kwargs):
+    if counted(instance):
+        schedule(apply_snapshot_deltas, Counter({(TOTAL, 'companies'): -1}))
+
+
+@receiver(post_save, sender=Customer)
+def customer_saved_snapshot(sender, instance, created, raw=False, **kwargs):
+    if raw or (created and not counted(instance)):
+        return
+    if created:
+        schedule(apply_snapshot_deltas, Counter({
+            (TOTAL, 'customers'): 1,
+            (SALES_REP, instance.sales_rep_id): 1,
+        }))
+    elif soft_delete_changed(instance, created):
+        schedule(rebuild_snapshot_scopes, {TOTAL, SALES_REP})
+    elif counted(instance) and instance.has_changed('sales_rep_id'):
+        previous = instance.loaded_value('sales_rep_id')
+        if previous is None:
+            schedule(rebuild_snapshot_scopes, {SALES_REP})
+        else:
+            schedule(apply_snapshot_deltas, Counter({
+                (SALES_REP, previous): -1,
+                (SALES_REP, instance.sales_rep_id): 1,
+            }))
+
+
+@receiver(post_delete, sender=Customer)
+def customer_deleted_snapshot(sender, instance, **kwargs):
+    if not counted(instance):
+        return
+    schedule(apply_snapshot_deltas, Counter({
+        (TOTAL, 'customers'): -1,
+        (SALES_REP, instance.sales_rep_id): -1,
+    }))
+
+
+@receiver(post_save, sender=Interaction)
+def interaction_saved_snapshot(sender, instance, created, raw=False, **kwargs):
+    if raw or (created and not counted(instance)):
+        return
+    if created:
+        schedule(apply_snapshot_deltas, Counter({
+            (TOTAL, 'interactions'): 1,
+            (INTERACTION_TYPE, instance.interaction_type): 1,
+        }))
+    elif soft_delete_changed(instance, created):
+        schedule(rebuild_snapshot_scopes, {TOTAL, INTERACTION_TYPE})
+    elif counted(instance) and instance.has_changed('interaction_type'):
+        previous = instance.loaded_value('interaction_type')
+        if previous is None:
+            schedule(rebuild_snapshot_scopes, {INTERACTION_TYPE})
+        else:
+            schedule(apply_snapshot_deltas, Counter({
+                (INTERACTION_TYPE, previous): -1,
+                (INTERACTION_TYPE, instance.interaction_type): 1,
+            }))
+
+
+@receiver(post_delete, sender=Interaction)
+def interaction_deleted_snapshot(sender, instance, **kwargs):
+    if not counted(instance):
+        return
+    schedule(apply_snapshot_deltas, Counter({
+        (TOTAL, 'interactions'): -1,
+        (INTERACTION_TYPE, instance.interaction_type): -1,
+    }))
+
+
+@receiver(bulk_write, sender=Company)
+def companies_bulk_written_snapshot(sender, action, objs=None, fields=None, **kwargs):
+    if action == 'bulk_create':
+        objs = [obj for obj in objs if counted(obj)]
+        schedule(apply_snapshot_deltas, Counter({(TOTAL, 'companies'): len(objs)}))
+    elif action == 'update' and 'deleted_at' in fields:
+        # soft_delete()/restore()
+        schedule(rebuild_snapshot_scopes, {TOTAL})
+
+
+@receiver(bulk_write, sender=Customer)
+def customers_bulk_written_snapshot(sender, action, objs=None, fields=None, **kwargs):
+    if action == 'bulk_create':
+        objs = [obj for obj in objs if counted(obj)]
+        deltas = Counter((SALES_REP, obj.sales_rep_id) for obj in objs)
+        deltas[(TOTAL, 'customers')] += len(objs)
+        schedule(apply_snapshot_deltas, deltas)
+    elif action == 'update' and 'deleted_at' in fields:
+        schedule(rebuild_snapshot_scopes, {TOTAL, SALES_REP})
+    elif action == 'update' and fields & {'sales_rep', 'sales_rep_id'}:
+        schedule(rebuild_snapshot_scopes, {SALES_REP})
+
+
+@receiver(bulk_write, sender=Interaction)
+def interactions_bulk_written_snapshot(sender, action, objs=None, fields=None, **kwargs):
+    if action == 'bulk_create':
+        objs = [obj for obj in objs if counted(obj)]
+        deltas = Counter((INTERACTION_TYPE, obj.interaction_type) for obj in objs)
+        deltas[(TOTAL, 'interactions')] += len(objs)
+        schedule(apply_snapshot_deltas, deltas)
+    elif action == 'update' and 'deleted_at' in fields:
+        schedule(rebuild_snapshot_scopes, {TOTAL, INTERACTION_TYPE})
+    elif action == 'update' and 'interaction_type' in fields:
+        schedule(rebuild_snapshot_scopes, {INTERACTION_TYPE})
+
+
+def refresh_sales_reps_total(keys):
+    # La tabla de usuarios es pequeña: se recuenta en lugar de calcular deltas
+    DashboardSnapshot.objects.set_total(
+        'sales_reps', User.objects.filter(is_superuser=False).count()
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved_snapshot(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Los logins guardan solo last_login: no cambian el número de sales reps
+    if raw or (not created and update_fields and 'is_superuser' not in update_fields):
+        return
+    schedule(refresh_sales_reps_total, {'sales_reps'})
+
+
+@receiver(post_delete, sender=User)
+def user_deleted_snapshot(sender, instance, **kwargs):
+    schedule(refresh_sales_reps_total, {'sales_reps'})
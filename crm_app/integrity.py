@@ -0,0 +1,83 @@
+"""
+Problemas de integridad de los datos del CRM y su corrección.
+
+Cada problema define la condición que cumplen las filas afectadas y los
+valores que la corrigen, de forma que repair_data puede arreglarlas con
+UPDATE set-based (sin cargar las filas en Python) y validate_data puede
+contarlas con las mismas condiciones.
+"""
+
+from datetime import timedelta
+
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import Customer, Interaction
+
+# Edad mínima de un cliente (años de 365 días, como en validate_data)
+ADULT_AGE = 18
+
+
+class IntegrityIssue:
+    """Una clase de problema: filas de ``model`` que cumplen ``condition``"""
+
+    def __init__(self, name, label, model, condition, fix, fix_label):
+        self.name = name
+        self.label = label
+        self.model = model
+        self.condition = condition
+        # Valores del UPDATE que corrige las filas (literales o expresiones)
+        self.fix = fix
+        self.fix_label = fix_label
+
+    def queryset(self):
+        return self.model.objects.filter(self.condition)
+
+
+def adult_cutoff(today):
+    """Fecha de nacimiento más reciente de un cliente mayor de edad"""
+    return today - timedelta(days=ADULT_AGE * 365)
+
+
+def integrity_issues(now=None):
+    """Problemas detectables, en el orden en que deben corregirse"""
+    now = now or timezone.now()
+    today = now.date()
+    customer_created_at = Subquery(
+        Customer.objects.filter(pk=OuterRef('customer_id')).values('created_at')[:1]
+    )
+
+    return [
+        IntegrityIssue(
+            'interactions_before_customer',
+            'Interacciones antes de creación del cliente',
+            Interaction,
+            Q(interaction_date__lt=F('customer__created_at')),
+            {'interaction_date': customer_created_at, 'updated_at': now},
+            'se mueven a la fecha de creación del cliente',
+        ),
+        IntegrityIssue(
+            'future_interactions',
+            'Interacciones en el futuro',
+            Interaction,
+            Q(interaction_date__gt=now),
+            {'interaction_date': now, 'updated_at': now},
+            'se mueven a la fecha actual',
+        ),
+        IntegrityIssue(
+            'future_birth_dates',
+            'Fechas de nacimiento futuras',
+            Customer,
+            Q(birth_date__gt=today),
+            {'birth_date': None, 'updated_at': now},
+            'se elimina la fecha de nacimiento',
+        ),
+        IntegrityIssue(
+            'underage_customers',
+            'Clientes menores de edad',
+            Customer,
+            Q(birth_date__gt=adult_cutoff(today), birth_date__lte=today),
+            {'birth_date': None, 'updated_at': now},
+            'se elimina la fecha de nacimiento',
+        ),
+    ]
@@ -0,0 +1,195 @@
+"""
+Comando para archivar la historia antigua de interacciones y purgar las eliminadas.
+
+Hace:
+- Archivo: mueve a crm_app_interactions_archive las interacciones anteriores
+  al horizonte (la última de cada cliente se queda en la tabla activa)
+- Purga: elimina definitivamente las interacciones con deleted_at anterior a
+  la retención, en la tabla activa y en el archivo
+
+Cada lote es una transacción corta (el bloqueo de escritura se libera entre
+lotes) seguida de una pausa de --sleep segundos. El comando se puede
+interrumpir (Ctrl+C o --max-seconds) en cualquier momento: los lotes
+confirmados quedan hechos y la siguiente ejecución continúa con el resto.
+
+Uso:
+    python manage.py archive_interactions --dry-run
+    python manage.py archive_interactions
+    python manage.py archive_interactions --older-than-days 365 --batch-size 2000 --sleep 0.5
+    python manage.py archive_interactions --only purge --retention-days 30
+    python manage.py archive_interactions --max-seconds 300  # Ventana de mantenimiento (cron)
+"""
+
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from crm_app.archive import archivable, archive_batch, archive_cutoff, purge_batch, purgeable, retention_cutoff
+from crm_app.models import ArchivedInteraction, DashboardSnapshot, Interaction
+
+TASKS = ('archive', 'purge')
+
+
+class Command(BaseCommand):
+    help = 'Mueve las interacciones antiguas al archivo y purga las eliminadas hace más de la retención'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=settings.CRM_ARCHIVE_AFTER_DAYS,
+            help=f'Antigüedad a partir de la cual se archiva (default: {settings.CRM_ARCHIVE_AFTER_DAYS})',
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=settings.CRM_SOFT_DELETE_RETENTION_DAYS,
+            help=f'Días que se conservan las filas eliminadas (default: {settings.CRM_SOFT_DELETE_RETENTION_DAYS})',
+        )
+        parser.add_argument(
+            '--only',
+            action='append',
+            choices=TASKS,
+            help='Tarea a ejecutar (repetible; por defecto archive y purge)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Filas por lote y transacción (default: 5000)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.1,
+            help='Pausa en segundos entre lotes para dejar paso a otros escritores (default: 0.1)',
+        )
+        parser.add_argument(
+            '--max-seconds',
+            type=float,
+            default=0,
+            help='Detiene el comando tras N segundos; la siguiente ejecución continúa (default: sin límite)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo reporta las filas afectadas, sin modificar datos',
+        )
+
+    def handle(self, *args, **options):
+        """Método principal del comando"""
+
+        self.stdout.write(
+            self.style.SUCCESS('🗄️  ARCHIVO DE INTERACCIONES' + (' (dry-run)' if options['dry_run'] else ''))
+        )
+
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size debe ser mayor que 0')
+        if options['older_than_days'] < 0 or options['retention_days'] < 0:
+            raise CommandError('--older-than-days y --retention-days no pueden ser negativos')
+
+        now = timezone.now()
+        tasks = options['only'] or TASKS
+        self.batch_size = options['batch_size']
+        self.sleep = options['sleep']
+        self.deadline = time.monotonic() + options['max_seconds'] if options['max_seconds'] else None
+        self.longest_batch = 0.0
+        self.hot_changed = False
+        self.stopped = False
+
+        archive_before = archive_cutoff(now, options['older_than_days'])
+        purge_before = retention_cutoff(now, options['retention_days'])
+        self.stdout.write(f'  📅 Archivo: interacciones anteriores a {archive_before:%Y-%m-%d}')
+        self.stdout.write(f'  🗑️  Purga: eliminadas antes de {purge_before:%Y-%m-%d}')
+
+        if options['dry_run']:
+            self._report(tasks, archive_before, purge_before)
+            return
+
+        start_time = time.perf_counter()
+        interrupted = False
+        try:
+            if 'archive' in tasks:
+                self._archive(archive_before, now)
+            if 'purge' in tasks:
+                self._purge(Interaction, 'tabla activa', purge_before)
+                self._purge(ArchivedInteraction, 'archivo', purge_before)
+        except KeyboardInterrupt:
+            interrupted = True
+            self.stdout.write(self.style.WARNING('\n⏹️  Interrumpido: los lotes confirmados se conservan'))
+        finally:
+            # SQL crudo: los contadores del dashboard se recalculan una vez
+            if self.hot_changed:
+                DashboardSnapshot.objects.rebuild([
+                    DashboardSnapshot.SCOPE_TOTAL, DashboardSnapshot.SCOPE_INTERACTION_TYPE,
+                ])
+
+        duration = time.perf_counter() - start_time
+        self.stdout.write(
+            f'\n⏱️  {duration:.1f}s en total; lote más largo (bloqueo de escritura) {self.longest_batch * 1000:.0f}ms'
+        )
+        if interrupted or self.stopped:
+            self.stdout.write(self.style.WARNING('⏭️  Quedan filas pendientes: vuelva a ejecutar el comando'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ ARCHIVO COMPLETADO'))
+
+    def _report(self, tasks, archive_before, purge_before):
+        if 'archive' in tasks:
+            self.stdout.write(f'\n📋 Interacciones a archivar: {archivable(archive_before).count():,}')
+        if 'purge' in tasks:
+            self.stdout.write(f'📋 Eliminadas a purgar (tabla activa): {purgeable(Interaction, purge_before).count():,}')
+            self.stdout.write(
+                f'📋 Eliminadas a purgar (archivo): {purgeable(ArchivedInteraction, purge_before).count():,}'
+            )
+        self.stdout.write(self.style.SUCCESS('\n✅ No se modificó nada'))
+
+    # ========== LOTES ==========
+
+    def _ranges(self, queryset):
+        """Rangos de ids (primero, último) de --batch-size filas, en orden de id"""
+        ids = queryset.order_by('pk').values_list('pk', flat=True)
+        last_pk = None
+        while True:
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                self.stopped = True
+                return
+            page = ids if last_pk is None else ids.filter(pk__gt=last_pk)
+            batch = list(page[:self.batch_size])
+            if not batch:
+                return
+            yield batch[0], batch[-1]
+            last_pk = batch[-1]
+            if self.sleep:
+                time.sleep(self.sleep)
+
+    def _timed(self, func, *args):
+        start_time = time.perf_counter()
+        result = func(*args)
+        self.longest_batch = max(self.longest_batch, time.perf_counter() - start_time)
+        return result
+
+    def _archive(self, cutoff, now):
+        self.stdout.write('\n📦 Archivando interacciones antiguas...')
+        archived = 0
+        customers = set()
+        for first_pk, last_pk in self._ranges(archivable(cutoff)):
+            count, customer_ids = self._timed(archive_batch, cutoff, first_pk, last_pk, now)
+            archived += count
+            customers |= customer_ids
+            self.hot_changed = True
+            self.stdout.write(f'  💾 Archivadas {archived:,} interacciones...')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'  ✅ {archived:,} interacciones archivadas de {len(customers):,} clientes')
+        )
+
+    def _purge(self, model, label, cutoff):
+        self.stdout.write(f'\n🗑️  Purgando eliminadas ({label})...')
+        purged = 0
+        for first_pk, last_pk in self._ranges(purgeable(model, cutoff)):
+            purged += self._timed(purge_batch, model, cutoff, first_pk, last_pk)
+            if model is Interaction:
+                self.hot_changed = True
+            self.stdout.write(f'  💾 Purgadas {purged:,} filas...')
+
+        self.stdout.write(self.style.SUCCESS(f'  ✅ {purged:,} filas purgadas ({label})'))
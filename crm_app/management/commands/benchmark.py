@@ -0,0 +1,371 @@
+"""
+Comando para medir el rendimiento del CRM con una suite repetible.
+
+Suites:
+- views: todas las vistas (dashboard, listas con sus filtros, detalle, API,
+  exportación, métricas y changelists del admin) con el cliente de pruebas
+  de Django, middleware incluido. Se ejecutan en una transacción que se
+  revierte.
+- queries: las consultas clave del ORM.
+- populate: populate_data --fast a varias escalas, en una base de datos
+  temporal que se vacía antes de cada ejecución (no toca los datos reales).
+
+Cada caso se ejecuta primero --warmup veces sin medir y luego --iterations
+veces; se informan p50/p95/p99 y las consultas SQL de una ejecución. Los
+resultados se guardan en JSON con --output y se comparan con una ejecución
+anterior con --baseline: el comando termina con error si algún caso es más
+lento que el umbral o hace más consultas.
+
+Uso:
+    python manage.py benchmark
+    python manage.py benchmark --suite queries --iterations 50
+    python manage.py benchmark --suite populate --scales 100 500
+    python manage.py benchmark --output baseline.json
+    python manage.py benchmark --baseline baseline.json --threshold 15
+"""
+
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+
+import django
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from crm_app.models import Company, Customer, Interaction
+from crm_app.search import search_queryset
+
+SUITES = ('views', 'queries', 'populate')
+
+
+class QueryCounter:
+    """execute_wrapper que cuenta las consultas ejecutadas"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta la suite de rendimiento (vistas, consultas ORM y populate_data) y la compara con una base'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--suite',
+            nargs='+',
+            choices=SUITES,
+            default=['views', 'queries'],
+            help='Suites a ejecutar (default: views queries)',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Ejecuciones medidas por caso (default: 20)',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=3,
+            help='Ejecuciones de calentamiento no medidas (default: 3)',
+        )
+        parser.add_argument(
+            '--filter',
+            help='Solo ejecuta los casos cuyo nombre contenga este texto',
+        )
+        parser.add_argument(
+            '--scales',
+            nargs='+',
+            type=int,
+            default=[100, 500],
+            help='Número de clientes de la suite populate (default: 100 500)',
+        )
+        parser.add_argument(
+            '--populate-iterations',
+            type=int,
+            default=3,
+            help='Ejecuciones medidas por escala en la suite populate (default: 3)',
+        )
+        parser.add_argument(
+            '--output',
+            help='Guarda los resultados en este archivo JSON',
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Archivo JSON de una ejecución anterior con el que comparar',
+        )
+        parser.add_argument(
+            '--metric',
+            choices=['p50', 'p95', 'p99'],
+            default='p50',
+            help='Percentil usado en la comparación con la base (default: p50)',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=20.0,
+            help='Porcentaje de empeoramiento considerado regresión (default: 20)',
+        )
+        parser.add_argument(
+            '--min-delta-ms',
+            type=float,
+            default=1.0,
+            help='Diferencia mínima en ms para contar como regresión (default: 1.0)',
+        )
+
+    def handle(self, *args, **options):
+        """Método principal del comando"""
+
+        self.stdout.write(
+            self.style.SUCCESS('⏱️  BENCHMARK DEL CRM')
+        )
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as handle:
+                    baseline = json.load(handle)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'No se pudo leer la base {options["baseline"]}: {error}')
+
+        self.iterations = options['iterations']
+        self.warmup = options['warmup']
+        self.filter = options['filter']
+        self.results = {}
+        meta = self.get_meta(options)
+
+        # populate va al final: cambia la base de datos de la conexión
+        for suite in SUITES:
+            if suite in options['suite']:
+                self.stdout.write(f'\n📦 Suite {suite}:')
+                getattr(self, f'run_{suite}')(options)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump({'meta': meta, 'results': self.results}, handle, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f'\n💾 Resultados guardados en {options["output"]}'))
+
+        if baseline is not None:
+            self.compare(baseline, options)
+
+    def get_meta(self, options):
+        return {
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'customers': Customer.objects.count(),
+            'interactions': Interaction.objects.count(),
+            'iterations': options['iterations'],
+            'warmup': options['warmup'],
+        }
+
+    # ========== MEDICIÓN ==========
+
+    def measure(self, name, func, iterations=None, warmup=None, setup=None):
+        """Ejecuta func() warmup + iterations veces y guarda las estadísticas"""
+        if self.filter and self.filter not in name:
+            return
+        iterations = iterations or self.iterations
+        warmup = self.warmup if warmup is None else warmup
+
+        for _ in range(warmup):
+            if setup:
+                setup()
+            func()
+
+        timings = []
+        counter = QueryCounter()
+        for _ in range(iterations):
+            if setup:
+                setup()
+            counter.count = 0
+            with connection.execute_wrapper(counter):
+                start = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - start) * 1000)
+
+        result = {
+            'iterations': iterations,
+            'p50': self.percentile(timings, 50),
+            'p95': self.percentile(timings, 95),
+            'p99': self.percentile(timings, 99),
+            'mean': statistics.mean(timings),
+            'min': min(timings),
+            'max': max(timings),
+            'queries': counter.count,
+        }
+        self.results[name] = result
+        self.stdout.write(
+            f'  {name:<42} p50 {result["p50"]:>8.1f}ms  p95 {result["p95"]:>8.1f}ms  '
+            f'p99 {result["p99"]:>8.1f}ms  {result["queries"]:>5} consultas'
+        )
+
+    def percentile(self, values, percent):
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+        return ordered[index]
+
+    # ========== SUITES ==========
+
+    def run_views(self, options):
+        """Vistas completas con el cliente de pruebas (transacción revertida)"""
+        customer_id = Customer.objects.values_list('pk', flat=True).first()
+        scenarios = [
+            ('dashboard', reverse('crm_app:dashboard'), {}),
+            ('customer_list', reverse('crm_app:customer_list'), {}),
+            ('customer_list.page_2', reverse('crm_app:customer_list'), {'page': 2}),
+            ('customer_list.search', reverse('crm_app:customer_list'), {'search': 'mar'}),
+            ('customer_list.birthday', reverse('crm_app:customer_list'), {'birthday': 'this_month'}),
+            ('customer_list.last_interaction', reverse('crm_app:customer_list'), {'ordering': '-last_interaction_date'}),
+            ('company_list', reverse('crm_app:company_list'), {}),
+            ('company_list.customer_count', reverse('crm_app:company_list'), {'ordering': '-customer_count'}),
+            ('customer_export.csv', reverse('crm_app:customer_export'), {}),
+            ('api_customers', reverse('crm_app:api_customers'), {'limit': 1000}),
+            ('api_companies', reverse('crm_app:api_companies'), {}),
+            ('metrics', reverse('crm_app:metrics'), {}),
+            ('admin.customer', reverse('admin:crm_app_customer_changelist'), {}),
+            ('admin.interaction', reverse('admin:crm_app_interaction_changelist'), {}),
+            ('admin.company', reverse('admin:crm_app_company_changelist'), {}),
+        ]
+        if customer_id:
+            scenarios += [
+                ('customer_detail', reverse('crm_app:customer_detail', args=[customer_id]), {}),
+                ('api_interactions', reverse('crm_app:api_interactions'), {'customer': customer_id}),
+            ]
+
+        with override_settings(ALLOWED_HOSTS=['testserver']), transaction.atomic():
+            user = User.objects.create_superuser('benchmark', 'benchmark@example.com', None)
+            client = Client()
+            client.force_login(user)
+
+            for name, url, params in scenarios:
+                def request(url=url, params=params, name=name):
+                    response = client.get(url, params)
+                    if response.status_code != 200:
+                        raise CommandError(f'{name}: respuesta {response.status_code} en {url}')
+                    # Las respuestas en streaming se leen completas
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+
+                self.measure(f'views.{name}', request)
+
+            transaction.set_rollback(True)
+
+    def run_queries(self, options):
+        """Consultas clave del ORM"""
+        customer_id = Customer.objects.values_list('pk', flat=True).first()
+        today = timezone.localdate()
+        queries = {
+            'customers_with_relations': lambda: list(
+                Customer.objects.select_related('company', 'sales_rep').prefetch_related('interactions')[:100]
+            ),
+            'interaction_type_counts': lambda: list(
+                Interaction.objects.values('interaction_type').annotate(count=Count('id'))
+            ),
+            'interaction_type_stats': lambda: Interaction.objects.type_stats(),
+            'customer_name_search': lambda: list(
+                Customer.objects.filter(
+                    Q(first_name__icontains='María') | Q(last_name__icontains='García')
+                ).select_related('company', 'sales_rep')[:20]
+            ),
+            'customer_fts_search': lambda: list(
+                search_queryset(Customer.objects.all(), 'garcia')[0][:20]
+            ),
+            'sales_rep_stats': lambda: list(
+                User.objects.filter(is_superuser=False).annotate(
+                    customer_count=Count('assigned_customers'),
+                    interaction_count=Count('assigned_customers__interactions'),
+                )
+            ),
+            'company_customer_counts': lambda: list(
+                Company.objects.annotate(customer_count=Count('customers')).order_by('-customer_count')[:20]
+            ),
+            'upcoming_birthdays': lambda: list(Customer.objects.upcoming_birthdays(days=30)[:8]),
+            'birthdays_this_week': lambda: list(
+                Customer.objects.birthdays_between(today, today + timedelta(days=6))
+            ),
+            'recent_interactions': lambda: list(
+                Interaction.objects.select_related('customer').order_by('-interaction_date', '-pk')[:50]
+            ),
+        }
+        if customer_id:
+            queries['customer_timeline_with_stats'] = lambda: Interaction.objects.filter(
+                customer_id=customer_id
+            ).timeline_with_stats(limit=10)
+
+        for name, func in queries.items():
+            self.measure(f'queries.{name}', func)
+
+    def run_populate(self, options):
+        """populate_data --fast a varias escalas en una base de datos temporal"""
+        if connection.vendor != 'sqlite':
+            raise CommandError('La suite populate usa una base de datos SQLite temporal')
+
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        previous_test_name = test_settings.get('NAME')
+        test_settings['NAME'] = os.path.join(tempfile.gettempdir(), f'crm_benchmark_{os.getpid()}.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            for scale in options['scales']:
+                self.measure(
+                    f'populate.customers_{scale}',
+                    lambda scale=scale: call_command(
+                        'populate_data', fast=True, customers=scale, stdout=StringIO()
+                    ),
+                    iterations=options['populate_iterations'],
+                    warmup=0,
+                    setup=lambda: call_command('flush', interactive=False, verbosity=0),
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings['NAME'] = previous_test_name
+
+    # ========== COMPARACIÓN ==========
+
+    def compare(self, baseline, options):
+        """Compara con la base y termina con error si hay regresiones"""
+        metric = options['metric']
+        threshold = options['threshold']
+        regressions = []
+
+        self.stdout.write(f'\n📊 Comparación con {options["baseline"]} ({metric}, umbral {threshold:g}%):')
+        for name, current in self.results.items():
+            previous = baseline.get('results', {}).get(name)
+            if previous is None:
+                self.stdout.write(f'  🆕 {name}: sin datos en la base')
+                continue
+
+            before, after = previous[metric], current[metric]
+            change = (after - before) / before * 100 if before else 0.0
+            slower = change > threshold and after - before > options['min_delta_ms']
+            more_queries = current['queries'] > previous['queries']
+            line = (
+                f'  {name:<42} {before:>8.1f}ms → {after:>8.1f}ms ({change:+.1f}%)'
+                f'  consultas {previous["queries"]} → {current["queries"]}'
+            )
+
+            if slower or more_queries:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(f'❌{line}'))
+            elif change < -threshold:
+                self.stdout.write(self.style.SUCCESS(f'🚀{line}'))
+            else:
+                self.stdout.write(f'✅{line}')
+
+        if regressions:
+            raise CommandError(f'{len(regressions)} regresiones de rendimiento: {", ".join(regressions)}')
+        self.stdout.write(self.style.SUCCESS('\n✅ Sin regresiones respecto a la base'))
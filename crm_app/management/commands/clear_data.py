@@ -7,15 +7,31 @@ Elimina de forma segura:
 - Todas las empresas
 - Todos los usuarios (excepto superusuarios)
 
+Con --fast las tablas se vacían con un DELETE sin WHERE por tabla, en orden
+compatible con las claves foráneas y sin el collector de Django (que carga
+los ids y borra en cascada desde Python). En SQLite se desactivan las
+claves foráneas y se quitan los triggers FTS durante el borrado para que
+cada DELETE use la optimización de truncado; las claves se comprueban al
+final, antes del commit.
+
 Uso:
     python manage.py clear_data
     python manage.py clear_data --force  # Sin confirmación
+    python manage.py clear_data --force --fast  # DELETE masivo por tabla
+    python manage.py clear_data --force --fast --drop-indexes --vacuum
 """
 
+import time
+from contextlib import contextmanager
+
 from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
 from django.contrib.auth.models import User
-from django.db import transaction
-from crm_app.models import Company, Customer, Interaction
+from django.db import connection, transaction
+from django.db.models import CASCADE
+from crm_app.counters import invalidate_all_customer_stats
+from crm_app.models import ArchivedInteraction, Company, Customer, DashboardSnapshot, Interaction
+from crm_app.search import FTS_TABLES, fts_tables_exist
 
 class Command(BaseCommand):
     help = 'Limpia todos los datos ficticios del sistema CRM'
@@ -26,10 +42,28 @@ class Command(BaseCommand):
             action='store_true',
             help='Fuerza la eliminación sin confirmación',
         )
+        parser.add_argument(
+            '--fast',
+            action='store_true',
+            help='Vacía las tablas con un DELETE por tabla, sin cargar filas en Python',
+        )
+        parser.add_argument(
+            '--drop-indexes',
+            action='store_true',
+            help='Con --fast: elimina los índices antes del borrado y los recrea vacíos después',
+        )
+        parser.add_argument(
+            '--vacuum',
+            action='store_true',
+            help='Ejecuta VACUUM al terminar para devolver el espacio al sistema (SQLite)',
+        )
 
     def handle(self, *args, **options):
         """Método principal del comando"""
         
+        if options['drop_indexes'] and not options['fast']:
+            raise CommandError('--drop-indexes solo se puede usar con --fast')
+        
         self.stdout.write(
             self.style.WARNING('🧹 LIMPIEZA DE DATOS FICTICIOS CRM')
         )
@@ -46,7 +80,13 @@ class Command(BaseCommand):
         
         try:
             # Realizar limpieza
-            self._clear_all_data()
+            if options['fast']:
+                self._clear_all_data_fast(options['drop_indexes'])
+            else:
+                self._clear_all_data()
+            
+            if options['vacuum']:
+                self._vacuum()
             
             self.stdout.write(
                 self.style.SUCCESS('✅ LIMPIEZA COMPLETADA EXITOSAMENTE')
@@ -161,3 +201,153 @@ class Command(BaseCommand):
                 self.stdout.write(f'  ❗ {companies_remaining} empresas no eliminadas')
             if users_remaining > 0:
                 self.stdout.write(f'  ❗ {users_remaining} usuarios no eliminados')
+
+    # ========== MODO RÁPIDO ==========
+
+    def _clear_all_data_fast(self, drop_indexes):
+        """Vacía las tablas con DELETE masivos en orden compatible con las claves foráneas"""
+        
+        self.stdout.write('\n🗑️  Iniciando eliminación rápida...')
+        start_time = time.perf_counter()
+        
+        # Interacciones (activas y archivadas) -> clientes -> empresas; el snapshot se recalcula al final
+        steps = [
+            (Interaction, 'Eliminadas {count:,} interacciones'),
+            (ArchivedInteraction, 'Eliminadas {count:,} interacciones archivadas'),
+            (Customer, 'Eliminados {count:,} clientes'),
+            (Company, 'Eliminadas {count:,} empresas'),
+            (DashboardSnapshot, 'Eliminadas {count:,} filas del snapshot del dashboard'),
+        ]
+        tables = [model._meta.db_table for model, _ in steps]
+        
+        with connection.constraint_checks_disabled():
+            with transaction.atomic(), connection.cursor() as cursor:
+                with self._schema_objects_dropped(cursor, tables, drop_indexes):
+                    for model, message in steps:
+                        self._timed_delete(cursor, model._meta.db_table, message)
+                    
+                    # Secuencias de ids desde 1 (sqlite_sequence en SQLite)
+                    for sql in connection.ops.sequence_reset_by_name_sql(
+                        no_style(), [{'table': table, 'column': 'id'} for table in tables]
+                    ):
+                        cursor.execute(sql)
+                    self.stdout.write(self.style.SUCCESS('  ✅ Secuencias de ids reiniciadas'))
+                
+                self._delete_sales_reps(cursor)
+                
+                # Las claves foráneas estaban desactivadas: se comprueban antes del commit
+                connection.check_constraints(table_names=tables + [User._meta.db_table])
+        
+        # SQL crudo: sin señales, los datos derivados se recalculan una vez
+        DashboardSnapshot.objects.rebuild()
+        # Al reiniciar las secuencias los clientes nuevos reutilizarán los mismos
+        # ids: se descartan las estadísticas cacheadas de todos, sin leer sus ids
+        invalidate_all_customer_stats()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'  ⏱️  Eliminación completada en {time.perf_counter() - start_time:.2f}s')
+        )
+        
+        # Verificar que la limpieza fue exitosa
+        self._verify_cleanup()
+
+    def _timed_delete(self, cursor, table, message, where='', params=()):
+        start_time = time.perf_counter()
+        cursor.execute(f'DELETE FROM {connection.ops.quote_name(table)}{where}', params)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'  ✅ {message.format(count=cursor.rowcount)} ({time.perf_counter() - start_time:.2f}s)'
+            )
+        )
+        return cursor.rowcount
+
+    def _delete_sales_reps(self, cursor):
+        """Elimina los usuarios no superusuarios y sus filas dependientes en pocos DELETE"""
+        
+        users_sql, users_params = User.objects.filter(
+            is_superuser=False
+        ).values('pk').query.sql_with_params()
+        
+        # Tablas intermedias de grupos/permisos y relaciones con CASCADE (ej: log del admin)
+        dependents = [
+            (field.remote_field.through._meta.db_table, field.m2m_column_name())
+            for field in User._meta.many_to_many
+        ] + [
+            (relation.related_model._meta.db_table, relation.field.column)
+            for relation in User._meta.related_objects
+            if relation.one_to_many and relation.on_delete is CASCADE
+        ]
+        quote = connection.ops.quote_name
+        for table, column in dependents:
+            cursor.execute(
+                f'DELETE FROM {quote(table)} WHERE {quote(column)} IN ({users_sql})', users_params
+            )
+        
+        self._timed_delete(
+            cursor, User._meta.db_table, 'Eliminados {count} usuarios sales reps',
+            f' WHERE {quote(User._meta.get_field("is_superuser").column)} = %s', [False],
+        )
+
+    @contextmanager
+    def _schema_objects_dropped(self, cursor, tables, drop_indexes):
+        """
+        En SQLite quita los triggers FTS (y los índices si se pide) de las
+        tablas y los recrea con su SQL original al salir. Sin triggers ni
+        claves foráneas activas, DELETE sin WHERE trunca la tabla en lugar de
+        borrar fila a fila; los índices FTS se vacían con 'delete-all'.
+        """
+        if connection.vendor != 'sqlite':
+            yield
+            return
+        
+        types = ['trigger', 'index'] if drop_indexes else ['trigger']
+        placeholders = ', '.join(['%s'] * len(tables))
+        cursor.execute(
+            f"SELECT type, name, sql FROM sqlite_master "
+            f"WHERE type IN ({', '.join(['%s'] * len(types))}) AND tbl_name IN ({placeholders}) "
+            f"AND sql IS NOT NULL",
+            types + tables,
+        )
+        objects = cursor.fetchall()
+        
+        index_count = sum(1 for object_type, _, _ in objects if object_type == 'index')
+        start_time = time.perf_counter()
+        for object_type, name, _ in objects:
+            cursor.execute(f'DROP {object_type.upper()} {connection.ops.quote_name(name)}')
+        self.stdout.write(
+            f'  🔧 Eliminados {len(objects) - index_count} triggers y {index_count} índices '
+            f'({time.perf_counter() - start_time:.2f}s)'
+        )
+        
+        yield
+        
+        start_time = time.perf_counter()
+        if fts_tables_exist():
+            for table in tables:
+                if table in FTS_TABLES:
+                    fts_table = FTS_TABLES[table][0]
+                    cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('delete-all')")
+        
+        for _, _, sql in objects:
+            cursor.execute(sql)
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'  ✅ Recreados {len(objects) - index_count} triggers y {index_count} índices '
+                f'({time.perf_counter() - start_time:.2f}s)'
+            )
+        )
+
+    def _vacuum(self):
+        """Compacta el archivo de la base de datos tras el borrado"""
+        
+        if connection.vendor != 'sqlite':
+            self.stdout.write(self.style.WARNING('  ⚠️  VACUUM solo está disponible en SQLite'))
+            return
+        
+        start_time = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM')
+        self.stdout.write(
+            self.style.SUCCESS(f'  ✅ VACUUM completado en {time.perf_counter() - start_time:.2f}s')
+        )
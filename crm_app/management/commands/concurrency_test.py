@@ -0,0 +1,220 @@
+"""
+Comando para medir la concurrencia de lecturas con un escritor activo en SQLite.
+
+Copia la base de datos a un archivo temporal (no toca los datos reales) y,
+para cada perfil de conexión, ejecuta durante --duration segundos un
+escritor que inserta interacciones en transacciones de --batch-size filas
+mientras --readers hilos repiten las lecturas típicas del detalle de un
+cliente. Compara el perfil por defecto de SQLite (journal en modo rollback)
+con el de settings.CRM_SQLITE_PRAGMAS (crm_app.sqlite_profile) e informa
+lecturas por segundo, latencia p50/p95 y errores "database is locked".
+
+Uso:
+    python manage.py concurrency_test
+    python manage.py concurrency_test --duration 10 --readers 8 --batch-size 5000
+"""
+
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from crm_app.models import Customer, Interaction
+from crm_app.sqlite_profile import SQLITE_DEFAULTS, apply_pragmas, get_pragmas
+from crm_app.synthesis import format_timestamp, generate_interactions
+
+
+class Command(BaseCommand):
+    help = 'Mide el rendimiento de lectura con un escritor concurrente para cada perfil de conexión SQLite'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=5.0,
+            help='Segundos de medición por perfil (default: 5)',
+        )
+        parser.add_argument(
+            '--readers',
+            type=int,
+            default=4,
+            help='Hilos lectores (default: 4)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Interacciones por transacción del escritor (default: 1000)',
+        )
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Alias de la base de datos a copiar (default: default)',
+        )
+
+    def handle(self, *args, **options):
+        """Método principal del comando"""
+
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('concurrency_test solo está disponible con SQLite')
+        if options['readers'] <= 0 or options['batch_size'] <= 0 or options['duration'] <= 0:
+            raise CommandError('--readers, --batch-size y --duration deben ser mayores que 0')
+
+        self.stdout.write(
+            self.style.SUCCESS('🔀 TEST DE CONCURRENCIA SQLITE')
+        )
+
+        self.customer_ids = list(Customer.objects.using(options['database']).values_list('pk', flat=True))
+        if not self.customer_ids:
+            raise CommandError('No hay clientes: ejecute populate_data primero')
+
+        profiles = {
+            'sqlite (por defecto)': SQLITE_DEFAULTS,
+            'crm (CRM_SQLITE_PRAGMAS)': get_pragmas(),
+        }
+
+        with tempfile.TemporaryDirectory(prefix='crm-concurrency-') as directory:
+            template = os.path.join(directory, 'template.sqlite3')
+            self.stdout.write(f'\n📋 Copiando la base de datos ({len(self.customer_ids):,} clientes)...')
+            connection.ensure_connection()
+            with sqlite3.connect(template) as target:
+                connection.connection.backup(target)
+            target.close()
+
+            results = {}
+            for name, pragmas in profiles.items():
+                path = os.path.join(directory, 'run.sqlite3')
+                for suffix in ('', '-wal', '-shm'):
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+                shutil.copyfile(template, path)
+
+                self.stdout.write(f'\n⚙️  Perfil {name}:')
+                self.stdout.write('  ' + ', '.join(f'{key}={value}' for key, value in pragmas.items()))
+                results[name] = self._run(path, pragmas, options)
+                self._print_result(results[name])
+
+        baseline, profile = results.values()
+        if baseline['reads_per_second']:
+            ratio = profile['reads_per_second'] / baseline['reads_per_second']
+            self.stdout.write(
+                self.style.SUCCESS(f'\n📈 Lecturas por segundo con escritor activo: x{ratio:.2f} con el perfil crm')
+            )
+
+    # ========== MEDICIÓN ==========
+
+    def _connect(self, path, pragmas):
+        # timeout=0: la espera por bloqueo la decide el PRAGMA busy_timeout del perfil
+        raw_connection = sqlite3.connect(path, timeout=0, isolation_level=None, check_same_thread=False)
+        apply_pragmas(raw_connection, pragmas)
+        return raw_connection
+
+    def _run(self, path, pragmas, options):
+        # La primera conexión fija el journal_mode del archivo antes de arrancar los hilos
+        self._connect(path, pragmas).close()
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        stats = {'reads': 0, 'read_errors': 0, 'latencies': [], 'rows_written': 0, 'write_errors': 0}
+
+        interactions = Interaction._meta.db_table
+        read_queries = [
+            f'SELECT interaction_type, COUNT(*) FROM {interactions} WHERE customer_id = ? GROUP BY interaction_type',
+            f'SELECT id, interaction_type, interaction_date FROM {interactions} '
+            f'WHERE customer_id = ? ORDER BY interaction_date DESC LIMIT 10',
+        ]
+
+        def reader(seed):
+            rng = random.Random(seed)
+            raw_connection = self._connect(path, pragmas)
+            reads, errors, latencies = 0, 0, []
+            try:
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    try:
+                        for sql in read_queries:
+                            raw_connection.execute(sql, (rng.choice(self.customer_ids),)).fetchall()
+                    except sqlite3.OperationalError:
+                        errors += 1
+                        continue
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    reads += 1
+            finally:
+                raw_connection.close()
+            with lock:
+                stats['reads'] += reads
+                stats['read_errors'] += errors
+                stats['latencies'] += latencies
+
+        def writer():
+            raw_connection = self._connect(path, pragmas)
+            columns = ('customer_id', 'interaction_type', 'interaction_date', 'is_active', 'created_at', 'updated_at')
+            sql = f'INSERT INTO {interactions} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})'
+            now = timezone.now()
+            created_at = format_timestamp(now.timestamp())
+            start_timestamp = (now - timedelta(days=365)).timestamp()
+            index = 0
+            try:
+                while not stop.is_set():
+                    # Mismo generador que populate_data: ~batch-size filas por transacción
+                    customers = [(customer_id, start_timestamp) for customer_id in random.sample(
+                        self.customer_ids, min(len(self.customer_ids), max(1, options['batch_size'] // 10))
+                    )]
+                    rows = generate_interactions((index, index, customers, 10, now.timestamp(), created_at))
+                    index += 1
+                    try:
+                        raw_connection.execute('BEGIN')
+                        raw_connection.executemany(sql, rows)
+                        raw_connection.execute('COMMIT')
+                        stats['rows_written'] += len(rows)
+                    except sqlite3.OperationalError:
+                        if raw_connection.in_transaction:
+                            raw_connection.execute('ROLLBACK')
+                        stats['write_errors'] += 1
+            finally:
+                raw_connection.close()
+
+        threads = [threading.Thread(target=writer)] + [
+            threading.Thread(target=reader, args=(seed,)) for seed in range(options['readers'])
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(stats['latencies'])
+        return {
+            'reads_per_second': stats['reads'] / elapsed,
+            'read_p50': self._percentile(latencies, 50),
+            'read_p95': self._percentile(latencies, 95),
+            'read_errors': stats['read_errors'],
+            'rows_per_second': stats['rows_written'] / elapsed,
+            'write_errors': stats['write_errors'],
+        }
+
+    def _percentile(self, ordered, percent):
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))]
+
+    def _print_result(self, result):
+        self.stdout.write(
+            f'  📖 {result["reads_per_second"]:>9,.0f} lecturas/s  '
+            f'p50 {result["read_p50"]:>7.2f}ms  p95 {result["read_p95"]:>7.2f}ms  '
+            f'{result["read_errors"]} bloqueos'
+        )
+        self.stdout.write(
+            f'  ✍️  {result["rows_per_second"]:>9,.0f} filas/s escritas  {result["write_errors"]} bloqueos'
+        )
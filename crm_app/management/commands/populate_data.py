@@ -11,23 +11,48 @@ Uso:
     python manage.py populate_data
     python manage.py populate_data --clear  # Limpia datos previos
     python manage.py populate_data --fast   # Modo rápido con menos interacciones
+    python manage.py populate_data --scale --customers 10000 --interactions-per-customer 1000
+    python manage.py populate_data --scale --workers 4 --seed 7
 """
 
+import os
 import random
 import logging
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User
 from django.db import transaction, connection
-from django.db.models import F
 from django.utils import timezone
 from faker import Faker
-from crm_app.models import Company, Customer, Interaction
+from crm_app.models import Company, Customer, DashboardSnapshot, Interaction
+from crm_app.signals import chunks
+from crm_app.synthesis import format_timestamp, generate_interactions
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@contextmanager
+def explicit_timestamps(model):
+    """Desactiva auto_now/auto_now_add del modelo para guardar fechas históricas"""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
 class Command(BaseCommand):
     help = 'Pobla la base de datos con datos ficticios para el sistema CRM'
 
@@ -54,6 +79,34 @@ class Command(BaseCommand):
             default=1000,
             help='Número de clientes a generar (default: 1000)',
         )
+        parser.add_argument(
+            '--interactions-per-customer',
+            type=int,
+            help='Media de interacciones por cliente (default: 500, o 50 con --fast)',
+        )
+        parser.add_argument(
+            '--scale',
+            action='store_true',
+            help='Modo masivo: clientes con bulk_create e interacciones generadas en paralelo',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Semilla para resultados reproducibles (default: 42)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Procesos que generan interacciones en modo --scale (default: CPUs)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50000,
+            help='Interacciones por lote de inserción en modo --scale (default: 50000)',
+        )
 
     def handle(self, *args, **options):
         """Método principal del comando"""
@@ -62,16 +115,24 @@ class Command(BaseCommand):
             self.style.SUCCESS('🎲 INICIANDO GENERACIÓN DE DATOS FICTICIOS CRM')
         )
         
+        if options['interactions_per_customer'] is not None and options['interactions_per_customer'] <= 0:
+            raise CommandError('--interactions-per-customer debe ser mayor que 0')
+        
         # Configurar Faker en español
         self.fake = Faker('es_ES')
-        Faker.seed(42)  # Seed fijo para resultados reproducibles
-        random.seed(42)
+        self.seed = options['seed']
+        Faker.seed(self.seed)  # Seed fijo para resultados reproducibles
+        random.seed(self.seed)
         
         # Configurar parámetros
         self.companies_count = options['companies']
         self.customers_count = options['customers']
-        self.interactions_per_customer = 50 if options['fast'] else 500
+        self.interactions_per_customer = options['interactions_per_customer']
+        if self.interactions_per_customer is None:
+            self.interactions_per_customer = 50 if options['fast'] else 500
         self.clear_data = options['clear']
+        self.workers = max(1, options['workers']) if options['scale'] else 1
+        self.batch_size = options['batch_size']
         
         try:
             # Limpiar datos si se solicita
@@ -81,7 +142,10 @@ class Command(BaseCommand):
             # Generar datos
             self._create_sales_representatives()
             self._create_companies()
-            self._create_customers()
+            if options['scale']:
+                self._create_customers_bulk()
+            else:
+                self._create_customers()
             self._create_interactions()
             
             # Validar resultados
@@ -220,10 +284,8 @@ class Command(BaseCommand):
             self.style.SUCCESS(f'✅ {len(self.companies)} empresas creadas')
         )
 
-    def _create_customers(self):
-        """Crea clientes distribuidos entre empresas y sales reps"""
-        
-        self.stdout.write(f'👤 Creando {self.customers_count} clientes...')
+    def _build_customers(self):
+        """Prepara (sin guardar) clientes distribuidos entre empresas y sales reps"""
         
         customers_to_create = []
         sales_reps_list = list(self.sales_reps)
@@ -270,6 +332,15 @@ class Command(BaseCommand):
             if (i + 1) % 100 == 0:
                 self.stdout.write(f'  📝 Preparados {i + 1}/{self.customers_count} clientes...')
         
+        return customers_to_create
+
+    def _create_customers(self):
+        """Crea clientes distribuidos entre empresas y sales reps"""
+        
+        self.stdout.write(f'👤 Creando {self.customers_count} clientes...')
+        
+        customers_to_create = self._build_customers()
+        
         # Crear clientes individualmente para controlar created_at
         self.stdout.write('  🕐 Creando clientes con fechas históricas...')
         created_customers = []
@@ -303,185 +374,104 @@ class Command(BaseCommand):
             self.style.SUCCESS(f'✅ {self.customers.count()} clientes creados con fechas históricas')
         )
 
-    def _create_interactions(self):
-        """Crea interacciones masivas de forma optimizada"""
-        
-        total_interactions = self.customers_count * self.interactions_per_customer
-        self.stdout.write(f'💬 Creando ~{total_interactions:,} interacciones...')
-        
-        # Tipos de interacción con probabilidades realistas
-        interaction_types = [
-            ('Call', 0.40),      # 40%
-            ('Email', 0.30),     # 30%
-            ('Meeting', 0.15),   # 15%
-            ('SMS', 0.08),       # 8%
-            ('WhatsApp', 0.05),  # 5%
-            ('Facebook', 0.02),  # 2%
-        ]
+    def _create_customers_bulk(self):
+        """Modo --scale: inserta los clientes por lotes con sus fechas históricas"""
         
-        # Preparar lista ponderada de tipos
-        weighted_types = []
-        for interaction_type, weight in interaction_types:
-            weighted_types.extend([interaction_type] * int(weight * 100))
+        self.stdout.write(f'👤 Creando {self.customers_count} clientes (bulk_create)...')
         
-        interactions_to_create = []
-        batch_size = 1000
-        created_count = 0
+        customers_to_create = self._build_customers()
         
-        for customer in self.customers:
-            # Número aleatorio de interacciones por cliente (±20% del objetivo)
-            num_interactions = random.randint(
-                int(self.interactions_per_customer * 0.8),
-                int(self.interactions_per_customer * 1.2)
-            )
-            
-            # Rango de fechas válido: desde creación del cliente hasta hace 1 hora MÍNIMO
-            start_date = customer.created_at
-            now = timezone.now()
-            end_date = now - timedelta(hours=1)  # Margen de seguridad de 1 hora
-            
-            # Si el cliente es muy nuevo (creado hace menos de 1 hora), ajustar rango
-            if start_date >= end_date:
-                # Para clientes muy nuevos, usar un rango de 30 días en el pasado
-                end_date = start_date + timedelta(days=30)
-                # Asegurar que end_date no sea futuro
-                if end_date > now - timedelta(hours=1):
-                    end_date = now - timedelta(hours=1)
-                    # Si aún hay problema, mover start_date más atrás
-                    if start_date >= end_date:
-                        start_date = end_date - timedelta(days=7)
-            
-            for _ in range(num_interactions):
-                # Generar fecha simple: días aleatorios entre start y end
-                days_diff = max(1, (end_date - start_date).days)
-                
-                random_days = random.randint(0, days_diff)
-                random_hours = random.randint(0, 23)
-                random_minutes = random.randint(0, 59)
-                
-                interaction_date = start_date + timedelta(
-                    days=random_days,
-                    hours=random_hours,
-                    minutes=random_minutes
-                )
-                
-                # VERIFICACIÓN CRÍTICA: asegurar que no sea futuro ni anterior al cliente
-                max_allowed_date = now - timedelta(hours=1)
-                
-                if interaction_date >= max_allowed_date:
-                    # Si es futuro, moverlo a un momento seguro en el pasado
-                    days_back = random.randint(1, 30)
-                    hours_back = random.randint(1, 23)
-                    interaction_date = max_allowed_date - timedelta(
-                        days=days_back, 
-                        hours=hours_back
-                    )
-                
-                if interaction_date < customer.created_at:
-                    # Si es anterior al cliente, moverlo después de la creación
-                    interaction_date = customer.created_at + timedelta(
-                        hours=random.randint(1, 72)  # Entre 1 y 72 horas después
-                    )
-                    # Verificar nuevamente que no sea futuro
-                    if interaction_date >= max_allowed_date:
-                        interaction_date = max_allowed_date - timedelta(hours=random.randint(1, 24))
-                
-                # Tipo de interacción ponderado
-                interaction_type = random.choice(weighted_types)
-                
-                interactions_to_create.append(
-                    Interaction(
-                        customer=customer,
-                        interaction_type=interaction_type,
-                        interaction_date=interaction_date,
-                        is_active=random.choice([True, True, True, False])  # 75% activas
-                    )
-                )
-                
-                # Insertar por lotes para optimizar memoria
-                if len(interactions_to_create) >= batch_size:
-                    with transaction.atomic():
-                        Interaction.objects.bulk_create(interactions_to_create, batch_size=batch_size)
-                    
-                    created_count += len(interactions_to_create)
-                    interactions_to_create = []
-                    
-                    self.stdout.write(f'  💾 Insertadas {created_count:,}/{total_interactions:,} interacciones')
-        
-        # Insertar lote final
-        if interactions_to_create:
-            with transaction.atomic():
-                Interaction.objects.bulk_create(interactions_to_create, batch_size=batch_size)
-            created_count += len(interactions_to_create)
+        # created_at/updated_at van en el mismo INSERT, sin UPDATE posterior
+        with explicit_timestamps(Customer), transaction.atomic():
+            self.customers = Customer.objects.bulk_create(customers_to_create, batch_size=1000)
         
         self.stdout.write(
-            self.style.SUCCESS(f'✅ {created_count:,} interacciones creadas')
+            self.style.SUCCESS(f'✅ {len(self.customers)} clientes creados con fechas históricas')
         )
-        
-        # POST-PROCESAMIENTO: Corregir automáticamente cualquier fecha problemática
-        self._fix_problematic_interactions()
 
-    def _fix_problematic_interactions(self):
-        """Corrige automáticamente todas las interacciones con fechas problemáticas"""
-        
-        self.stdout.write('🔧 Post-procesamiento: verificando fechas de interacciones...')
-        
-        # Encontrar interacciones problemáticas (anteriores a creación del cliente)
-        problematic_interactions = Interaction.objects.filter(
-            interaction_date__lt=F('customer__created_at')
-        ).select_related('customer')
-        
-        problematic_count = problematic_interactions.count()
-        
-        if problematic_count == 0:
-            self.stdout.write('  ✅ Todas las fechas son correctas')
-            return
-        
-        self.stdout.write(f'  🔧 Corrigiendo {problematic_count} interacciones problemáticas...')
+    def _create_interactions(self):
+        """
+        Crea las interacciones por bloques de clientes: crm_app.synthesis
+        genera las filas (vectorizado con NumPy) y este proceso, único
+        escritor, las inserta con executemany en lotes de --batch-size, sin
+        instanciar modelos. Con --scale los bloques se generan en --workers
+        procesos, con como mucho 2 bloques por worker en memoria.
+        """
+        
+        customers = [(customer.pk, customer.created_at.timestamp()) for customer in self.customers]
+        total_interactions = len(customers) * self.interactions_per_customer
+        self.stdout.write(
+            f'💬 Creando ~{total_interactions:,} interacciones con {self.workers} procesos...'
+        )
         
-        # Corregir cada interacción problemática con una lógica más simple y robusta
-        fixed_count = 0
-        now = timezone.now()
+        # Cada tarea produce unas --batch-size filas
+        customers_per_task = max(1, self.batch_size // self.interactions_per_customer)
+        end_timestamp = (timezone.now() - timedelta(hours=1)).timestamp()
+        created_at = format_timestamp(time.time())
+        tasks = (
+            (self.seed, index, customers[start:start + customers_per_task],
+             self.interactions_per_customer, end_timestamp, created_at)
+            for index, start in enumerate(range(0, len(customers), customers_per_task))
+        )
         
-        for interaction in problematic_interactions:
-            customer_creation_date = interaction.customer.created_at
-            
-            # Lógica de corrección simplificada:
-            # Añadir un delta de tiempo aleatorio a la fecha de creación del cliente.
-            # Esto asegura que la interacción SIEMPRE es posterior.
-            time_since_creation = now - customer_creation_date
-            
-            # Asegurarse de que hay un intervalo de tiempo para generar una fecha
-            if time_since_creation.total_seconds() > 60: # Más de 1 minuto
-                random_offset_seconds = random.uniform(60, time_since_creation.total_seconds())
-                new_date = customer_creation_date + timedelta(seconds=random_offset_seconds)
+        start_time = time.perf_counter()
+        created_count = 0
+        with connection.cursor() as cursor:
+            if self.workers == 1:
+                for task in tasks:
+                    created_count += self._insert_interactions(cursor, generate_interactions(task))
+                    self._report_progress(created_count, total_interactions, start_time)
             else:
-                # Si el cliente fue creado hace menos de un minuto, simplemente añade un pequeño delta
-                new_date = customer_creation_date + timedelta(seconds=random.randint(1, 59))
-
-            # Doble verificación para asegurar que no sea futura
-            if new_date > now:
-                new_date = now
-
-            interaction.interaction_date = new_date
-            interaction.save(update_fields=['interaction_date'])
-            fixed_count += 1
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    pending = deque()
+                    for task in tasks:
+                        pending.append(pool.submit(generate_interactions, task))
+                        if len(pending) >= self.workers * 2:
+                            created_count += self._insert_interactions(cursor, pending.popleft().result())
+                            self._report_progress(created_count, total_interactions, start_time)
+                    while pending:
+                        created_count += self._insert_interactions(cursor, pending.popleft().result())
+                        self._report_progress(created_count, total_interactions, start_time)
         
         self.stdout.write(
-            self.style.SUCCESS(f'  ✅ Corregidas {fixed_count} interacciones problemáticas')
+            self.style.SUCCESS(
+                f'✅ {created_count:,} interacciones creadas en {time.perf_counter() - start_time:.1f}s'
+            )
         )
         
-        # Verificación final
-        remaining_problematic = Interaction.objects.filter(
-            interaction_date__lt=F('customer__created_at')
-        ).count()
-        
-        if remaining_problematic == 0:
-            self.stdout.write('  🎉 Todas las fechas están ahora correctas')
-        else:
-            self.stdout.write(
-                self.style.WARNING(f'  ⚠️  Aún quedan {remaining_problematic} fechas problemáticas')
+        # SQL crudo: sin señales bulk_write, los datos derivados se recalculan una vez
+        self.stdout.write('🔄 Actualizando última interacción y snapshot del dashboard...')
+        for chunk in chunks([customer_id for customer_id, _ in customers]):
+            Customer.objects.filter(pk__in=chunk).refresh_last_interaction()
+        DashboardSnapshot.objects.rebuild([
+            DashboardSnapshot.SCOPE_TOTAL, DashboardSnapshot.SCOPE_INTERACTION_TYPE,
+        ])
+
+    def _insert_interactions(self, cursor, rows):
+        """Inserta tuplas (customer_id, tipo, fecha, is_active, created_at, updated_at)"""
+        
+        if not hasattr(self, '_interaction_insert_sql'):
+            quote = connection.ops.quote_name
+            columns = [
+                Interaction._meta.get_field(name).column
+                for name in ('customer', 'interaction_type', 'interaction_date',
+                             'is_active', 'created_at', 'updated_at')
+            ]
+            self._interaction_insert_sql = (
+                f'INSERT INTO {quote(Interaction._meta.db_table)} '
+                f'({", ".join(quote(column) for column in columns)}) '
+                f'VALUES ({", ".join(["%s"] * len(columns))})'
             )
+        
+        with transaction.atomic():
+            cursor.executemany(self._interaction_insert_sql, rows)
+        return len(rows)
+
+    def _report_progress(self, created_count, total_interactions, start_time):
+        rate = created_count / max(time.perf_counter() - start_time, 1e-6)
+        self.stdout.write(
+            f'  💾 Insertadas {created_count:,}/~{total_interactions:,} interacciones ({rate:,.0f} filas/s)'
+        )
 
     def _validate_data(self):
         """Valida la integridad de los datos generados"""
@@ -0,0 +1,83 @@
+"""
+Comando para reconstruir desde cero el snapshot de estadísticas del dashboard.
+
+El snapshot se mantiene de forma incremental mediante señales; este comando
+lo recalcula por completo (por ejemplo, tras cargas con SQL crudo) y, con
+--check, compara el snapshot actual con los valores reales sin modificarlo.
+
+Uso:
+    python manage.py rebuild_dashboard_snapshot
+    python manage.py rebuild_dashboard_snapshot --check
+    python manage.py rebuild_dashboard_snapshot --scope interaction_type
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from crm_app.models import DashboardSnapshot
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el snapshot materializado de estadísticas del dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scope',
+            action='append',
+            choices=DashboardSnapshot.SCOPES,
+            help='Ámbito a reconstruir (repetible; por defecto todos)',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Solo compara el snapshot con los valores reales',
+        )
+
+    def handle(self, *args, **options):
+        """Método principal del comando"""
+
+        self.stdout.write(
+            self.style.SUCCESS('📸 SNAPSHOT DEL DASHBOARD')
+        )
+
+        scopes = options['scope'] or DashboardSnapshot.SCOPES
+        current = DashboardSnapshot.objects.as_dict()
+
+        start_time = time.perf_counter()
+        if options['check']:
+            # Se reconstruye dentro de una transacción que se revierte
+            with transaction.atomic():
+                DashboardSnapshot.objects.rebuild(scopes)
+                expected = DashboardSnapshot.objects.as_dict()
+                transaction.set_rollback(True)
+        else:
+            DashboardSnapshot.objects.rebuild(scopes)
+            expected = DashboardSnapshot.objects.as_dict()
+        duration = time.perf_counter() - start_time
+
+        differences = []
+        for scope in scopes:
+            for key in sorted(set(current[scope]) | set(expected[scope])):
+                before = current[scope].get(key, 0)
+                after = expected[scope].get(key, 0)
+                if before != after:
+                    differences.append((scope, key, before, after))
+
+        for scope, key, before, after in differences:
+            self.stdout.write(f'  ❗ {scope}:{key} {before:,} → {after:,}')
+
+        if options['check']:
+            if differences:
+                self.stdout.write(
+                    self.style.WARNING(f'⚠️  {len(differences)} contadores desactualizados')
+                )
+            else:
+                self.stdout.write(self.style.SUCCESS('✅ Snapshot al día'))
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Snapshot reconstruido en {duration:.2f}s '
+                f'({len(differences)} contadores corregidos)'
+            )
+        )
@@ -0,0 +1,58 @@
+"""
+Comando para reconstruir o verificar los índices FTS5 de búsqueda.
+
+Los triggers mantienen los índices sincronizados; este comando sirve tras
+restaurar copias de la base de datos, si integrity-check detecta diferencias
+o si faltan triggers (los recrea antes de reconstruir).
+
+Uso:
+    python manage.py rebuild_search_index
+    python manage.py rebuild_search_index --check   # Solo verifica
+"""
+
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+from crm_app import search
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye o verifica los índices FTS5 de búsqueda de clientes y empresas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Solo ejecuta integrity-check sobre los índices',
+        )
+
+    def handle(self, *args, **options):
+        """Método principal del comando"""
+
+        self.stdout.write(
+            self.style.SUCCESS('🔎 ÍNDICES DE BÚSQUEDA FTS5')
+        )
+
+        if not search.fts_tables_exist():
+            raise CommandError('FTS5 no está disponible: ejecute las migraciones sobre SQLite con FTS5')
+
+        if options['check']:
+            missing = search.missing_triggers()
+            if missing:
+                raise CommandError(f'Faltan triggers de sincronización: {", ".join(missing)}')
+            try:
+                search.integrity_check()
+            except DatabaseError as e:
+                raise CommandError(f'Índice FTS5 inconsistente: {str(e)}')
+            self.stdout.write(self.style.SUCCESS('✅ Índices consistentes'))
+            return
+
+        start_time = time.perf_counter()
+        for trigger in search.create_triggers():
+            self.stdout.write(f'  🔧 Trigger recreado: {trigger}')
+        search.rebuild()
+        duration = time.perf_counter() - start_time
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Índices reconstruidos en {duration:.2f}s')
+        )
@@ -0,0 +1,86 @@
+"""
+Comando para refrescar la réplica de lectura local (replicación de prueba).
+
+Escribe el ReplicaHeartbeat en la base principal y, si principal y réplica
+son SQLite, copia la base completa al archivo de la réplica con la API de
+backup de SQLite: la copia es consistente aunque haya escrituras en curso y,
+con la réplica en modo WAL, las peticiones que la están leyendo siguen viendo
+la versión anterior hasta que termina. Con una réplica real (replicación del
+motor de base de datos) solo se escribe el heartbeat, que es lo que mide el
+retraso.
+
+Uso:
+    python manage.py refresh_replica                 # Una copia
+    python manage.py refresh_replica --interval 10   # Cada 10 segundos hasta Ctrl+C
+"""
+
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+from crm_app.models import ReplicaHeartbeat
+from crm_app.routers import replica_alias
+from crm_app.sqlite_profile import apply_pragmas, get_pragmas
+
+
+class Command(BaseCommand):
+    help = 'Copia la base de datos principal a la réplica de lectura y actualiza el heartbeat de retraso'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Repite la copia cada N segundos hasta interrumpir (default: una sola vez)',
+        )
+
+    def handle(self, *args, **options):
+        """Método principal del comando"""
+
+        alias = replica_alias()
+        if alias is None:
+            raise CommandError('No hay réplica configurada: defina CRM_REPLICA_DB')
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        replica = connections[alias]
+        copy = primary.vendor == 'sqlite' and replica.vendor == 'sqlite'
+
+        self.stdout.write(
+            self.style.SUCCESS(f'🔁 REFRESCO DE RÉPLICA ({alias})')
+        )
+        if not copy:
+            self.stdout.write('  ℹ️  Réplica gestionada por el motor: solo se escribe el heartbeat')
+
+        try:
+            while True:
+                start_time = time.perf_counter()
+                self._write_heartbeat()
+                if copy:
+                    self._copy_database(primary, replica.settings_dict['NAME'])
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f'  ✅ {timezone.localtime():%H:%M:%S} réplica actualizada '
+                        f'en {time.perf_counter() - start_time:.2f}s'
+                    )
+                )
+                if not options['interval']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('\n⏹️  Refresco detenido')
+
+    def _write_heartbeat(self):
+        # Antes de copiar: su antigüedad en la réplica es el tiempo desde la copia
+        ReplicaHeartbeat.objects.update_or_create(pk=1, defaults={'updated_at': timezone.now()})
+
+    def _copy_database(self, primary, path):
+        primary.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            # WAL en el destino: las lecturas de la réplica no esperan a la copia
+            apply_pragmas(target, get_pragmas())
+            primary.connection.backup(target)
+        finally:
+            target.close()
@@ -0,0 +1,122 @@
+"""
+Comando para corregir los problemas de integridad que detecta validate_data.
+
+Corrige:
+- Interacciones anteriores a la creación de su cliente (pasan a esa fecha)
+- Interacciones en el futuro (pasan a la fecha actual)
+- Fechas de nacimiento futuras (se eliminan)
+- Clientes menores de edad (se elimina la fecha de nacimiento)
+
+Las filas se recorren por lotes de ids y cada lote se corrige con un único
+UPDATE set-based en su propia transacción, sin cargar las filas en Python.
+La última interacción desnormalizada y las estadísticas por cliente se
+actualizan una sola vez al final de cada problema.
+
+Uso:
+    python manage.py repair_data --dry-run     # Solo reporta
+    python manage.py repair_data
+    python manage.py repair_data --only future_interactions --batch-size 50000
+"""
+
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from crm_app.integrity import integrity_issues
+from crm_app.signals import batched
+
+
+class Command(BaseCommand):
+    help = 'Corrige con UPDATE por lotes los problemas de integridad detectados por validate_data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo reporta las filas afectadas, sin modificar datos',
+        )
+        parser.add_argument(
+            '--only',
+            action='append',
+            choices=[issue.name for issue in integrity_issues()],
+            help='Problema a corregir (repetible; por defecto todos)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Filas por lote de UPDATE (default: 10000)',
+        )
+
+    def handle(self, *args, **options):
+        """Método principal del comando"""
+
+        self.stdout.write(
+            self.style.SUCCESS('🛠️  REPARACIÓN DE DATOS CRM' + (' (dry-run)' if options['dry_run'] else ''))
+        )
+
+        batch_size = options['batch_size']
+        if batch_size <= 0:
+            raise CommandError('--batch-size debe ser mayor que 0')
+
+        issues = [
+            issue for issue in integrity_issues()
+            if not options['only'] or issue.name in options['only']
+        ]
+
+        total = 0
+        for issue in issues:
+            self.stdout.write(f'\n🔍 {issue.label} ({issue.name}):')
+            if options['dry_run']:
+                total += self._report(issue)
+            else:
+                total += self._repair(issue, batch_size)
+
+        self.stdout.write('')
+        if options['dry_run']:
+            style = self.style.WARNING if total else self.style.SUCCESS
+            self.stdout.write(style(f'📋 {total:,} filas a corregir (no se modificó nada)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ {total:,} filas corregidas'))
+
+    def _report(self, issue):
+        queryset = issue.queryset()
+        count = queryset.count()
+        if not count:
+            self.stdout.write('  ✅ Sin problemas')
+            return 0
+
+        sample = list(queryset.order_by('pk').values_list('pk', flat=True)[:5])
+        self.stdout.write(f'  ❗ {count:,} filas: {issue.fix_label}')
+        self.stdout.write(f'  📝 Ejemplos (id): {", ".join(map(str, sample))}')
+        return count
+
+    def _repair(self, issue, batch_size):
+        queryset = issue.queryset().order_by('pk').values_list('pk', flat=True)
+        start_time = time.perf_counter()
+        fixed = 0
+        last_pk = None
+
+        # Las sincronizaciones de datos derivados se agrupan hasta el final
+        with batched():
+            while True:
+                page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+                ids = list(page[:batch_size])
+                if not ids:
+                    break
+
+                # Un UPDATE por lote: rango de ids + la misma condición
+                with transaction.atomic():
+                    fixed += issue.model.objects.filter(
+                        issue.condition, pk__gte=ids[0], pk__lte=ids[-1]
+                    ).update(**issue.fix)
+                last_pk = ids[-1]
+                self.stdout.write(f'  💾 Corregidas {fixed:,} filas...')
+
+        duration = time.perf_counter() - start_time
+        if fixed:
+            self.stdout.write(
+                self.style.SUCCESS(f'  ✅ {fixed:,} filas corregidas en {duration:.2f}s: {issue.fix_label}')
+            )
+        else:
+            self.stdout.write('  ✅ Sin problemas')
+        return fixed
@@ -0,0 +1,223 @@
+"""
+Comando para revisar los planes de consulta de las vistas del CRM.
+
+Ejecuta las vistas reales (dashboard, listas de clientes y empresas con sus
+filtros y ordenamientos, detalle de cliente y changelists del admin),
+captura el SQL que generan y lo pasa por EXPLAIN QUERY PLAN. Informa de los
+recorridos completos de tablas (SCAN sin índice) y de los ordenamientos con
+B-tree temporal (USE TEMP B-TREE). Las vistas se ejecutan dentro de una
+transacción que se revierte.
+
+Uso:
+    python manage.py suggest_indexes
+    python manage.py suggest_indexes --only admin
+    python manage.py suggest_indexes --min-rows 0   # Incluye tablas pequeñas
+    python manage.py suggest_indexes -v 2           # Muestra todos los planes
+    python manage.py suggest_indexes --fail         # Sale con error si hay problemas (CI)
+"""
+
+import re
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from crm_app.models import Company, Customer
+from crm_app.views import CompanyListView, CustomerListView
+
+# Alias de tabla en subconsultas de Django: FROM "crm_app_customers" U0
+ALIAS_PATTERN = re.compile(r'"(\w+)" (U\d+)\b')
+
+HINTS = {
+    'ORDER BY': 'índice con las columnas del ORDER BY (en el mismo orden y dirección)',
+    'RIGHT PART OF ORDER BY': 'añadir al índice las columnas de desempate del ORDER BY',
+    'GROUP BY': 'índice que empiece por las columnas del GROUP BY',
+    'DISTINCT': 'índice sobre las columnas del DISTINCT',
+    'SCAN': 'índice sobre las columnas del WHERE / JOIN',
+}
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta EXPLAIN QUERY PLAN sobre las consultas reales de las vistas y el admin'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only',
+            choices=['views', 'admin'],
+            help='Solo revisa las vistas del CRM o solo el admin',
+        )
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=1000,
+            help='Ignora los SCAN de tablas con menos filas estimadas (default: 1000)',
+        )
+        parser.add_argument(
+            '--fail',
+            action='store_true',
+            help='Termina con código de error si se detecta algún problema',
+        )
+
+    def handle(self, *args, **options):
+        """Método principal del comando"""
+
+        if connection.vendor != 'sqlite':
+            raise CommandError('suggest_indexes usa EXPLAIN QUERY PLAN de SQLite')
+
+        self.stdout.write(
+            self.style.SUCCESS('🧭 ASESOR DE ÍNDICES')
+        )
+        self.verbosity = options['verbosity']
+        self.min_rows = options['min_rows']
+        self.table_rows = {}
+
+        request_user = User(
+            username='suggest_indexes', is_active=True, is_staff=True, is_superuser=True
+        )
+        factory = RequestFactory()
+        seen = set()
+        problems = 0
+
+        with transaction.atomic():
+            for group, url, params in self.get_scenarios(options['only']):
+                request = factory.get(url, params)
+                request.user = request_user
+                request.session = {}
+
+                with CaptureQueriesContext(connection) as captured:
+                    match = resolve(url)
+                    response = match.func(request, *match.args, **match.kwargs)
+                    if hasattr(response, 'render'):
+                        response.render()
+
+                label = url + ('?' + request.GET.urlencode() if params else '')
+                queries = [
+                    query['sql'] for query in captured.captured_queries
+                    if query['sql'].lstrip().upper().startswith('SELECT') and query['sql'] not in seen
+                ]
+                seen.update(queries)
+                problems += self.report(group, label, response.status_code, queries)
+
+            transaction.set_rollback(True)
+
+        self.stdout.write('')
+        if problems:
+            self.stdout.write(
+                self.style.WARNING(f'⚠️  {problems} posibles problemas de índices en {len(seen)} consultas')
+            )
+            if options['fail']:
+                raise CommandError('Se detectaron consultas sin índice adecuado')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ {len(seen)} consultas revisadas sin problemas'))
+
+    def get_scenarios(self, only):
+        """Lista de (grupo, url, parámetros GET) a ejecutar"""
+        customer_id = Customer.objects.values_list('pk', flat=True).first()
+        company_id = Company.objects.values_list('pk', flat=True).first()
+        scenarios = []
+
+        if only != 'admin':
+            customer_list = reverse('crm_app:customer_list')
+            company_list = reverse('crm_app:company_list')
+            scenarios.append(('views', reverse('crm_app:dashboard'), {}))
+
+            for ordering in CustomerListView.KEYSET_ORDERINGS:
+                if ordering != 'relevance':
+                    scenarios.append(('views', customer_list, {'ordering': ordering} if ordering else {}))
+            scenarios += [
+                ('views', customer_list, {'page': 2}),
+                ('views', customer_list, {'status': 'active'}),
+                ('views', customer_list, {'birthday': 'this_week'}),
+                ('views', customer_list, {'search': 'mar'}),
+            ]
+            if company_id:
+                scenarios.append(('views', customer_list, {'company': company_id}))
+            if customer_id:
+                scenarios.append(('views', reverse('crm_app:customer_detail', args=[customer_id]), {}))
+
+            for ordering in CompanyListView.KEYSET_ORDERINGS:
+                if ordering != 'relevance':
+                    scenarios.append(('views', company_list, {'ordering': ordering}))
+            scenarios += [
+                ('views', company_list, {'status': 'active'}),
+                ('views', company_list, {'search': 'tec'}),
+            ]
+
+        if only != 'views':
+            interactions = reverse('admin:crm_app_interaction_changelist')
+            customers = reverse('admin:crm_app_customer_changelist')
+            scenarios += [
+                ('admin', interactions, {}),
+                ('admin', interactions, {'interaction_type__exact': 'Call'}),
+                ('admin', interactions, {'is_active__exact': '1'}),
+                ('admin', interactions, {'interaction_date__year': date.today().year}),
+                ('admin', customers, {}),
+                ('admin', customers, {'is_active__exact': '1'}),
+                ('admin', reverse('admin:crm_app_company_changelist'), {}),
+            ]
+            if company_id:
+                scenarios.append(('admin', customers, {'company__id__exact': company_id}))
+
+        return scenarios
+
+    def report(self, group, label, status_code, queries):
+        """Muestra los problemas de cada consulta y devuelve cuántos hay"""
+        problems = 0
+        lines = []
+
+        for sql in queries:
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = [row[3] for row in cursor.fetchall()]
+
+            issues = self.find_issues(sql, plan)
+            problems += len(issues)
+            if issues or self.verbosity > 1:
+                lines.append(f'     SQL: {sql[:300]}{"…" if len(sql) > 300 else ""}')
+                for detail in plan:
+                    if detail in issues:
+                        lines.append(self.style.WARNING(f'       ⚠️  {detail}'))
+                        lines.append(f'          💡 {self.hint(detail)}')
+                    elif self.verbosity > 1:
+                        lines.append(f'       · {detail}')
+
+        icon = '⚠️ ' if problems else '✅'
+        self.stdout.write(f'{icon} [{group}] {label} ({status_code}, {len(queries)} consultas nuevas)')
+        for line in lines:
+            self.stdout.write(line)
+        return problems
+
+    def find_issues(self, sql, plan):
+        aliases = dict((alias, table) for table, alias in ALIAS_PATTERN.findall(sql))
+        issues = []
+        for detail in plan:
+            if detail.startswith('USE TEMP B-TREE'):
+                issues.append(detail)
+            elif detail.startswith('SCAN ') and ' USING ' not in detail and 'VIRTUAL TABLE' not in detail:
+                name = detail.split()[1]
+                table = aliases.get(name, name)
+                if table.startswith('(') or table == 'CONSTANT':
+                    continue
+                if self.estimated_rows(table) >= self.min_rows:
+                    issues.append(detail)
+        return issues
+
+    def estimated_rows(self, table):
+        """Filas aproximadas de la tabla (MAX(rowid), sin recorrerla)"""
+        if table not in self.table_rows:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'SELECT MAX(rowid) FROM "{table}"')
+                    self.table_rows[table] = cursor.fetchone()[0] or 0
+            except Exception:
+                self.table_rows[table] = 0
+        return self.table_rows[table]
+
+    def hint(self, detail):
+        for marker in ('RIGHT PART OF ORDER BY', 'ORDER BY', 'GROUP BY', 'DISTINCT'):
+            if marker in detail:
+                return HINTS[marker]
+        return HINTS['SCAN']
@@ -0,0 +1,106 @@
+"""
+Comando para rellenar y reconciliar la última interacción desnormalizada de cada cliente.
+
+Las columnas Customer.last_interaction / last_interaction_at / last_interaction_type
+se mantienen por señales, pero las escrituras con SQL crudo (o datos previos a la
+migración) pueden dejarlas desactualizadas. Este comando las recalcula con UPDATE
+set-based por lotes de clientes.
+
+Uso:
+    python manage.py sync_last_interactions
+    python manage.py sync_last_interactions --check        # Solo reporta diferencias
+    python manage.py sync_last_interactions --batch-size 5000
+"""
+
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from crm_app.models import Customer
+
+
+class Command(BaseCommand):
+    help = 'Rellena y reconcilia la última interacción desnormalizada de los clientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Solo reporta clientes desactualizados, sin modificar datos',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recalcula todos los clientes, no solo los desactualizados',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Clientes por lote de UPDATE (default: 2000)',
+        )
+
+    def handle(self, *args, **options):
+        """Método principal del comando"""
+
+        self.stdout.write(
+            self.style.SUCCESS('🔄 SINCRONIZACIÓN DE ÚLTIMA INTERACCIÓN')
+        )
+
+        batch_size = options['batch_size']
+        if batch_size <= 0:
+            raise CommandError('--batch-size debe ser mayor que 0')
+
+        start_time = time.perf_counter()
+
+        if options['all']:
+            candidates = Customer.objects.all()
+        else:
+            candidates = Customer.objects.stale_last_interaction()
+
+        customer_ids = list(candidates.order_by('pk').values_list('pk', flat=True))
+
+        if options['check']:
+            self._report(customer_ids)
+            return
+
+        if not customer_ids:
+            self.stdout.write(self.style.SUCCESS('  ✅ Todos los clientes están sincronizados'))
+            return
+
+        self.stdout.write(f'  🔧 Recalculando {len(customer_ids):,} clientes...')
+
+        updated = 0
+        for start in range(0, len(customer_ids), batch_size):
+            batch = customer_ids[start:start + batch_size]
+            # Transacciones cortas para no bloquear a los escritores concurrentes
+            with transaction.atomic():
+                updated += Customer.objects.filter(pk__in=batch).refresh_last_interaction()
+            self.stdout.write(f'  💾 Procesados {min(start + batch_size, len(customer_ids)):,}/{len(customer_ids):,}')
+
+        remaining = Customer.objects.stale_last_interaction().count()
+        duration = time.perf_counter() - start_time
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ {updated:,} clientes actualizados en {duration:.2f}s')
+        )
+        if remaining:
+            self.stdout.write(
+                self.style.WARNING(f'  ⚠️  {remaining:,} clientes cambiaron durante la sincronización')
+            )
+
+    def _report(self, customer_ids):
+        """Muestra los clientes desactualizados sin modificarlos"""
+
+        if not customer_ids:
+            self.stdout.write(self.style.SUCCESS('  ✅ Todos los clientes están sincronizados'))
+            return
+
+        self.stdout.write(
+            self.style.WARNING(f'  ⚠️  {len(customer_ids):,} clientes desactualizados')
+        )
+        sample = Customer.objects.filter(pk__in=customer_ids[:10])
+        for customer in sample:
+            self.stdout.write(
+                f'    #{customer.pk} {customer.get_full_name()}: '
+                f'{customer.last_interaction_at or "sin interacción"}'
+            )
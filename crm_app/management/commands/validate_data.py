@@ -8,18 +8,43 @@ Verifica:
 - Consistencia temporal
 - Estadísticas de uso
 
+Cada tabla se recorre con una o dos consultas de agregados condicionales
+(COUNT ... FILTER) en lugar de un COUNT por comprobación; la edad mínima,
+máxima y media y el histograma de edades se calculan en SQL. Los grupos de
+consultas independientes se ejecutan a la vez, cada uno en su propia
+conexión.
+
 Uso:
     python manage.py validate_data
     python manage.py validate_data --detailed  # Reporte detallado
-    python manage.py validate_data --performance  # Test de rendimiento
+    python manage.py validate_data --performance  # Test de rendimiento (benchmark --suite queries)
+    python manage.py validate_data --json  # Salida JSON (cron, monitorización)
 """
 
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User
-from django.db.models import Count, Q, Min, Max, Avg, F
+from django.db.models import Avg, Count, DurationField, Exists, ExpressionWrapper, F, Max, Min, OuterRef, Q, Value
 from django.utils import timezone
-from datetime import datetime, timedelta
-from crm_app.models import Company, Customer, Interaction
+from crm_app.concurrency import gather_in_threads
+from crm_app.integrity import integrity_issues
+from crm_app.models import INTERACTION_TYPE_CHOICES, Company, Customer, Interaction, interaction_type_counts
+
+# Histograma de edades: (desde, hasta) en años, hasta excluido
+AGE_BUCKETS = [(0, 18), (18, 25), (25, 35), (35, 45), (45, 55), (55, 65), (65, None)]
+
+
+def age_bucket_label(low, high):
+    return f'{low}+' if high is None else f'{low}-{high - 1}'
+
 
 class Command(BaseCommand):
     help = 'Valida la integridad y consistencia de los datos del CRM'
@@ -35,348 +60,376 @@ class Command(BaseCommand):
             action='store_true',
             help='Ejecuta tests de rendimiento en consultas típicas',
         )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Escribe el resultado en JSON en lugar del reporte de texto',
+        )
 
     def handle(self, *args, **options):
         """Método principal del comando"""
-        
-        self.stdout.write(
-            self.style.SUCCESS('🔍 VALIDACIÓN DE INTEGRIDAD DE DATOS CRM')
-        )
-        
+
+        self.now = timezone.now()
+        self.issues = integrity_issues(self.now)
+
         try:
-            # Validaciones básicas
-            self._basic_validation()
-            
-            # Validaciones de integridad referencial
-            self._referential_integrity()
-            
-            # Validaciones de negocio
-            self._business_logic_validation()
-            
-            # Reporte detallado si se solicita
-            if options['detailed']:
-                self._detailed_statistics()
-            
+            start_time = time.perf_counter()
+            report = self._collect(options['detailed'])
+            report['duration_seconds'] = round(time.perf_counter() - start_time, 3)
+
             # Test de rendimiento si se solicita
             if options['performance']:
-                self._performance_tests()
-            
-            self.stdout.write(
-                self.style.SUCCESS('\n✅ VALIDACIÓN COMPLETADA')
-            )
-            
+                report['performance'] = self._performance_tests(options['json'])
         except Exception as e:
             raise CommandError(f'Error durante la validación: {str(e)}')
 
-    def _basic_validation(self):
-        """Validaciones básicas de conteo"""
-        
-        self.stdout.write('\n📊 VALIDACIÓN BÁSICA DE CONTEOS:')
-        
-        # Obtener conteos
-        users_count = User.objects.filter(is_superuser=False).count()
-        companies_count = Company.objects.count()
-        customers_count = Customer.objects.count()
-        interactions_count = Interaction.objects.count()
-        superusers_count = User.objects.filter(is_superuser=True).count()
-        
-        # Mostrar conteos actuales
-        self.stdout.write(f'  👥 Sales Representatives: {users_count}')
-        self.stdout.write(f'  🏢 Empresas: {companies_count}')
-        self.stdout.write(f'  👤 Clientes: {customers_count}')
-        self.stdout.write(f'  💬 Interacciones: {interactions_count:,}')
-        self.stdout.write(f'  🔑 Superusuarios: {superusers_count}')
-        
-        # Validar rangos esperados
-        issues = []
-        
-        if users_count < 3:
-            issues.append(f'Pocos sales reps: {users_count} (esperado: 3)')
-        
-        if companies_count < 30:
-            issues.append(f'Pocas empresas: {companies_count} (esperado: ~50)')
-        
-        if customers_count < 800:
-            issues.append(f'Pocos clientes: {customers_count} (esperado: ~1000)')
-        
-        if interactions_count < 40000:  # Mínimo esperado para mode rápido
-            issues.append(f'Pocas interacciones: {interactions_count:,} (esperado: >40K)')
-        
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS('🔍 VALIDACIÓN DE INTEGRIDAD DE DATOS CRM')
+        )
+        self._print_counts(report)
+        self._print_integrity(report)
+        self._print_business(report)
+        if options['detailed']:
+            self._print_detailed(report)
+        if options['performance']:
+            self.stdout.write(report['performance'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\n✅ VALIDACIÓN COMPLETADA en {report["duration_seconds"]:.2f}s')
+        )
+
+    # ========== CONSULTAS ==========
+
+    def _collect(self, detailed):
+        """Ejecuta los grupos de consultas a la vez y arma el reporte"""
+
+        groups = {
+            'users': self._query_users,
+            'companies': lambda: self._query_companies(detailed),
+            'customers': self._query_customers,
+            'sales_reps': self._query_sales_reps,
+            'interactions': self._query_interactions,
+            'interaction_dates': self._query_interaction_dates,
+        }
+        if detailed:
+            groups['top_customers'] = self._query_top_customers
+
+        results = dict(zip(groups, asyncio.run(gather_in_threads(*groups.values()))))
+
+        users = results['users']
+        companies = results['companies']
+        customers = results['customers']
+        interactions = results['interactions']
+        issue_counts = {
+            **customers, **interactions, 'interactions_before_customer': results['interaction_dates'],
+        }
+
+        report = {
+            'counts': {
+                'sales_reps': users['sales_reps'],
+                'companies': companies['total'],
+                'customers': customers['total'],
+                'interactions': interactions['total_count'],
+                'superusers': users['superusers'],
+            },
+            'integrity': {
+                'customers_without_company': customers['without_company'],
+                'customers_without_sales_rep': customers['without_sales_rep'],
+                'interactions_without_customer': interactions['without_customer'],
+                'invalid_company_refs': customers['invalid_company_refs'],
+                'invalid_sales_rep_refs': customers['invalid_sales_rep_refs'],
+            },
+            'business': {
+                issue.name: issue_counts[issue.name] for issue in self.issues
+            },
+            'sales_rep_distribution': results['sales_reps'],
+        }
+
+        rep_counts = list(results['sales_reps'].values())
+        report['business']['sales_rep_imbalance_ratio'] = (
+            max(rep_counts) / min(rep_counts) if rep_counts and min(rep_counts) > 0 else None
+        )
+
+        if detailed:
+            report['detailed'] = self._detailed_report(companies, customers, interactions, results['top_customers'])
+
+        report['issues'] = self._find_issues(report)
+        return report
+
+    def _query_users(self):
+        return User.objects.aggregate(
+            sales_reps=Count('pk', filter=Q(is_superuser=False)),
+            superusers=Count('pk', filter=Q(is_superuser=True)),
+        )
+
+    def _query_companies(self, detailed):
+        result = Company.objects.aggregate(
+            total=Count('pk'),
+            with_customers=Count('pk', filter=Exists(Customer.objects.filter(company=OuterRef('pk')))),
+        )
+        if detailed:
+            result['top'] = list(
+                Company.objects.annotate(customer_count=Count('customers'))
+                .order_by('-customer_count', 'name')
+                .values('name', 'customer_count')[:5]
+            )
+        return result
+
+    def _query_customers(self):
+        """Conteos, referencias, problemas y edades de los clientes en una consulta"""
+        today = self.now.date()
+
+        aggregates = {
+            'total': Count('pk'),
+            'active': Count('pk', filter=Q(is_active=True)),
+            'with_birth_date': Count('birth_date'),
+            'without_company': Count('pk', filter=Q(company__isnull=True)),
+            'without_sales_rep': Count('pk', filter=Q(sales_rep__isnull=True)),
+            # Referencias a filas que ya no existen (NOT IN sobre la tabla relacionada)
+            'invalid_company_refs': Count('pk', filter=Q(company__isnull=False) & ~Q(
+                company__in=Company.objects.values('pk')
+            )),
+            'invalid_sales_rep_refs': Count('pk', filter=Q(sales_rep__isnull=False) & ~Q(
+                sales_rep__in=User.objects.values('pk')
+            )),
+            # Edad: la mínima es la fecha de nacimiento más reciente y viceversa
+            'youngest_birth_date': Max('birth_date'),
+            'oldest_birth_date': Min('birth_date'),
+            'average_age': Avg(ExpressionWrapper(
+                Value(today) - F('birth_date'), output_field=DurationField()
+            )),
+        }
+        for issue in self.issues:
+            if issue.model is Customer:
+                aggregates[issue.name] = Count('pk', filter=issue.condition)
+
+        # Histograma: edad en [desde, hasta) <=> fecha de nacimiento en un rango
+        for low, high in AGE_BUCKETS:
+            condition = Q(birth_date__lte=today - timedelta(days=low * 365))
+            if high is not None:
+                condition &= Q(birth_date__gt=today - timedelta(days=high * 365))
+            aggregates[f'age_{age_bucket_label(low, high)}'] = Count('pk', filter=condition)
+
+        return Customer.objects.aggregate(**aggregates)
+
+    def _query_sales_reps(self):
+        rows = Customer.objects.values('sales_rep__username').annotate(
+            count=Count('id')
+        ).order_by('sales_rep__username')
+        return {row['sales_rep__username']: row['count'] for row in rows}
+
+    def _query_interactions(self):
+        """Conteos por tipo, problemas y actividad reciente en una consulta"""
+        aggregates = {
+            **interaction_type_counts(),
+            'without_customer': Count('pk', filter=~Q(customer__in=Customer.objects.values('pk'))),
+            'last_6_months': Count('pk', filter=Q(interaction_date__gte=self.now - timedelta(days=180))),
+        }
+        for issue in self.issues:
+            # La comparación con el cliente necesita un JOIN: va en su propia consulta
+            if issue.model is Interaction and issue.name != 'interactions_before_customer':
+                aggregates[issue.name] = Count('pk', filter=issue.condition)
+        return Interaction.objects.aggregate(**aggregates)
+
+    def _query_interaction_dates(self):
+        issue = next(issue for issue in self.issues if issue.name == 'interactions_before_customer')
+        return issue.queryset().count()
+
+    def _query_top_customers(self):
+        # Se agrupa sobre el índice (customer, interaction_date), sin JOIN
+        top = list(
+            Interaction.objects.order_by().values('customer_id')
+            .annotate(interaction_count=Count('pk'))
+            .order_by('-interaction_count', 'customer_id')[:5]
+        )
+        customers = Customer.objects.select_related('company').in_bulk(
+            [row['customer_id'] for row in top]
+        )
+        return [
+            {
+                'customer': customers[row['customer_id']].get_full_name(),
+                'company': customers[row['customer_id']].company.name,
+                'interaction_count': row['interaction_count'],
+            }
+            for row in top if row['customer_id'] in customers
+        ]
+
+    def _detailed_report(self, companies, customers, interactions, top_customers):
+        today = self.now.date()
+        ages = None
+        if customers['with_birth_date']:
+            ages = {
+                'min': (today - customers['youngest_birth_date']).days // 365,
+                'max': (today - customers['oldest_birth_date']).days // 365,
+                'average': round(customers['average_age'].days / 365, 1),
+                'histogram': {
+                    age_bucket_label(low, high): customers[f'age_{age_bucket_label(low, high)}']
+                    for low, high in AGE_BUCKETS
+                },
+            }
+
+        total = interactions['total_count']
+        by_type = sorted(
+            ((name, interactions[f'{name.lower()}_count']) for name, _ in INTERACTION_TYPE_CHOICES),
+            key=lambda item: -item[1],
+        )
+        return {
+            'companies': {
+                'with_customers': companies['with_customers'],
+                'without_customers': companies['total'] - companies['with_customers'],
+                'top': companies['top'],
+            },
+            'customers': {
+                'with_birth_date': customers['with_birth_date'],
+                'active': customers['active'],
+                'ages': ages,
+            },
+            'interactions': {
+                'by_type': {
+                    name: {'count': count, 'percentage': round(count * 100.0 / total, 1) if total else 0.0}
+                    for name, count in by_type if count
+                },
+                'last_6_months': interactions['last_6_months'],
+            },
+            'top_customers': top_customers,
+        }
+
+    def _find_issues(self, report):
+        """Lista de problemas encontrados (mensajes del reporte de texto)"""
+        counts = report['counts']
+        issues = {'counts': [], 'integrity': [], 'business': []}
+
+        if counts['sales_reps'] < 3:
+            issues['counts'].append(f'Pocos sales reps: {counts["sales_reps"]} (esperado: 3)')
+        if counts['companies'] < 30:
+            issues['counts'].append(f'Pocas empresas: {counts["companies"]} (esperado: ~50)')
+        if counts['customers'] < 800:
+            issues['counts'].append(f'Pocos clientes: {counts["customers"]} (esperado: ~1000)')
+        if counts['interactions'] < 40000:  # Mínimo esperado para mode rápido
+            issues['counts'].append(f'Pocas interacciones: {counts["interactions"]:,} (esperado: >40K)')
+
+        integrity_labels = {
+            'customers_without_company': 'Clientes sin empresa',
+            'customers_without_sales_rep': 'Clientes sin sales rep',
+            'interactions_without_customer': 'Interacciones sin cliente',
+            'invalid_company_refs': 'Referencias de empresa inválidas',
+            'invalid_sales_rep_refs': 'Referencias de sales rep inválidas',
+        }
+        for key, label in integrity_labels.items():
+            if report['integrity'][key]:
+                issues['integrity'].append(f'{label}: {report["integrity"][key]}')
+
+        for issue in self.issues:
+            if report['business'][issue.name]:
+                issues['business'].append(f'{issue.label}: {report["business"][issue.name]:,}')
+        ratio = report['business']['sales_rep_imbalance_ratio']
+        if ratio is None and report['sales_rep_distribution']:
+            ratio = float('inf')
+        if ratio is not None and ratio > 2.0:  # Más del 100% de diferencia
+            issues['business'].append(f'Desbalance en distribución de clientes (ratio: {ratio:.1f})')
+
+        return issues
+
+    # ========== REPORTE DE TEXTO ==========
+
+    def _print_issues(self, issues, title, style):
         if issues:
-            self.stdout.write(self.style.WARNING('\n⚠️  PROBLEMAS ENCONTRADOS:'))
+            self.stdout.write(style(f'\n{title}'))
             for issue in issues:
                 self.stdout.write(f'  ❗ {issue}')
-        else:
+        return bool(issues)
+
+    def _print_counts(self, report):
+        counts = report['counts']
+        self.stdout.write('\n📊 VALIDACIÓN BÁSICA DE CONTEOS:')
+        self.stdout.write(f'  👥 Sales Representatives: {counts["sales_reps"]}')
+        self.stdout.write(f'  🏢 Empresas: {counts["companies"]}')
+        self.stdout.write(f'  👤 Clientes: {counts["customers"]}')
+        self.stdout.write(f'  💬 Interacciones: {counts["interactions"]:,}')
+        self.stdout.write(f'  🔑 Superusuarios: {counts["superusers"]}')
+
+        if not self._print_issues(report['issues']['counts'], '⚠️  PROBLEMAS ENCONTRADOS:', self.style.WARNING):
             self.stdout.write(self.style.SUCCESS('  ✅ Conteos están en rangos esperados'))
 
-    def _referential_integrity(self):
-        """Valida integridad referencial"""
-        
+    def _print_integrity(self, report):
         self.stdout.write('\n🔗 VALIDACIÓN DE INTEGRIDAD REFERENCIAL:')
-        
-        # Clientes huérfanos (sin empresa o sales rep)
-        orphan_customers_company = Customer.objects.filter(company__isnull=True).count()
-        orphan_customers_rep = Customer.objects.filter(sales_rep__isnull=True).count()
-        
-        # Interacciones huérfanas (sin cliente)
-        orphan_interactions = Interaction.objects.filter(customer__isnull=True).count()
-        
-        # Clientes con empresas inexistentes
-        invalid_company_refs = Customer.objects.exclude(
-            company__in=Company.objects.all()
-        ).count()
-        
-        # Clientes con sales reps inexistentes
-        invalid_rep_refs = Customer.objects.exclude(
-            sales_rep__in=User.objects.all()
-        ).count()
-        
-        # Mostrar resultados
-        integrity_issues = []
-        
-        if orphan_customers_company > 0:
-            integrity_issues.append(f'Clientes sin empresa: {orphan_customers_company}')
-        
-        if orphan_customers_rep > 0:
-            integrity_issues.append(f'Clientes sin sales rep: {orphan_customers_rep}')
-        
-        if orphan_interactions > 0:
-            integrity_issues.append(f'Interacciones sin cliente: {orphan_interactions}')
-        
-        if invalid_company_refs > 0:
-            integrity_issues.append(f'Referencias de empresa inválidas: {invalid_company_refs}')
-        
-        if invalid_rep_refs > 0:
-            integrity_issues.append(f'Referencias de sales rep inválidas: {invalid_rep_refs}')
-        
-        if integrity_issues:
-            self.stdout.write(self.style.ERROR('\n❌ PROBLEMAS DE INTEGRIDAD:'))
-            for issue in integrity_issues:
-                self.stdout.write(f'  ❗ {issue}')
-        else:
+        if not self._print_issues(report['issues']['integrity'], '❌ PROBLEMAS DE INTEGRIDAD:', self.style.ERROR):
             self.stdout.write(self.style.SUCCESS('  ✅ Integridad referencial correcta'))
 
-    def _business_logic_validation(self):
-        """Valida lógica de negocio"""
-        
+    def _print_business(self, report):
         self.stdout.write('\n💼 VALIDACIÓN DE LÓGICA DE NEGOCIO:')
-        
-        # Fechas de nacimiento futuras
-        future_births = Customer.objects.filter(
-            birth_date__gt=timezone.now().date()
-        ).count()
-        
-        # Fechas de interacción futuras
-        future_interactions = Interaction.objects.filter(
-            interaction_date__gt=timezone.now()
-        ).count()
-        
-        # Interacciones antes de la creación del cliente
-        invalid_interaction_dates = Interaction.objects.filter(
-            interaction_date__lt=F('customer__created_at')
-        ).count()
-        
-        # Clientes menores de edad (menos de 18 años)
-        eighteen_years_ago = timezone.now().date() - timedelta(days=18*365)
-        underage_customers = Customer.objects.filter(
-            birth_date__gt=eighteen_years_ago
-        ).count()
-        
-        # Distribución de clientes por sales rep (verificar balance)
-        rep_distribution = Customer.objects.values('sales_rep__username').annotate(
-            count=Count('id')
-        ).order_by('sales_rep__username')
-        
-        max_customers = max([rep['count'] for rep in rep_distribution]) if rep_distribution else 0
-        min_customers = min([rep['count'] for rep in rep_distribution]) if rep_distribution else 0
-        imbalance_ratio = max_customers / min_customers if min_customers > 0 else float('inf')
-        
-        # Mostrar resultados
-        business_issues = []
-        
-        if future_births > 0:
-            business_issues.append(f'Fechas de nacimiento futuras: {future_births}')
-        
-        if future_interactions > 0:
-            business_issues.append(f'Interacciones en el futuro: {future_interactions}')
-        
-        if invalid_interaction_dates > 0:
-            business_issues.append(f'Interacciones antes de creación del cliente: {invalid_interaction_dates}')
-        
-        if underage_customers > 0:
-            business_issues.append(f'Clientes menores de edad: {underage_customers}')
-        
-        if imbalance_ratio > 2.0:  # Más del 100% de diferencia
-            business_issues.append(f'Desbalance en distribución de clientes (ratio: {imbalance_ratio:.1f})')
-        
-        if business_issues:
-            self.stdout.write(self.style.WARNING('\n⚠️  PROBLEMAS DE LÓGICA DE NEGOCIO:'))
-            for issue in business_issues:
-                self.stdout.write(f'  ❗ {issue}')
+        if self._print_issues(report['issues']['business'], '⚠️  PROBLEMAS DE LÓGICA DE NEGOCIO:', self.style.WARNING):
+            self.stdout.write('  💡 Corregir: python manage.py repair_data --dry-run')
         else:
             self.stdout.write(self.style.SUCCESS('  ✅ Lógica de negocio correcta'))
-        
+
         # Mostrar distribución por sales rep
         self.stdout.write('\n👥 DISTRIBUCIÓN POR SALES REP:')
-        for rep in rep_distribution:
-            self.stdout.write(f'  {rep["sales_rep__username"]}: {rep["count"]} clientes')
+        for username, count in report['sales_rep_distribution'].items():
+            self.stdout.write(f'  {username}: {count} clientes')
 
-    def _detailed_statistics(self):
-        """Estadísticas detalladas del sistema"""
-        
+    def _print_detailed(self, report):
+        detailed = report['detailed']
         self.stdout.write('\n📈 ESTADÍSTICAS DETALLADAS:')
-        
-        # Estadísticas de empresas
-        companies_with_customers = Company.objects.filter(
-            customers__isnull=False
-        ).distinct().count()
-        companies_without_customers = Company.objects.filter(
-            customers__isnull=True
-        ).count()
-        
+
+        companies = detailed['companies']
         self.stdout.write('\n🏢 EMPRESAS:')
-        self.stdout.write(f'  Con clientes: {companies_with_customers}')
-        self.stdout.write(f'  Sin clientes: {companies_without_customers}')
-        
-        # Top empresas por número de clientes
-        top_companies = Company.objects.annotate(
-            customer_count=Count('customers')
-        ).order_by('-customer_count')[:5]
-        
+        self.stdout.write(f'  Con clientes: {companies["with_customers"]}')
+        self.stdout.write(f'  Sin clientes: {companies["without_customers"]}')
         self.stdout.write('  Top 5 empresas por clientes:')
-        for company in top_companies:
-            self.stdout.write(f'    {company.name}: {company.customer_count} clientes')
-        
-        # Estadísticas de clientes
-        customers_with_birth_date = Customer.objects.filter(
-            birth_date__isnull=False
-        ).count()
-        active_customers = Customer.objects.filter(is_active=True).count()
-        
+        for company in companies['top']:
+            self.stdout.write(f'    {company["name"]}: {company["customer_count"]} clientes')
+
+        customers = detailed['customers']
         self.stdout.write('\n👤 CLIENTES:')
-        self.stdout.write(f'  Con fecha de nacimiento: {customers_with_birth_date}')
-        self.stdout.write(f'  Activos: {active_customers}')
-        
-        # Rango de edades
-        if customers_with_birth_date > 0:
-            ages = []
-            for customer in Customer.objects.filter(birth_date__isnull=False):
-                age = (timezone.now().date() - customer.birth_date).days // 365
-                ages.append(age)
-            
-            if ages:
-                min_age = min(ages)
-                max_age = max(ages)
-                avg_age = sum(ages) / len(ages)
-                
-                self.stdout.write(f'  Edad mínima: {min_age} años')
-                self.stdout.write(f'  Edad máxima: {max_age} años')
-                self.stdout.write(f'  Edad promedio: {avg_age:.1f} años')
-        
-        # Estadísticas de interacciones
-        interaction_stats = Interaction.objects.values('interaction_type').annotate(
-            count=Count('id'),
-            percentage=Count('id') * 100.0 / Interaction.objects.count()
-        ).order_by('-count')
-        
+        self.stdout.write(f'  Con fecha de nacimiento: {customers["with_birth_date"]}')
+        self.stdout.write(f'  Activos: {customers["active"]}')
+        ages = customers['ages']
+        if ages:
+            self.stdout.write(f'  Edad mínima: {ages["min"]} años')
+            self.stdout.write(f'  Edad máxima: {ages["max"]} años')
+            self.stdout.write(f'  Edad promedio: {ages["average"]:.1f} años')
+            self.stdout.write('  Distribución por edad:')
+            largest = max(ages['histogram'].values()) or 1
+            for label, count in ages['histogram'].items():
+                bar = '█' * round(count * 30 / largest)
+                self.stdout.write(f'    {label:>6}: {count:>7,} {bar}')
+
+        interactions = detailed['interactions']
         self.stdout.write('\n💬 INTERACCIONES POR TIPO:')
-        for stat in interaction_stats:
-            self.stdout.write(
-                f'  {stat["interaction_type"]}: {stat["count"]:,} ({stat["percentage"]:.1f}%)'
-            )
-        
-        # Actividad por mes (últimos 6 meses)
-        six_months_ago = timezone.now() - timedelta(days=180)
-        recent_interactions = Interaction.objects.filter(
-            interaction_date__gte=six_months_ago
-        ).count()
-        
-        self.stdout.write(f'\n📅 Interacciones últimos 6 meses: {recent_interactions:,}')
-        
-        # Clientes más activos
-        most_active_customers = Customer.objects.annotate(
-            interaction_count=Count('interactions')
-        ).order_by('-interaction_count')[:5]
-        
+        for name, stat in interactions['by_type'].items():
+            self.stdout.write(f'  {name}: {stat["count"]:,} ({stat["percentage"]:.1f}%)')
+        self.stdout.write(f'\n📅 Interacciones últimos 6 meses: {interactions["last_6_months"]:,}')
+
         self.stdout.write('\n⭐ TOP 5 CLIENTES MÁS ACTIVOS:')
-        for customer in most_active_customers:
+        for customer in detailed['top_customers']:
             self.stdout.write(
-                f'  {customer.get_full_name()} ({customer.company.name}): '
-                f'{customer.interaction_count} interacciones'
+                f'  {customer["customer"]} ({customer["company"]}): '
+                f'{customer["interaction_count"]} interacciones'
             )
 
-    def _performance_tests(self):
-        """Test básicos de rendimiento"""
-        
-        self.stdout.write('\n⚡ TESTS DE RENDIMIENTO:')
-        
-        # Test 1: Lista de clientes con empresa y última interacción
-        start_time = datetime.now()
-        
-        customers_with_data = Customer.objects.select_related(
-            'company', 'sales_rep'
-        ).prefetch_related('interactions').all()[:100]
-        
-        # Forzar evaluación de la query
-        list(customers_with_data)
-        
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
-        
-        self.stdout.write(f'  📋 Lista 100 clientes con relaciones: {duration:.3f}s')
-        
-        # Test 2: Conteo de interacciones por tipo
-        start_time = datetime.now()
-        
-        interaction_counts = Interaction.objects.values('interaction_type').annotate(
-            count=Count('id')
-        )
-        list(interaction_counts)
-        
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
-        
-        self.stdout.write(f'  📊 Agregación por tipo de interacción: {duration:.3f}s')
-        
-        # Test 3: Búsqueda de cliente por nombre
-        start_time = datetime.now()
-        
-        search_results = Customer.objects.filter(
-            Q(first_name__icontains='María') | Q(last_name__icontains='García')
-        ).select_related('company', 'sales_rep')[:20]
-        list(search_results)
-        
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
-        
-        self.stdout.write(f'  🔍 Búsqueda por nombre (20 resultados): {duration:.3f}s')
-        
-        # Test 4: Estadísticas por sales rep
-        start_time = datetime.now()
-        
-        rep_stats = User.objects.filter(is_superuser=False).annotate(
-            customer_count=Count('assigned_customers'),
-            interaction_count=Count('assigned_customers__interactions')
-        )
-        list(rep_stats)
-        
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
-        
-        self.stdout.write(f'  👥 Estadísticas por sales rep: {duration:.3f}s')
-        
-        # Evaluación general de rendimiento
-        total_records = (Customer.objects.count() + 
-                        Interaction.objects.count() + 
-                        Company.objects.count())
-        
-        self.stdout.write(f'\n📊 Total de registros en sistema: {total_records:,}')
-        
-        if duration < 1.0:
-            self.stdout.write(self.style.SUCCESS('  ✅ Rendimiento excelente'))
-        elif duration < 3.0:
-            self.stdout.write(self.style.SUCCESS('  ✅ Rendimiento bueno'))
-        elif duration < 5.0:
-            self.stdout.write(self.style.WARNING('  ⚠️  Rendimiento aceptable'))
-        else:
-            self.stdout.write(self.style.ERROR('  ❌ Rendimiento deficiente'))
+    # ========== RENDIMIENTO ==========
+
+    def _performance_tests(self, as_json):
+        """Tests de rendimiento: suite de consultas del comando benchmark"""
+
+        # Varias ejecuciones por consulta con percentiles, en lugar de una sola medición
+        output = StringIO()
+        if not as_json:
+            output.write('\n⚡ TESTS DE RENDIMIENTO:\n')
+            call_command('benchmark', suite=['queries'], iterations=10, warmup=2, stdout=output)
+            output.write('  💡 Suite completa y comparación con una base: python manage.py benchmark --help')
+            return output.getvalue()
+
+        path = os.path.join(tempfile.gettempdir(), f'crm_validate_benchmark_{os.getpid()}.json')
+        try:
+            call_command('benchmark', suite=['queries'], iterations=10, warmup=2, output=path, stdout=output)
+            with open(path, encoding='utf-8') as handle:
+                return json.load(handle)['results']
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,387 @@
+"""
+Métricas de rendimiento por petición en formato Prometheus.
+
+MetricsMiddleware mide cada petición y la agrupa por nombre de URL
+(``crm_app:customer_list``, ``admin:crm_app_customer_changelist``...) y
+método HTTP:
+
+- Latencia total (histograma).
+- Consultas SQL por petición (histograma) y tiempo total en base de datos.
+- Tiempo de renderizado de plantillas (TemplateResponse).
+
+En las respuestas en streaming (API NDJSON, exportaciones) la petición se
+registra cuando termina de enviarse el cuerpo: la latencia y las consultas
+incluyen las que se lanzan mientras se genera.
+
+Las consultas se cuentan con un ``execute_wrapper`` que se instala en cada
+conexión al abrirse (señal connection_created) y atribuye la consulta a la
+petición en curso mediante una ContextVar. Así también se cuentan las
+consultas que una vista lanza en otros hilos con sync_to_async, porque
+asgiref copia el contexto.
+
+Cada proceso acumula los valores en memoria y cada CRM_METRICS_FLUSH_INTERVAL
+segundos suma los incrementos a un archivo SQLite compartido
+(CRM_METRICS_DB), de modo que /metrics devuelve el total de todos los
+workers. El coste por petición es un par de perf_counter() y unas sumas en
+un diccionario; la escritura en disco se hace como mucho una vez por
+intervalo y proceso.
+
+/metrics muestra latencias y tiempos de SQL por vista, así que solo responde
+al staff con sesión iniciada, a quien envíe CRM_METRICS_TOKEN como token
+Bearer y a las direcciones o redes de CRM_METRICS_ALLOWED_IPS; al resto,
+403.
+
+Uso:
+    curl -H "Authorization: Bearer $CRM_METRICS_TOKEN" http://localhost:8000/metrics
+
+    # prometheus.yml
+    scrape_configs:
+      - job_name: crm
+        authorization:
+          credentials: <CRM_METRICS_TOKEN>
+        static_configs:
+          - targets: ['localhost:8000']
+"""
+
+import atexit
+import hmac
+import ipaddress
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# Nombre -> (tipo, descripción, buckets si es histograma)
+METRICS = {
+    'crm_http_request_duration_seconds': (
+        'histogram', 'Latencia de las peticiones por vista', LATENCY_BUCKETS,
+    ),
+    'crm_http_responses_total': (
+        'counter', 'Respuestas por vista y clase de código HTTP', None,
+    ),
+    'crm_db_queries_per_request': (
+        'histogram', 'Consultas SQL por petición', QUERY_BUCKETS,
+    ),
+    'crm_db_query_duration_seconds_total': (
+        'counter', 'Tiempo total en la base de datos por vista', None,
+    ),
+    'crm_template_render_seconds_total': (
+        'counter', 'Tiempo total de renderizado de plantillas por vista', None,
+    ),
+}
+
+# Vistas que no se miden
+EXCLUDED_VIEWS = {'crm_app:metrics'}
+
+_current = ContextVar('crm_request_metrics', default=None)
+
+# Incrementos pendientes de volcar: (métrica, etiquetas, le) -> valor
+_pending = defaultdict(float)
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+_sink = None
+_sink_pid = None
+
+
+class RequestMetrics:
+    """Acumulador de una petición; se comparte con los hilos de sync_to_async"""
+
+    __slots__ = ('queries', 'db_time', 'template_time', '_lock')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self._lock = threading.Lock()
+
+    def add_query(self, duration):
+        with self._lock:
+            self.queries += 1
+            self.db_time += duration
+
+    def add_template_time(self, duration):
+        with self._lock:
+            self.template_time += duration
+
+
+# ========== CONSULTAS SQL ==========
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper: mide la consulta si hay una petición en curso"""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add_query(time.perf_counter() - start)
+
+
+@receiver(connection_created)
+def install_query_wrapper(sender, connection, **kwargs):
+    """Instala record_query en cada conexión (una vez, aunque se reconecte)"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# ========== MIDDLEWARE ==========
+
+class MetricsMiddleware:
+    """Mide latencia, consultas y renderizado de cada petición (WSGI y ASGI)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'CRM_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats, token, start = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, stats, start)
+        return response
+
+    async def __acall__(self, request):
+        stats, token, start = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, stats, start)
+        return response
+
+    def start(self, request):
+        stats = RequestMetrics()
+        request._crm_metrics = stats
+        return stats, _current.set(stats), time.perf_counter()
+
+    def finish(self, request, response, stats, start):
+        if response.streaming:
+            # Se registra al cerrarse el iterador del cuerpo, no al devolver la respuesta
+            if response.is_async:
+                response.streaming_content = self._measure_async_streaming(
+                    response.streaming_content, request, response, stats, start,
+                )
+            else:
+                response.streaming_content = self._measure_streaming(
+                    response.streaming_content, request, response, stats, start,
+                )
+            return
+        self.record(request, response, stats, start)
+
+    def record(self, request, response, stats, start):
+        duration = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        if view not in EXCLUDED_VIEWS:
+            observe(view, request.method, response.status_code, duration, stats)
+
+    def _measure_streaming(self, content, request, response, stats, start):
+        iterator = iter(content)
+        try:
+            while True:
+                token = _current.set(stats)
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    _current.reset(token)
+                yield chunk
+        finally:
+            self.record(request, response, stats, start)
+
+    async def _measure_async_streaming(self, content, request, response, stats, start):
+        iterator = aiter(content)
+        try:
+            while True:
+                token = _current.set(stats)
+                try:
+                    chunk = await anext(iterator)
+                except StopAsyncIteration:
+                    return
+                finally:
+                    _current.reset(token)
+                yield chunk
+        finally:
+            self.record(request, response, stats, start)
+
+    def process_template_response(self, request, response):
+        # Se llama justo antes de render(); el callback se ejecuta al terminar
+        stats = getattr(request, '_crm_metrics', None)
+        if stats is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: stats.add_template_time(time.perf_counter() - start)
+            )
+        return response
+
+
+# ========== AGREGACIÓN ==========
+
+def _observe_histogram(name, labels, value, buckets):
+    for bound in buckets:
+        if value <= bound:
+            _pending[(name, labels, repr(float(bound)))] += 1
+            break
+    else:
+        _pending[(name, labels, '+Inf')] += 1
+    _pending[(name + '_sum', labels, '')] += value
+    _pending[(name + '_count', labels, '')] += 1
+
+
+def observe(view, method, status_code, duration, stats):
+    """Acumula en memoria una petición terminada"""
+    labels = format_labels(view=view, method=method)
+    with _lock:
+        _observe_histogram('crm_http_request_duration_seconds', labels, duration, LATENCY_BUCKETS)
+        _observe_histogram('crm_db_queries_per_request', labels, stats.queries, QUERY_BUCKETS)
+        _pending[('crm_db_query_duration_seconds_total', labels, '')] += stats.db_time
+        _pending[('crm_template_render_seconds_total', labels, '')] += stats.template_time
+        status_labels = format_labels(view=view, method=method, status=f'{status_code // 100}xx')
+        _pending[('crm_http_responses_total', status_labels, '')] += 1
+
+    if time.monotonic() - _last_flush >= getattr(settings, 'CRM_METRICS_FLUSH_INTERVAL', 5):
+        flush()
+
+
+def format_labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+# ========== ALMACÉN COMPARTIDO ==========
+
+def _connect():
+    """Conexión al archivo compartido (una por proceso; se reabre tras un fork)"""
+    global _sink, _sink_pid
+    if _sink is None or _sink_pid != os.getpid():
+        path = getattr(settings, 'CRM_METRICS_DB', None) or os.path.join(
+            settings.BASE_DIR, 'metrics.sqlite3'
+        )
+        _sink = sqlite3.connect(str(path), timeout=5, check_same_thread=False, isolation_level=None)
+        _sink.execute('PRAGMA journal_mode=WAL')
+        _sink.execute('PRAGMA synchronous=NORMAL')
+        _sink.execute(
+            'CREATE TABLE IF NOT EXISTS metrics ('
+            ' name TEXT NOT NULL, labels TEXT NOT NULL, le TEXT NOT NULL, value REAL NOT NULL,'
+            ' PRIMARY KEY (name, labels, le))'
+        )
+        _sink_pid = os.getpid()
+    return _sink
+
+
+def flush():
+    """Suma los incrementos pendientes de este proceso al archivo compartido"""
+    global _last_flush
+    with _lock:
+        _last_flush = time.monotonic()
+        if not _pending:
+            return
+        rows = [(name, labels, le, value) for (name, labels, le), value in _pending.items()]
+        _pending.clear()
+        try:
+            sink = _connect()
+            with sink:
+                sink.execute('BEGIN IMMEDIATE')
+                sink.executemany(
+                    'INSERT INTO metrics (name, labels, le, value) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (name, labels, le) DO UPDATE SET value = value + excluded.value',
+                    rows,
+                )
+        except sqlite3.Error:
+            # Archivo bloqueado: se reintenta en el siguiente volcado
+            for name, labels, le, value in rows:
+                _pending[(name, labels, le)] += value
+
+
+def reset_metrics():
+    """Borra las métricas acumuladas (de este proceso y del archivo compartido)"""
+    with _lock:
+        _pending.clear()
+        _connect().execute('DELETE FROM metrics')
+
+
+def _sample(value):
+    """Valor de una muestra: entero exacto si lo es (conteos y buckets), repr() si no"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+# ========== ACCESO ==========
+
+def metrics_access_allowed(request):
+    """Staff, token Bearer de CRM_METRICS_TOKEN o dirección en CRM_METRICS_ALLOWED_IPS"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_active and user.is_staff:
+        return True
+
+    token = getattr(settings, 'CRM_METRICS_TOKEN', '')
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    if token and scheme.lower() == 'bearer' and hmac.compare_digest(credentials.strip().encode(), token.encode()):
+        return True
+
+    networks = getattr(settings, 'CRM_METRICS_ALLOWED_IPS', ())
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in networks)
+
+
+# ========== FORMATO DE PROMETHEUS ==========
+
+def render_metrics():
+    """Métricas de todos los workers en el formato de texto de Prometheus"""
+    flush()
+    with _lock:
+        rows = _connect().execute('SELECT name, labels, le, value FROM metrics').fetchall()
+
+    series = defaultdict(dict)
+    for name, labels, le, value in rows:
+        series[name][(labels, le)] = value
+
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            for (labels, _), value in sorted(series[name].items()):
+                lines.append(f'{name}{{{labels}}} {_sample(value)}')
+            continue
+
+        # Histograma: los buckets se guardan sin acumular y se acumulan aquí
+        for (labels, _), count in sorted(series[name + '_count'].items()):
+            cumulative = 0
+            for bound in [repr(float(bound)) for bound in buckets] + ['+Inf']:
+                cumulative += series[name].get((labels, bound), 0)
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {_sample(cumulative)}')
+            lines.append(f'{name}_sum{{{labels}}} {_sample(series[name + "_sum"].get((labels, ""), 0))}')
+            lines.append(f'{name}_count{{{labels}}} {_sample(count)}')
+    return '\n'.join(lines) + '\n'
+
+
+atexit.register(flush)
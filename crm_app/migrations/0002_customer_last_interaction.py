@@ -0,0 +1,51 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_last_interaction(apps, schema_editor):
+    Customer = apps.get_model('crm_app', 'Customer')
+    Interaction = apps.get_model('crm_app', 'Interaction')
+
+    latest = Interaction.objects.filter(
+        customer=OuterRef('pk')
+    ).order_by('-interaction_date', '-pk')
+
+    Customer.objects.update(
+        last_interaction=Subquery(latest.values('pk')[:1]),
+        last_interaction_at=Subquery(latest.values('interaction_date')[:1]),
+        last_interaction_type=Coalesce(Subquery(latest.values('interaction_type')[:1]), Value('')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='last_interaction',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='crm_app.interaction', verbose_name='Última Interacción'),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='last_interaction_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Fecha de Última Interacción'),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='last_interaction_type',
+            field=models.CharField(blank=True, choices=[('Call', 'Call'), ('Email', 'Email'), ('SMS', 'SMS'), ('Facebook', 'Facebook'), ('WhatsApp', 'WhatsApp'), ('Meeting', 'Meeting'), ('Other', 'Other')], default='', editable=False, max_length=20, verbose_name='Tipo de Última Interacción'),
+        ),
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(fields=['customer', '-interaction_date'], name='interaction_customer_date_idx'),
+        ),
+        migrations.RunPython(backfill_last_interaction, migrations.RunPython.noop),
+    ]
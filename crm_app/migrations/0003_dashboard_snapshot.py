@@ -0,0 +1,60 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:16
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def build_snapshot(apps, schema_editor):
+    Company = apps.get_model('crm_app', 'Company')
+    Customer = apps.get_model('crm_app', 'Customer')
+    Interaction = apps.get_model('crm_app', 'Interaction')
+    DashboardSnapshot = apps.get_model('crm_app', 'DashboardSnapshot')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    rows = [
+        ('total', 'customers', Customer.objects.count()),
+        ('total', 'companies', Company.objects.count()),
+        ('total', 'interactions', Interaction.objects.count()),
+        ('total', 'sales_reps', User.objects.filter(is_superuser=False).count()),
+    ]
+    rows += [
+        ('sales_rep', str(row['sales_rep_id']), row['count'])
+        for row in Customer.objects.order_by().values('sales_rep_id').annotate(count=Count('id'))
+    ]
+    rows += [
+        ('interaction_type', row['interaction_type'], row['count'])
+        for row in Interaction.objects.order_by().values('interaction_type').annotate(count=Count('id'))
+    ]
+
+    DashboardSnapshot.objects.bulk_create([
+        DashboardSnapshot(scope=scope, key=key, value=value) for scope, key, value in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm_app', '0002_customer_last_interaction'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('total', 'total'), ('sales_rep', 'sales_rep'), ('interaction_type', 'interaction_type')], max_length=20, verbose_name='Ámbito')),
+                ('key', models.CharField(max_length=50, verbose_name='Clave')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Valor')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de Actualización')),
+            ],
+            options={
+                'verbose_name': 'Snapshot del Dashboard',
+                'verbose_name_plural': 'Snapshots del Dashboard',
+                'db_table': 'crm_app_dashboard_snapshot',
+                'constraints': [models.UniqueConstraint(fields=('scope', 'key'), name='dashboard_snapshot_scope_key_uniq')],
+            },
+        ),
+        migrations.RunPython(build_snapshot, migrations.RunPython.noop),
+    ]
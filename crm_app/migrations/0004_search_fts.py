@@ -0,0 +1,74 @@
+# Índices de texto completo FTS5 para la búsqueda de clientes y empresas
+
+from django.db import migrations
+
+# (tabla base, tabla FTS, columnas indexadas)
+FTS_TABLES = [
+    ('crm_app_customers', 'crm_app_customers_fts', ['first_name', 'last_name']),
+    ('crm_app_companies', 'crm_app_companies_fts', ['name']),
+]
+
+
+def fts5_supported(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_fts(apps, schema_editor):
+    connection = schema_editor.connection
+    if not fts5_supported(connection):
+        # Sin FTS5 las vistas usan la búsqueda icontains del ORM
+        return
+
+    for table, fts_table, columns in FTS_TABLES:
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {fts_table} USING fts5("
+            f"{column_list}, content='{table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); "
+            f"END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+            f"END"
+        )
+        # Solo se dispara si el UPDATE toca las columnas indexadas
+        schema_editor.execute(
+            f"CREATE TRIGGER {fts_table}_au AFTER UPDATE OF {column_list} ON {table} BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); "
+            f"END"
+        )
+        schema_editor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    for table, fts_table, columns in FTS_TABLES:
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts_table}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {fts_table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm_app', '0003_dashboard_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:05
+
+from django.db import migrations, models
+from django.db.models.functions import ExtractDay, ExtractMonth
+
+
+def backfill_birthday_key(apps, schema_editor):
+    Customer = apps.get_model('crm_app', 'Customer')
+    Customer.objects.filter(birth_date__isnull=False).update(
+        birthday_key=ExtractMonth('birth_date') * 100 + ExtractDay('birth_date')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm_app', '0004_search_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='birthday_key',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='Clave de Cumpleaños'),
+        ),
+        migrations.RunPython(backfill_birthday_key, migrations.RunPython.noop),
+    ]
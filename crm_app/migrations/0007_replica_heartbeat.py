@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm_app', '0006_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplicaHeartbeat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('updated_at', models.DateTimeField(verbose_name='Fecha de Actualización')),
+            ],
+            options={
+                'verbose_name': 'Heartbeat de Réplica',
+                'verbose_name_plural': 'Heartbeats de Réplica',
+                'db_table': 'crm_app_replica_heartbeat',
+            },
+        ),
+    ]
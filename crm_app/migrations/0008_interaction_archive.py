@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm_app', '0007_replica_heartbeat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedInteraction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('interaction_type', models.CharField(choices=[('Call', 'Call'), ('Email', 'Email'), ('SMS', 'SMS'), ('Facebook', 'Facebook'), ('WhatsApp', 'WhatsApp'), ('Meeting', 'Meeting'), ('Other', 'Other')], max_length=20, verbose_name='Tipo de Interacción')),
+                ('interaction_date', models.DateTimeField(verbose_name='Fecha de la Interacción')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activo')),
+                ('created_at', models.DateTimeField(verbose_name='Fecha de Creación')),
+                ('updated_at', models.DateTimeField(verbose_name='Fecha de Actualización')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Eliminación')),
+                ('archived_at', models.DateTimeField(verbose_name='Fecha de Archivo')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_interactions', to='crm_app.customer', verbose_name='Cliente Asociado')),
+            ],
+            options={
+                'verbose_name': 'Interacción Archivada',
+                'verbose_name_plural': 'Interacciones Archivadas',
+                'db_table': 'crm_app_interactions_archive',
+                'ordering': ['-interaction_date'],
+                'indexes': [models.Index(fields=['customer', 'interaction_date'], name='archive_customer_date_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,160 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def drop_birthday_key_index(apps, schema_editor):
+    Customer = apps.get_model('crm_app', 'Customer')
+    column = Customer._meta.get_field('birthday_key').column
+    for name in schema_editor._constraint_names(Customer, [column], index=True):
+        if name != 'customer_birthday_key_idx':
+            schema_editor.execute(schema_editor._delete_index_sql(Customer, name))
+
+
+def create_birthday_key_index(apps, schema_editor):
+    Customer = apps.get_model('crm_app', 'Customer')
+    schema_editor.execute(
+        schema_editor._create_index_sql(Customer, fields=[Customer._meta.get_field('birthday_key')])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm_app', '0008_interaction_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='company',
+            name='company_active_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='customer',
+            name='customer_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='customer',
+            name='customer_first_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='customer',
+            name='customer_active_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='customer',
+            name='customer_company_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='customer',
+            name='customer_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='customer',
+            name='customer_birth_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='customer',
+            name='customer_last_interaction_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='interaction',
+            name='interaction_customer_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='interaction',
+            name='interaction_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='interaction',
+            name='interaction_type_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='interaction',
+            name='interaction_active_date_idx',
+        ),
+        # En SQLite un AlterField reconstruye crm_app_customers y pierde los
+        # triggers FTS5 de la 0004: solo se borra el índice de db_index=True
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(drop_birthday_key_index, create_birthday_key_index),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='customer',
+                    name='birthday_key',
+                    field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='Clave de Cumpleaños'),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedinteraction',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='archive_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['is_active', 'name'], name='company_active_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='company_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['last_name', 'first_name'], name='customer_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['first_name'], name='customer_first_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['is_active', 'first_name'], name='customer_active_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['company', 'first_name'], name='customer_company_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['created_at'], name='customer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['birth_date'], name='customer_birth_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['last_interaction_at'], name='customer_last_interaction_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['birthday_key'], name='customer_birthday_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='customer_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['customer', 'interaction_date'], name='interaction_customer_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['interaction_date'], name='interaction_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['interaction_type', 'interaction_date'], name='interaction_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['is_active', 'interaction_date'], name='interaction_active_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='interaction_deleted_idx'),
+        ),
+    ]
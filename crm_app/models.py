@@ -1,8 +1,17 @@
-from django.db import models
+import calendar
+from datetime import date, timedelta
+
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When, Window
+from django.db.models.functions import Coalesce, ExtractDay, ExtractMonth
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
 
+from .counters import adjust_counter, bump_data_version, invalidate_counters
+from .querycache import bump_table_generations, cached_result, tracked_tables
+from .signals import batched, bulk_write, pks_required
+
 # ========== CHOICES SIMPLIFICADAS ==========
 
 INTERACTION_TYPE_CHOICES = [
@@ -15,9 +24,375 @@ INTERACTION_TYPE_CHOICES = [
     ('Other', 'Other'),
 ]
 
+# ========== CUMPLEAÑOS ==========
+
+def birthday_key(birth_date):
+    """Clave de cumpleaños mes*100+día (15 de marzo -> 315); None sin fecha"""
+    if birth_date is None:
+        return None
+    return birth_date.month * 100 + birth_date.day
+
+
+def birthday_key_expression():
+    """Misma clave calculada en SQL, para UPDATE set-based"""
+    return ExtractMonth('birth_date') * 100 + ExtractDay('birth_date')
+
+
+def birthday_key_ranges(start, end):
+    """
+    Rangos [desde, hasta] de birthday_key para los cumpleaños entre start y end
+    (ambos incluidos). Si el periodo cruza el fin de año se parte en dos rangos.
+    En años no bisiestos los nacidos el 29 de febrero celebran el 28.
+    """
+    if (end - start).days >= 365:
+        return [(101, 1231)]
+    
+    low, high = birthday_key(start), birthday_key(end)
+    if high == 228 and not calendar.isleap(end.year):
+        high = 229
+    if low <= high:
+        return [(low, high)]
+    return [(low, 1231), (101, high)]
+
+
+def month_bounds(day):
+    """Primer y último día del mes de ``day``"""
+    return day.replace(day=1), day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+# ========== SOFT DELETE ==========
+
+# Condición de los índices parciales: solo indexan las filas vivas, de modo
+# que su tamaño no crece con las filas eliminadas pendientes de purga
+LIVE_ROWS = Q(deleted_at__isnull=True)
+DEAD_ROWS = Q(deleted_at__isnull=False)
+
+# ========== QUERYSETS ==========
+
+class CRMQuerySet(models.QuerySet):
+    """
+    QuerySet base que notifica las escrituras masivas mediante la señal
+    bulk_write, distingue las filas vivas de las eliminadas (deleted_at) y
+    puede leer sus resultados de la caché de consultas (cached()).
+    """
+    
+    # Activados por cached(); se conservan al encadenar filtros
+    _cache_results = False
+    _cache_timeout = None
+    
+    def cached(self, timeout=None):
+        """
+        Copia del QuerySet cuyos resultados, count() y aggregate() se leen de la
+        caché de consultas hasta que se escribe en alguna de sus tablas
+        (crm_app.querycache)
+        """
+        clone = self._chain()
+        clone._cache_results = True
+        clone._cache_timeout = timeout
+        return clone
+    
+    def _clone(self):
+        clone = super()._clone()
+        clone._cache_results = self._cache_results
+        clone._cache_timeout = self._cache_timeout
+        return clone
+    
+    def _fetch_all(self):
+        if self._cache_results and self._result_cache is None:
+            self._result_cache = cached_result(
+                self, ('rows', self._iterable_class.__qualname__),
+                lambda: list(self._iterable_class(self)), self._cache_timeout,
+            )
+        super()._fetch_all()
+    
+    def count(self):
+        if not self._cache_results or self._result_cache is not None:
+            return super().count()
+        return cached_result(self, ('count',), super().count, self._cache_timeout)
+    
+    def aggregate(self, *args, **kwargs):
+        if not self._cache_results:
+            return super().aggregate(*args, **kwargs)
+        compute = super().aggregate
+        return cached_result(
+            self, ('aggregate', args, sorted(kwargs.items())),
+            lambda: compute(*args, **kwargs), self._cache_timeout,
+        )
+    
+    def alive(self):
+        """Filas no eliminadas; usa los índices parciales WHERE deleted_at IS NULL"""
+        return self.filter(LIVE_ROWS)
+    
+    def dead(self):
+        """Filas eliminadas (soft delete), pendientes de purga"""
+        return self.filter(DEAD_ROWS)
+    
+    def soft_delete(self, now=None):
+        """Marca como eliminadas las filas vivas con un único UPDATE; devuelve cuántas"""
+        now = now or timezone.now()
+        return self.alive().update(deleted_at=now, updated_at=now)
+    
+    def restore(self):
+        """Recupera las filas eliminadas con un único UPDATE; devuelve cuántas"""
+        return self.dead().update(deleted_at=None, updated_at=timezone.now())
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            bulk_write.send(sender=self.model, action='bulk_create', objs=objs, pks=None, fields=None)
+        return objs
+    
+    def update(self, **kwargs):
+        # bulk_update() también pasa por aquí, un lote a la vez
+        if not bulk_write.has_listeners(self.model):
+            return super().update(**kwargs)
+        
+        fields = set(kwargs)
+        if not pks_required(self.model, fields):
+            # Ningún receptor necesita los ids: un solo UPDATE, sin leerlos
+            pks = None
+            rows = super().update(**kwargs)
+        else:
+            with transaction.atomic(using=self.db):
+                pks = list(self.values_list('pk', flat=True))
+                rows = super().update(**kwargs)
+        if rows:
+            bulk_write.send(sender=self.model, action='update', objs=None, pks=pks, fields=fields)
+        return rows
+    
+    def delete(self):
+        # Cada post_delete programa su sincronización; se ejecutan juntas al final
+        with batched():
+            return super().delete()
+
+
+class CustomerQuerySet(CRMQuerySet):
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.birthday_key = birthday_key(obj.birth_date)
+        return super().bulk_create(objs, *args, **kwargs)
+    
+    def update(self, **kwargs):
+        # Con un valor literal la clave se escribe en el mismo UPDATE; las
+        # expresiones (bulk_update) las recalcula crm_app.handlers después
+        birth_date = kwargs.get('birth_date', ...)
+        if 'birthday_key' not in kwargs and (birth_date is None or isinstance(birth_date, date)):
+            kwargs['birthday_key'] = birthday_key(birth_date)
+        return super().update(**kwargs)
+    
+    def soft_delete(self, now=None):
+        # Como el CASCADE del borrado real: las interacciones vivas se eliminan con sus clientes
+        now = now or timezone.now()
+        with transaction.atomic(using=self.db):
+            Interaction.objects.filter(
+                customer__in=self.alive().values('pk')
+            ).soft_delete(now)
+            return super().soft_delete(now)
+    
+    def restore(self):
+        # Solo vuelven las interacciones eliminadas junto con su cliente (mismo deleted_at)
+        with transaction.atomic(using=self.db):
+            Interaction.objects.filter(
+                customer__in=self.dead().values('pk'),
+                deleted_at=F('customer__deleted_at'),
+            ).restore()
+            return super().restore()
+    
+    def birthdays_between(self, start, end):
+        """Clientes que cumplen años entre start y end; rangos sobre el índice de birthday_key"""
+        condition = Q(pk__in=[])
+        for low, high in birthday_key_ranges(start, end):
+            condition |= Q(birthday_key__range=(low, high))
+        return self.filter(condition)
+    
+    def upcoming_birthdays(self, days=30, today=None):
+        """Próximos cumpleaños de los siguientes ``days`` días, ordenados por fecha"""
+        today = today or date.today()
+        return self.birthdays_between(today, today + timedelta(days=days - 1)).order_by(
+            # Los de enero van después de los de diciembre si el periodo cruza el año
+            Case(When(birthday_key__lt=birthday_key(today), then=Value(1)), default=Value(0)),
+            'birthday_key', 'last_name', 'first_name',
+        )
+    
+    def refresh_last_interaction(self):
+        """Recalcula las columnas desnormalizadas de última interacción en un solo UPDATE"""
+        latest = Interaction.objects.alive().filter(
+            customer=OuterRef('pk')
+        ).order_by('-interaction_date', '-pk')
+        
+        return self.update(
+            last_interaction=Subquery(latest.values('pk')[:1]),
+            last_interaction_at=Subquery(latest.values('interaction_date')[:1]),
+            last_interaction_type=Coalesce(
+                Subquery(latest.values('interaction_type')[:1]), Value('')
+            ),
+        )
+    
+    def stale_last_interaction(self):
+        """Clientes cuyas columnas desnormalizadas no coinciden con sus interacciones"""
+        latest = Interaction.objects.alive().filter(
+            customer=OuterRef('pk')
+        ).order_by('-interaction_date', '-pk')
+        
+        return self.alias(
+            expected_id=Subquery(latest.values('pk')[:1]),
+            expected_at=Subquery(latest.values('interaction_date')[:1]),
+            expected_type=Coalesce(Subquery(latest.values('interaction_type')[:1]), Value('')),
+        ).filter(
+            Q(expected_id__isnull=True, last_interaction__isnull=False) |
+            Q(expected_id__isnull=False, last_interaction__isnull=True) |
+            Q(expected_id__isnull=False, last_interaction_at__isnull=True) |
+            ~Q(expected_id=F('last_interaction')) |
+            ~Q(expected_at=F('last_interaction_at')) |
+            ~Q(expected_type=F('last_interaction_type'))
+        )
+
+
+def interaction_type_counts():
+    """Agregados total_count y <tipo>_count para cada INTERACTION_TYPE_CHOICES"""
+    counts = {'total_count': Count('pk')}
+    for interaction_type, _ in INTERACTION_TYPE_CHOICES:
+        counts[f'{interaction_type.lower()}_count'] = Count('pk', filter=Q(interaction_type=interaction_type))
+    return counts
+
+
+class InteractionQuerySet(CRMQuerySet):
+    
+    def type_stats(self):
+        """Total y conteo por tipo en un solo SELECT con Count(filter=...)"""
+        return self.aggregate(**interaction_type_counts())
+    
+    def timeline_with_stats(self, limit=10):
+        """
+        Devuelve (últimas ``limit`` interacciones, estadísticas por tipo) con una
+        sola consulta: los conteos se calculan como ventanas OVER () sobre todas
+        las filas filtradas, antes del LIMIT.
+        """
+        counts = interaction_type_counts()
+        rows = list(
+            self.annotate(**{
+                f'_stats_{name}': Window(expression) for name, expression in counts.items()
+            }).order_by('-interaction_date', '-pk')[:limit]
+        )
+        if not rows:
+            return rows, dict.fromkeys(counts, 0)
+        return rows, {name: getattr(rows[0], f'_stats_{name}') for name in counts}
+
+
+class DashboardSnapshotQuerySet(models.QuerySet):
+    
+    def apply_deltas(self, deltas):
+        """Suma deltas {(scope, key): n} a los contadores con UPDATE atómicos"""
+        now = timezone.now()
+        with transaction.atomic(using=self.db):
+            for (scope, key), delta in deltas.items():
+                if not delta:
+                    continue
+                counter = self.filter(scope=scope, key=str(key))
+                if not counter.update(value=F('value') + delta, updated_at=now):
+                    self.get_or_create(scope=scope, key=str(key))
+                    counter.update(value=F('value') + delta, updated_at=now)
+                
+                if scope == self.model.SCOPE_TOTAL:
+                    # Ajusta los badges cacheados solo si la transacción confirma
+                    transaction.on_commit(
+                        lambda key=key, delta=delta: adjust_counter(key, delta),
+                        using=self.db
+                    )
+    
+    def rebuild(self, scopes=None):
+        """Recalcula por completo los contadores de los scopes indicados (todos por defecto)"""
+        scopes = set(scopes or self.model.SCOPES)
+        rows = []
+        
+        if self.model.SCOPE_TOTAL in scopes:
+            rows += [
+                (self.model.SCOPE_TOTAL, 'customers', Customer.objects.alive().count()),
+                (self.model.SCOPE_TOTAL, 'companies', Company.objects.alive().count()),
+                (self.model.SCOPE_TOTAL, 'interactions', Interaction.objects.alive().count()),
+                (self.model.SCOPE_TOTAL, 'sales_reps', User.objects.filter(is_superuser=False).count()),
+            ]
+        
+        if self.model.SCOPE_SALES_REP in scopes:
+            rows += [
+                (self.model.SCOPE_SALES_REP, row['sales_rep_id'], row['count'])
+                for row in Customer.objects.alive().order_by().values('sales_rep_id').annotate(count=Count('id'))
+            ]
+        
+        if self.model.SCOPE_INTERACTION_TYPE in scopes:
+            rows += [
+                (self.model.SCOPE_INTERACTION_TYPE, row['interaction_type'], row['count'])
+                for row in Interaction.objects.alive().order_by().values('interaction_type').annotate(count=Count('id'))
+            ]
+        
+        with transaction.atomic(using=self.db):
+            self.filter(scope__in=scopes).delete()
+            self.bulk_create([
+                self.model(scope=scope, key=str(key), value=value)
+                for scope, key, value in rows
+            ])
+        
+        if self.model.SCOPE_TOTAL in scopes:
+            invalidate_counters()
+        # Tras cargas o borrados con SQL crudo, sin señales por fila
+        transaction.on_commit(bump_data_version, using=self.db)
+        transaction.on_commit(lambda: bump_table_generations(tracked_tables()), using=self.db)
+    
+    def set_total(self, key, value):
+        """Fija un total recontado e invalida su contador cacheado"""
+        self.update_or_create(
+            scope=self.model.SCOPE_TOTAL, key=key, defaults={'value': value}
+        )
+        invalidate_counters([key])
+        transaction.on_commit(bump_data_version, using=self.db)
+    
+    def as_dict(self):
+        """Lee todo el snapshot en una consulta: {scope: {key: value}}"""
+        snapshot = {scope: {} for scope in self.model.SCOPES}
+        for scope, key, value in self.values_list('scope', 'key', 'value'):
+            snapshot.setdefault(scope, {})[key] = value
+        return snapshot
+
+
 # ========== MODELOS SIMPLIFICADOS ==========
 
-class Company(models.Model):
+class TrackedModel(models.Model):
+    """Recuerda los valores leídos de la base de datos para detectar cambios en las señales"""
+    
+    class Meta:
+        abstract = True
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+    
+    def loaded_value(self, attname):
+        """Valor del campo tal como se leyó de la base de datos (None si se desconoce)"""
+        return getattr(self, '_loaded_values', {}).get(attname)
+    
+    def has_changed(self, *attnames):
+        """Indica si alguno de los campos difiere del valor leído (True si no hay lectura previa)"""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return True
+        return any(
+            attname not in loaded or loaded[attname] != getattr(self, attname)
+            for attname in attnames
+        )
+
+
+class Company(TrackedModel):
     """Modelo para empresas - Versión simplificada"""
     
     # Campos requeridos
@@ -29,11 +404,19 @@ class Company(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de Actualización")
     deleted_at = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Eliminación")
     
+    objects = CRMQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Empresa"
         verbose_name_plural = "Empresas"
         ordering = ['name']
         db_table = 'crm_app_companies'
+        indexes = [
+            # Selector de empresas activas ordenado por nombre
+            models.Index(fields=['is_active', 'name'], name='company_active_name_idx', condition=LIVE_ROWS),
+            # Purga de eliminadas
+            models.Index(fields=['deleted_at'], name='company_deleted_idx', condition=DEAD_ROWS),
+        ]
     
     def __str__(self):
         return self.name
@@ -42,7 +425,7 @@ class Company(models.Model):
         return reverse('crm_app:company_detail', kwargs={'pk': self.pk})
 
 
-class Customer(models.Model):
+class Customer(TrackedModel):
     """Modelo para clientes - Versión simplificada"""
     
     # Campos requeridos
@@ -70,15 +453,78 @@ class Customer(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de Actualización")
     deleted_at = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Eliminación")
     
+    # Última interacción desnormalizada (mantenida por crm_app.handlers y sync_last_interactions)
+    last_interaction = models.ForeignKey(
+        'Interaction',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        verbose_name="Última Interacción"
+    )
+    last_interaction_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Fecha de Última Interacción")
+    last_interaction_type = models.CharField(
+        max_length=20,
+        choices=INTERACTION_TYPE_CHOICES,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="Tipo de Última Interacción"
+    )
+    
+    # Mes*100+día de birth_date; indexada para filtrar cumpleaños por rangos
+    birthday_key = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Clave de Cumpleaños"
+    )
+    
+    # Campos que solo se escriben con UPDATE set-based, nunca desde save()
+    DENORMALIZED_FIELDS = ('last_interaction', 'last_interaction_at', 'last_interaction_type')
+    
+    objects = CustomerQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ['last_name', 'first_name']
         db_table = 'crm_app_customers'
+        indexes = [
+            # Orden por defecto del modelo (admin) y de la lista de clientes
+            models.Index(fields=['last_name', 'first_name'], name='customer_name_idx', condition=LIVE_ROWS),
+            models.Index(fields=['first_name'], name='customer_first_name_idx', condition=LIVE_ROWS),
+            models.Index(fields=['is_active', 'first_name'], name='customer_active_name_idx', condition=LIVE_ROWS),
+            models.Index(fields=['company', 'first_name'], name='customer_company_name_idx', condition=LIVE_ROWS),
+            # Clientes recientes del dashboard
+            models.Index(fields=['created_at'], name='customer_created_idx', condition=LIVE_ROWS),
+            # Ordenamientos por fecha de nacimiento y última interacción
+            models.Index(fields=['birth_date'], name='customer_birth_date_idx', condition=LIVE_ROWS),
+            models.Index(fields=['last_interaction_at'], name='customer_last_interaction_idx', condition=LIVE_ROWS),
+            # Filtros de cumpleaños por rangos de birthday_key
+            models.Index(fields=['birthday_key'], name='customer_birthday_key_idx', condition=LIVE_ROWS),
+            # Purga de eliminadas
+            models.Index(fields=['deleted_at'], name='customer_deleted_idx', condition=DEAD_ROWS),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.company.name}"
     
+    def save(self, *args, **kwargs):
+        self.birthday_key = birthday_key(self.birth_date)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'birth_date' in update_fields and 'birthday_key' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'birthday_key']
+        
+        # Evita sobrescribir la última interacción con valores leídos antes de que cambiara
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DENORMALIZED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
     def get_absolute_url(self):
         return reverse('crm_app:customer_detail', kwargs={'pk': self.pk})
     
@@ -97,7 +543,7 @@ class Customer(models.Model):
         return today.year - self.birth_date.year - ((today.month, today.day) < (self.birth_date.month, self.birth_date.day))
 
 
-class Interaction(models.Model):
+class Interaction(TrackedModel):
     """Modelo para interacciones - Versión simplificada"""
     
     # Campos requeridos
@@ -120,14 +566,128 @@ class Interaction(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de Actualización")
     deleted_at = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Eliminación")
     
+    objects = InteractionQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Interacción"
         verbose_name_plural = "Interacciones"
         ordering = ['-interaction_date']
         db_table = 'crm_app_interactions'
+        indexes = [
+            # Línea de tiempo y última interacción por cliente: recorrido inverso
+            # en orden (fecha, id) descendente, sin ordenamiento temporal
+            models.Index(
+                fields=['customer', 'interaction_date'], name='interaction_customer_date_idx', condition=LIVE_ROWS
+            ),
+            # Orden por defecto (admin, date_hierarchy) y sus filtros
+            models.Index(fields=['interaction_date'], name='interaction_date_idx', condition=LIVE_ROWS),
+            models.Index(
+                fields=['interaction_type', 'interaction_date'], name='interaction_type_date_idx', condition=LIVE_ROWS
+            ),
+            models.Index(
+                fields=['is_active', 'interaction_date'], name='interaction_active_date_idx', condition=LIVE_ROWS
+            ),
+            # Purga de eliminadas
+            models.Index(fields=['deleted_at'], name='interaction_deleted_idx', condition=DEAD_ROWS),
+        ]
     
     def __str__(self):
         return f"{self.interaction_type} - {self.customer.get_full_name()} - {self.interaction_date.strftime('%Y-%m-%d')}"
     
     def get_absolute_url(self):
         return reverse('crm_app:interaction_detail', kwargs={'pk': self.pk})
+
+
+class DashboardSnapshot(models.Model):
+    """Contadores materializados del dashboard, mantenidos de forma incremental"""
+    
+    SCOPE_TOTAL = 'total'
+    SCOPE_SALES_REP = 'sales_rep'
+    SCOPE_INTERACTION_TYPE = 'interaction_type'
+    SCOPES = (SCOPE_TOTAL, SCOPE_SALES_REP, SCOPE_INTERACTION_TYPE)
+    
+    scope = models.CharField(
+        max_length=20,
+        choices=[(scope, scope) for scope in SCOPES],
+        verbose_name="Ámbito"
+    )
+    # Nombre del total, id del sales rep o tipo de interacción según el ámbito
+    key = models.CharField(max_length=50, verbose_name="Clave")
+    value = models.BigIntegerField(default=0, verbose_name="Valor")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de Actualización")
+    
+    objects = DashboardSnapshotQuerySet.as_manager()
+    
+    class Meta:
+        verbose_name = "Snapshot del Dashboard"
+        verbose_name_plural = "Snapshots del Dashboard"
+        db_table = 'crm_app_dashboard_snapshot'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='dashboard_snapshot_scope_key_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope}:{self.key} = {self.value}"
+
+
+class ArchivedInteraction(models.Model):
+    """
+    Interacción antigua movida fuera de crm_app_interactions por
+    archive_interactions (mismo id y columnas). Las vistas solo la leen con
+    el historial completo del cliente (crm_app.archive.full_history).
+    """
+    
+    customer = models.ForeignKey(
+        Customer,
+        on_delete=models.CASCADE,
+        related_name='archived_interactions',
+        verbose_name="Cliente Asociado"
+    )
+    interaction_type = models.CharField(
+        max_length=20,
+        choices=INTERACTION_TYPE_CHOICES,
+        verbose_name="Tipo de Interacción"
+    )
+    interaction_date = models.DateTimeField(verbose_name="Fecha de la Interacción")
+    
+    # Copiados tal cual de la interacción original
+    is_active = models.BooleanField(default=True, verbose_name="Activo")
+    created_at = models.DateTimeField(verbose_name="Fecha de Creación")
+    updated_at = models.DateTimeField(verbose_name="Fecha de Actualización")
+    deleted_at = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Eliminación")
+    archived_at = models.DateTimeField(verbose_name="Fecha de Archivo")
+    
+    objects = CRMQuerySet.as_manager()
+    
+    class Meta:
+        verbose_name = "Interacción Archivada"
+        verbose_name_plural = "Interacciones Archivadas"
+        ordering = ['-interaction_date']
+        db_table = 'crm_app_interactions_archive'
+        indexes = [
+            # Historial completo de un cliente
+            models.Index(fields=['customer', 'interaction_date'], name='archive_customer_date_idx'),
+            # Purga de eliminadas
+            models.Index(fields=['deleted_at'], name='archive_deleted_idx', condition=DEAD_ROWS),
+        ]
+    
+    def __str__(self):
+        return f"{self.interaction_type} - {self.customer_id} - {self.interaction_date.strftime('%Y-%m-%d')} (archivada)"
+
+
+class ReplicaHeartbeat(models.Model):
+    """
+    Marca de tiempo que refresh_replica escribe en la base principal. Viaja a
+    la réplica con el resto de los datos: su antigüedad allí es el retraso de
+    replicación (crm_app.routers).
+    """
+    
+    updated_at = models.DateTimeField(verbose_name="Fecha de Actualización")
+    
+    class Meta:
+        verbose_name = "Heartbeat de Réplica"
+        verbose_name_plural = "Heartbeats de Réplica"
+        db_table = 'crm_app_replica_heartbeat'
+    
+    def __str__(self):
+        return f"heartbeat {self.updated_at:%Y-%m-%d %H:%M:%S}"
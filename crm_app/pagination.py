@@ -0,0 +1,225 @@
+"""
+Paginación por cursor (keyset) para las vistas de lista.
+
+En lugar de OFFSET + COUNT(*), cada página se obtiene filtrando por los
+valores de ordenamiento de la última fila vista (más el id como desempate),
+de modo que el coste de la página N es el mismo que el de la primera y los
+enlaces anterior/siguiente no se desplazan si se insertan filas nuevas.
+
+El admin conserva la paginación numerada de Django con CachedCountPaginator,
+que evita el COUNT(*) completo en cada página.
+"""
+
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+
+def _serialize(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+class KeysetField:
+    """
+    Una columna de ordenamiento del keyset.
+
+    ``nulls_last`` es None para columnas no nulas (sin modificador NULLS, así
+    SQLite puede recorrer el índice), True para nulos al final y False para
+    nulos al principio.
+    """
+
+    def __init__(self, name, descending=False, nulls_last=None):
+        self.name = name
+        self.descending = descending
+        self.nulls_last = nulls_last
+
+    @classmethod
+    def parse(cls, ordering, nulls_last=None):
+        """Crea el campo a partir de una cadena de ordenamiento estilo '-name'"""
+        return cls(ordering.lstrip('-'), ordering.startswith('-'), nulls_last)
+
+    def reversed(self):
+        # Al recorrer hacia atrás los nulos pasan del final al principio
+        nulls_last = None if self.nulls_last is None else not self.nulls_last
+        return KeysetField(self.name, not self.descending, nulls_last)
+
+    def order_by(self, alias):
+        expression = F(alias)
+        method = expression.desc if self.descending else expression.asc
+        if self.nulls_last is None:
+            return method()
+        if self.nulls_last:
+            return method(nulls_last=True)
+        return method(nulls_first=True)
+
+    def after(self, alias, value):
+        """Filas que van estrictamente después de ``value`` en esta columna"""
+        if value is None:
+            # Con nulos al final no hay nada después; al principio, todo lo no nulo
+            return Q(pk__in=[]) if self.nulls_last else Q(**{f'{alias}__isnull': False})
+
+        lookup = 'lt' if self.descending else 'gt'
+        condition = Q(**{f'{alias}__{lookup}': value})
+        if self.nulls_last:
+            condition |= Q(**{f'{alias}__isnull': True})
+        return condition
+
+    def equals(self, alias, value):
+        if value is None:
+            return Q(**{f'{alias}__isnull': True})
+        return Q(**{alias: value})
+
+
+class KeysetPage:
+    """Página de resultados con cursores hacia la anterior y la siguiente"""
+
+    is_keyset = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Pagina un queryset por cursor según una lista de KeysetField (el id se añade al final)"""
+
+    def __init__(self, queryset, fields, per_page):
+        tiebreaker = KeysetField('pk', descending=fields[0].descending if fields else False)
+        self.fields = [*fields, tiebreaker]
+        self.per_page = per_page
+        self.aliases = [f'_keyset_{index}' for index in range(len(self.fields))]
+        self.queryset = queryset.annotate(**{
+            alias: F(field.name) for alias, field in zip(self.aliases, self.fields)
+        })
+
+    def encode(self, obj, direction):
+        return self.encode_values([getattr(obj, alias) for alias in self.aliases], direction)
+
+    def encode_values(self, values, direction):
+        """Cursor a partir de los valores de las columnas ``aliases`` de una fila"""
+        # isoformat() completo: DjangoJSONEncoder recorta los microsegundos
+        payload = json.dumps({'d': direction, 'v': values}, default=_serialize)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode(self, cursor):
+        """Devuelve (dirección, valores) o None si el cursor no es válido"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction, raw_values = payload['d'], payload['v']
+            if direction not in ('next', 'prev') or len(raw_values) != len(self.aliases):
+                return None
+            values = [
+                None if raw is None else self.queryset.query.annotations[alias].output_field.to_python(raw)
+                for alias, raw in zip(self.aliases, raw_values)
+            ]
+        except (binascii.Error, ValueError, KeyError, TypeError, ValidationError):
+            return None
+        return direction, values
+
+    def _seek(self, fields, values):
+        """Condición 'después del cursor' para un orden lexicográfico de varias columnas"""
+        condition = Q(pk__in=[])
+        prefix = Q()
+        for alias, field, value in zip(self.aliases, fields, values):
+            condition |= prefix & field.after(alias, value)
+            prefix &= field.equals(alias, value)
+        return condition
+
+    def seek(self, direction='next', values=None):
+        """Queryset ordenado en ``direction`` que empieza después de los valores de un cursor"""
+        fields = self.fields if direction == 'next' else [field.reversed() for field in self.fields]
+        queryset = self.queryset.order_by(
+            *[field.order_by(alias) for alias, field in zip(self.aliases, fields)]
+        )
+        if values is not None:
+            queryset = queryset.filter(self._seek(fields, values))
+        return queryset
+
+    def page(self, cursor=None):
+        decoded = self.decode(cursor) if cursor else None
+        direction, values = decoded or ('next', None)
+        queryset = self.seek(direction, values)
+
+        # Una fila extra indica si hay más resultados en esta dirección
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if direction == 'prev':
+            rows.reverse()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = values is not None, has_more
+
+        next_cursor = self.encode(rows[-1], 'next') if rows and has_next else None
+        previous_cursor = self.encode(rows[0], 'prev') if rows and has_previous else None
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+class KeysetPaginationMixin:
+    """
+    Mixin para ListView que pagina por cursor cuando get_keyset() devuelve columnas.
+
+    Las URLs con ?page=N (enlaces antiguos) y los ordenamientos sin keyset
+    siguen usando el Paginator de Django.
+    """
+
+    cursor_kwarg = 'cursor'
+
+    def get_keyset(self):
+        """Lista de KeysetField del ordenamiento activo, o None para usar OFFSET"""
+        return None
+
+    def paginate_queryset(self, queryset, page_size):
+        keyset = self.get_keyset()
+        if keyset is None or self.page_kwarg in self.request.GET:
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, keyset, page_size)
+        page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator numerado que no recuenta la tabla en cada página: usa ``total``
+    si se conoce (el total del snapshot para la lista sin filtros) y si no un
+    COUNT(*) cacheado hasta que cambia alguna de las tablas (QuerySet.cached()).
+    """
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True, total=None):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.total = total
+
+    @cached_property
+    def count(self):
+        if self.total is not None:
+            return self.total
+        if hasattr(self.object_list, 'cached'):
+            return self.object_list.cached().count()
+        return super().count
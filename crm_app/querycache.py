@@ -0,0 +1,102 @@
+"""
+Caché de resultados de querysets (CRMQuerySet.cached()).
+
+La clave de cada resultado es el SQL compilado con sus parámetros, el alias
+de base de datos, el tipo de resultado y la generación de cada tabla del CRM
+que aparece en el SQL. Cualquier escritura en una de esas tablas (save,
+delete, bulk_create, update y los recálculos del snapshot tras SQL crudo)
+incrementa su generación después del commit (crm_app.handlers): las entradas
+anteriores dejan de leerse y caducan solas. Dentro de la transacción que
+escribe, cached() aún devuelve el resultado anterior.
+
+Lo leído de la réplica lleva además en la clave el heartbeat de la copia
+leída (routers.read_source()): una lectura atrasada no rellena la clave que
+la principal acaba de invalidar.
+
+Los resultados se guardan en la caché settings.CRM_QUERY_CACHE durante
+CRM_QUERY_CACHE_TIMEOUT segundos (o el timeout de cached()).
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+
+from .routers import read_source
+
+GENERATION_PREFIX = 'crm:table-gen:'
+RESULT_PREFIX = 'crm:qs:'
+
+
+def tracked_tables():
+    """Tablas con generación: las escrituras en ellas invalidan los resultados"""
+    from .models import Company, Customer, Interaction
+
+    return [model._meta.db_table for model in (Company, Customer, Interaction)]
+
+
+def _cache():
+    return caches[getattr(settings, 'CRM_QUERY_CACHE', 'default')]
+
+
+def _initial_generation():
+    # Si la caché pierde una generación no se vuelve a un valor ya usado
+    return time.time_ns() // 1000
+
+
+def table_generations(tables):
+    """Generación actual de cada tabla, {tabla: generación}"""
+    cache = _cache()
+    keys = {GENERATION_PREFIX + table: table for table in tables}
+    current = cache.get_many(list(keys))
+    missing = [key for key in keys if key not in current]
+    if missing:
+        for key in missing:
+            cache.add(key, _initial_generation(), None)
+        current.update(cache.get_many(missing))
+    return {table: current.get(key) for key, table in keys.items()}
+
+
+def bump_table_generations(tables):
+    """Invalida los resultados cacheados que leen alguna de las tablas"""
+    cache = _cache()
+    for table in tables:
+        try:
+            cache.incr(GENERATION_PREFIX + table)
+        except ValueError:
+            cache.set(GENERATION_PREFIX + table, _initial_generation(), None)
+
+
+def result_key(queryset, kind):
+    """Clave del resultado de ``queryset``, o None si la consulta no se puede cachear"""
+    connection = connections[queryset.db]
+    try:
+        sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+    except EmptyResultSet:
+        return None
+
+    tables = [table for table in tracked_tables() if connection.ops.quote_name(table) in sql]
+    generations = sorted(table_generations(tables).items())
+    digest = hashlib.sha256(
+        repr((queryset.db, read_source(queryset.db), kind, sql, params, generations)).encode()
+    ).hexdigest()
+    return RESULT_PREFIX + digest
+
+
+def cached_result(queryset, kind, compute, timeout=None):
+    """Resultado cacheado de la consulta; ``compute()`` la ejecuta si no está en caché"""
+    key = result_key(queryset, kind)
+    if key is None:
+        return compute()
+
+    cache = _cache()
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        if timeout is None:
+            timeout = getattr(settings, 'CRM_QUERY_CACHE_TIMEOUT', 300)
+        cache.set(key, result, timeout)
+    return result
@@ -0,0 +1,234 @@
+"""
+Enrutado de lecturas a una réplica de solo lectura.
+
+Las vistas que heredan de ReplicaReadMixin (dashboard, listas, detalle de
+cliente, exportación y API) leen los modelos de crm_app del alias
+settings.CRM_REPLICA_ALIAS. Las escrituras, el admin, la sesión y la
+autenticación siguen en la base de datos principal: una sesión recién creada
+podría no haber llegado aún a la réplica. ReplicaRoutingMiddleware activa la
+réplica durante toda la petición, incluido el renderizado de las plantillas
+y las respuestas en streaming.
+
+Antes de usar la réplica se comprueba su retraso (antigüedad del
+ReplicaHeartbeat copiado desde la principal, revisada como mucho cada
+CRM_REPLICA_LAG_CHECK_INTERVAL segundos por proceso). Si supera
+CRM_REPLICA_MAX_LAG o la réplica no responde, la petición lee de la principal.
+
+Las cachés que se rellenan con lecturas (estadísticas de cliente, fragmentos
+de plantilla y QuerySet.cached()) añaden read_source() a sus claves: lo
+leído de la réplica se guarda aparte, bajo el heartbeat de la copia leída, y
+no ocupa la clave de la principal que una escritura acaba de invalidar.
+
+Sin un servidor de réplicas, refresh_replica hace de replicación: copia la
+base de datos SQLite principal al archivo de la réplica cada --interval
+segundos.
+"""
+
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Aplicaciones cuyos modelos pueden leerse de la réplica
+REPLICA_APPS = {'crm_app'}
+
+
+class RoutingState:
+    """Alias de lectura de la petición en curso (None = base principal)"""
+
+    __slots__ = ('alias',)
+
+    def __init__(self):
+        self.alias = None
+
+
+_current = ContextVar('crm_routing', default=None)
+
+_lag_lock = threading.Lock()
+_lag_state = {'checked_at': None, 'healthy': False, 'lag': None, 'heartbeat': None}
+
+
+def replica_alias():
+    """Alias de la réplica si está configurado en DATABASES"""
+    alias = getattr(settings, 'CRM_REPLICA_ALIAS', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+def replica_heartbeat(alias):
+    """Último heartbeat visible en la réplica, o None si no se puede leer"""
+    from .models import ReplicaHeartbeat
+
+    try:
+        return ReplicaHeartbeat.objects.using(alias).values_list('updated_at', flat=True).first()
+    except DatabaseError as error:
+        logger.warning('No se pudo leer el heartbeat de la réplica %s: %s', alias, error)
+        return None
+
+
+def _lag(heartbeat):
+    if heartbeat is None:
+        return None
+    return max(0.0, (timezone.now() - heartbeat).total_seconds())
+
+
+def replica_lag(alias):
+    """Segundos desde el último heartbeat visible en la réplica, o None si no se puede leer"""
+    return _lag(replica_heartbeat(alias))
+
+
+def replica_available(alias):
+    """Indica si la réplica está al día; el resultado se reutiliza durante el intervalo de comprobación"""
+    interval = getattr(settings, 'CRM_REPLICA_LAG_CHECK_INTERVAL', 5)
+    now = time.monotonic()
+    with _lag_lock:
+        checked_at = _lag_state['checked_at']
+        if checked_at is not None and now - checked_at < interval:
+            return _lag_state['healthy']
+        # Solo una petición por intervalo consulta el heartbeat; el resto usa el último resultado
+        _lag_state['checked_at'] = now
+
+    heartbeat = replica_heartbeat(alias)
+    lag = _lag(heartbeat)
+    healthy = lag is not None and lag <= getattr(settings, 'CRM_REPLICA_MAX_LAG', 30)
+    if healthy != _lag_state['healthy']:
+        if healthy:
+            logger.info('Réplica %s disponible (retraso %.1fs)', alias, lag)
+        else:
+            logger.warning('Réplica %s descartada (retraso %s): se lee de la principal', alias, lag)
+    _lag_state.update(healthy=healthy, lag=lag, heartbeat=heartbeat)
+    return healthy
+
+
+def reset_replica_state():
+    """Olvida la última comprobación de retraso (la siguiente petición vuelve a consultarla)"""
+    with _lag_lock:
+        _lag_state.update(checked_at=None, healthy=False, lag=None, heartbeat=None)
+
+
+def read_source(alias=None):
+    """
+    Origen de una lectura para las claves de caché: '' para la principal y
+    'alias@heartbeat' para la réplica. Sin ``alias`` se usa el de la petición
+    en curso. Cuando la réplica recibe una copia nueva cambia el heartbeat y
+    las entradas leídas de la copia anterior dejan de usarse.
+    """
+    if alias is None:
+        state = _current.get()
+        alias = state.alias if state is not None else None
+    if alias is None or alias != replica_alias():
+        return ''
+    heartbeat = _lag_state['heartbeat']
+    if heartbeat is None:
+        # Lectura explícita de la réplica fuera de una petición enrutada
+        heartbeat = replica_heartbeat(alias)
+    return f'{alias}@{heartbeat.timestamp() if heartbeat else 0}'
+
+
+# ========== ROUTER ==========
+
+class ReplicaRouter:
+    """Lecturas de crm_app a la réplica cuando la petición lo permite; escrituras a la principal"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in REPLICA_APPS:
+            return None
+        state = _current.get()
+        return state.alias if state is not None else None
+
+    def db_for_write(self, model, **hints):
+        # Explícito: un objeto leído de la réplica se guarda igualmente en la principal
+        if model._meta.app_label in REPLICA_APPS:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplica es una copia de la principal: sus objetos pueden relacionarse
+        aliases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # El esquema llega a la réplica con la replicación
+        if db == replica_alias():
+            return False
+        return None
+
+
+# ========== VISTAS ==========
+
+class ReplicaReadMixin:
+    """Marca una vista de solo lectura cuyas consultas pueden ir a la réplica"""
+
+    read_from_replica = True
+
+
+def _route_streaming(content, state):
+    """Itera el contenido de una respuesta en streaming con el alias de su petición"""
+    iterator = iter(content)
+    while True:
+        token = _current.set(state)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _current.reset(token)
+        yield chunk
+
+
+class ReplicaRoutingMiddleware:
+    """Activa la réplica para las vistas con ReplicaReadMixin (WSGI y ASGI)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = RoutingState()
+        token = _current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = _current.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(response, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # El estado es un objeto mutable: el cambio se ve aunque Django ejecute
+        # este método en otro hilo (sync_to_async bajo ASGI)
+        state = _current.get()
+        view_class = getattr(view_func, 'view_class', view_func)
+        if state is None or not getattr(view_class, 'read_from_replica', False):
+            return None
+        alias = replica_alias()
+        if alias is not None and replica_available(alias):
+            state.alias = alias
+        return None
+
+    def finish(self, response, state):
+        if state.alias is not None and response.streaming and not response.is_async:
+            response.streaming_content = _route_streaming(response.streaming_content, state)
+        return response
@@ -0,0 +1,191 @@
+"""
+Búsqueda de texto completo con SQLite FTS5.
+
+Las tablas virtuales crm_app_customers_fts y crm_app_companies_fts (creadas
+en la migración 0004) indexan nombres de clientes y empresas con el
+tokenizador unicode61 sin diacríticos, de modo que "maria" encuentra "María".
+Unos triggers SQL las mantienen sincronizadas con las tablas base, también
+para bulk_create y SQL crudo.
+
+Si FTS5 no está disponible (otro motor de base de datos o SQLite compilado
+sin FTS5) las vistas vuelven a la búsqueda con icontains del ORM.
+"""
+
+import re
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+# db_table del modelo -> (tabla FTS, campos indexados y de la búsqueda de respaldo)
+FTS_TABLES = {
+    'crm_app_customers': ('crm_app_customers_fts', ('first_name', 'last_name')),
+    'crm_app_companies': ('crm_app_companies_fts', ('name',)),
+}
+
+# Triggers de sincronización de cada tabla FTS: {tabla FTS}_{sufijo}
+TRIGGER_SUFFIXES = ('ai', 'ad', 'au')
+
+# alias -> (disponible, momento de la comprobación en time.monotonic())
+_available = {}
+
+
+def _schema_names(connection, object_type, names):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT name FROM sqlite_master WHERE type = %s AND name IN ({', '.join(['%s'] * len(names))})",
+            [object_type, *names],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def fts_tables_exist(using='default'):
+    """Indica si las tablas FTS5 existen, aunque falten sus triggers"""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    tables = [fts_table for fts_table, _ in FTS_TABLES.values()]
+    try:
+        return len(_schema_names(connection, 'table', tables)) == len(tables)
+    except DatabaseError:
+        return False
+
+
+def missing_triggers(using='default'):
+    """Triggers de sincronización que faltan (p. ej. tras reconstruir una tabla base)"""
+    triggers = [
+        f'{fts_table}_{suffix}'
+        for fts_table, _ in FTS_TABLES.values()
+        for suffix in TRIGGER_SUFFIXES
+    ]
+    present = _schema_names(connections[using], 'trigger', triggers)
+    return [trigger for trigger in triggers if trigger not in present]
+
+
+def fts_available(using='default'):
+    """
+    Indica si las tablas FTS5 y sus triggers existen en la base de datos
+    indicada. Sin los triggers el índice deja de seguir a la tabla base y la
+    búsqueda vuelve a icontains hasta ejecutar rebuild_search_index.
+
+    El resultado, positivo o negativo, se reutiliza durante
+    CRM_SEARCH_CHECK_INTERVAL segundos por proceso y se olvida tras migrate.
+    """
+    interval = getattr(settings, 'CRM_SEARCH_CHECK_INTERVAL', 60)
+    now = time.monotonic()
+    cached = _available.get(using)
+    if cached is not None and now - cached[1] < interval:
+        return cached[0]
+
+    available = False
+    if fts_tables_exist(using):
+        try:
+            available = not missing_triggers(using)
+        except DatabaseError:
+            available = False
+    _available[using] = (available, now)
+    return available
+
+
+def reset_fts_state(using=None):
+    """Olvida la última comprobación de fts_available() (de un alias o de todos)"""
+    if using is None:
+        _available.clear()
+    else:
+        _available.pop(using, None)
+
+
+def trigger_statements(table, fts_table, columns):
+    """CREATE TRIGGER de alta, baja y modificación que sincronizan ``fts_table``"""
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); "
+        f"END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"END",
+        # Solo se dispara si el UPDATE toca las columnas indexadas
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column_list} ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); "
+        f"END",
+    ]
+
+
+def create_triggers(using='default'):
+    """
+    Recrea los triggers que falten y reconstruye los índices FTS5 afectados,
+    que han podido perder altas y cambios mientras no existían. Devuelve los
+    triggers recreados.
+    """
+    missing = missing_triggers(using)
+    if missing:
+        with connections[using].cursor() as cursor:
+            for table, (fts_table, columns) in FTS_TABLES.items():
+                if any(trigger.startswith(f'{fts_table}_') for trigger in missing):
+                    for statement in trigger_statements(table, fts_table, columns):
+                        cursor.execute(statement)
+                    cursor.execute(f'INSERT INTO "{fts_table}"("{fts_table}") VALUES (\'rebuild\')')
+    reset_fts_state(using)
+    return missing
+
+
+def build_match_query(text):
+    """
+    Convierte el texto del usuario en una consulta FTS5 segura: cada palabra
+    se busca como prefijo y todas deben aparecer ("mar gar" -> "mar"* "gar"*).
+    """
+    tokens = re.findall(r'\w+', text)
+    if not tokens:
+        return None
+    return ' '.join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+
+
+def search_queryset(queryset, text):
+    """
+    Filtra el queryset por ``text`` y lo anota con ``search_rank`` (bm25,
+    menor es más relevante). Devuelve (queryset, ranked).
+    """
+    db_table = queryset.model._meta.db_table
+    fts_table, fallback_fields = FTS_TABLES[db_table]
+    match = build_match_query(text)
+
+    if match is None or not fts_available(queryset.db):
+        condition = Q()
+        for field in fallback_fields:
+            condition |= Q(**{f'{field}__icontains': text})
+        return queryset.filter(condition), False
+
+    pk_column = queryset.model._meta.pk.column
+    matches = RawSQL(
+        f'SELECT rowid FROM "{fts_table}" WHERE "{fts_table}" MATCH %s',
+        (match,),
+    )
+    rank = RawSQL(
+        f'SELECT rank FROM "{fts_table}" WHERE "{fts_table}" MATCH %s '
+        f'AND rowid = "{db_table}"."{pk_column}"',
+        (match,),
+        output_field=FloatField(),
+    )
+    return queryset.filter(pk__in=matches).annotate(search_rank=rank), True
+
+
+def rebuild(using='default'):
+    """Reconstruye los índices FTS5 desde las tablas base"""
+    with connections[using].cursor() as cursor:
+        for fts_table, _ in FTS_TABLES.values():
+            cursor.execute(f'INSERT INTO "{fts_table}"("{fts_table}") VALUES (\'rebuild\')')
+
+
+def integrity_check(using='default'):
+    """Lanza DatabaseError si algún índice FTS5 no coincide con su tabla base"""
+    with connections[using].cursor() as cursor:
+        for fts_table, _ in FTS_TABLES.values():
+            cursor.execute(
+                f'INSERT INTO "{fts_table}"("{fts_table}", rank) VALUES (\'integrity-check\', 1)'
+            )
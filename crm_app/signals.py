@@ -0,0 +1,87 @@
+"""
+Señales propias del CRM.
+
+Django no emite post_save/post_delete en las escrituras masivas
+(bulk_create, QuerySet.update), así que CRMQuerySet emite ``bulk_write``
+para que los datos derivados (columnas desnormalizadas, cachés, índices)
+se mantengan sincronizados también por esos caminos.
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.dispatch import Signal
+
+# Argumentos: sender (modelo), action ('bulk_create' | 'update'),
+# objs (instancias creadas), pks (ids afectados, o None si ningún receptor
+# los pidió con require_pks()), fields (campos actualizados)
+bulk_write = Signal()
+
+_pending = ContextVar('crm_pending_sync', default=None)
+
+# sender -> predicados sobre los campos de update() que necesitan los pks
+_pk_consumers = {}
+
+
+def require_pks(sender, predicate):
+    """
+    Declara que un receptor de bulk_write usa ``pks`` cuando update() escribe
+    campos para los que ``predicate(fields)`` es cierto. Si ninguno lo es,
+    update() no lee los ids afectados y envía pks=None.
+    """
+    _pk_consumers.setdefault(sender, []).append(predicate)
+    return predicate
+
+
+def pks_required(sender, fields):
+    return any(predicate(fields) for predicate in _pk_consumers.get(sender, ()))
+
+
+def chunks(items, size=500):
+    """Divide una secuencia en bloques para no superar el límite de parámetros SQL"""
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def schedule(func, keys):
+    """
+    Ejecuta ``func(keys)`` ahora, o al salir del bloque ``batched()`` activo,
+    agrupando todas las claves recibidas mientras tanto.
+
+    ``keys`` puede ser un conjunto de claves (se unen) o un Counter de
+    deltas (se suman).
+    """
+    if isinstance(keys, Counter):
+        keys = Counter({key: delta for key, delta in keys.items() if delta})
+    else:
+        keys = {key for key in keys if key is not None}
+    if not keys:
+        return
+    pending = _pending.get()
+    if pending is None:
+        func(keys)
+    elif isinstance(keys, Counter):
+        pending.setdefault(func, Counter()).update(keys)
+    else:
+        pending.setdefault(func, set()).update(keys)
+
+
+@contextmanager
+def batched():
+    """Agrupa las sincronizaciones programadas con schedule() hasta el final del bloque"""
+    if _pending.get() is not None:
+        # Ya estamos dentro de un lote: el bloque externo hará el flush
+        yield
+        return
+
+    pending = {}
+    token = _pending.set(pending)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+
+    for func, keys in pending.items():
+        func(keys)
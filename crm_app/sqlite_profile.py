@@ -0,0 +1,70 @@
+"""
+Perfil de conexión SQLite del CRM.
+
+Django abre SQLite con los valores por defecto: journal en modo rollback (los
+lectores esperan mientras otra conexión confirma una escritura), sin mmap y
+con la espera por bloqueo del módulo sqlite3. apply_sqlite_profile (señal
+connection_created) ejecuta en cada conexión nueva los PRAGMA de
+settings.CRM_SQLITE_PRAGMAS, configurables con variables de entorno: con
+journal_mode=WAL los lectores siguen leyendo la última versión confirmada
+mientras populate_data o repair_data escriben, y busy_timeout hace que una
+escritura concurrente espere en lugar de fallar con "database is locked".
+
+El comando concurrency_test aplica el mismo perfil a conexiones sqlite3
+directas para medir su efecto.
+"""
+
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Orden de aplicación: busy_timeout primero, para que el cambio a WAL espere a otros escritores
+PRAGMA_ORDER = ('busy_timeout', 'journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'temp_store')
+
+# Valores que usa SQLite cuando Django no configura nada (busy_timeout: timeout de sqlite3)
+SQLITE_DEFAULTS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'mmap_size': 0,
+    'cache_size': -2000,
+    'temp_store': 'DEFAULT',
+}
+
+_VALUE_RE = re.compile(r'^-?\w+$')
+
+
+def get_pragmas():
+    """PRAGMA configurados en settings, validados y en orden de aplicación"""
+    pragmas = getattr(settings, 'CRM_SQLITE_PRAGMAS', {})
+    unknown = set(pragmas) - set(PRAGMA_ORDER)
+    if unknown:
+        raise ImproperlyConfigured(f'CRM_SQLITE_PRAGMAS: PRAGMA no soportados: {", ".join(sorted(unknown))}')
+
+    ordered = {}
+    for name in PRAGMA_ORDER:
+        value = pragmas.get(name)
+        if value is None or value == '':
+            continue
+        # Se interpolan en el SQL: solo números o palabras clave
+        if not _VALUE_RE.match(str(value)):
+            raise ImproperlyConfigured(f'CRM_SQLITE_PRAGMAS: valor inválido para {name}: {value!r}')
+        ordered[name] = value
+    return ordered
+
+
+def apply_pragmas(raw_connection, pragmas):
+    """Ejecuta los PRAGMA sobre una conexión sqlite3 (la de Django o una directa)"""
+    for name, value in pragmas.items():
+        raw_connection.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def apply_sqlite_profile(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    # Sobre la conexión sqlite3: los PRAGMA no pasan por los execute_wrappers de métricas
+    apply_pragmas(connection.connection, get_pragmas())
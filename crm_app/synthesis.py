@@ -0,0 +1,124 @@
+"""
+Generación de interacciones ficticias para populate_data.
+
+Las funciones devuelven tuplas listas para insertar con executemany, sin
+instanciar modelos. Con NumPy (opcional) las fechas, tipos y estados de un
+bloque completo de clientes se generan con operaciones vectorizadas; sin
+NumPy se usa el generador equivalente en Python puro.
+
+En modo --scale se ejecutan en procesos hijos (ProcessPoolExecutor), así que
+este módulo no importa Django: los workers arrancan rápido también con el
+método spawn.
+
+Cada tarea usa su propia semilla, derivada de --seed y del número de tarea:
+el resultado es el mismo con cualquier número de workers y en cualquier
+orden de finalización.
+"""
+
+import math
+import random
+import time
+from itertools import repeat
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: se usa el generador en Python puro
+    np = None
+
+# Probabilidades de cada tipo de interacción
+INTERACTION_TYPE_WEIGHTS = [
+    ('Call', 0.40),      # 40%
+    ('Email', 0.30),     # 30%
+    ('Meeting', 0.15),   # 15%
+    ('SMS', 0.08),       # 8%
+    ('WhatsApp', 0.05),  # 5%
+    ('Facebook', 0.02),  # 2%
+]
+
+# Proporción de interacciones activas
+ACTIVE_RATIO = 0.75
+
+
+def format_timestamp(timestamp):
+    """Segundos epoch -> 'YYYY-MM-DD HH:MM:SS' en UTC (formato de DateTimeField en SQLite)"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(timestamp))
+
+
+def generate_interactions(task):
+    """
+    Genera las interacciones de un bloque de clientes.
+
+    ``task`` es (seed, índice, [(customer_id, created_at epoch)], media por
+    cliente, fecha máxima epoch, created_at de las filas). Cada cliente recibe
+    entre el 80% y el 120% de la media, con fechas uniformes entre su
+    creación y la fecha máxima, de modo que ninguna es anterior al cliente ni
+    posterior a la fecha máxima; los clientes creados después de la fecha
+    máxima no reciben ninguna. Devuelve tuplas (customer_id,
+    interaction_type, interaction_date, is_active, created_at, updated_at).
+    """
+    if np is not None:
+        return generate_interactions_vectorized(task)
+
+    seed, index, customers, per_customer, end_timestamp, created_at = task
+    rng = random.Random(f'{seed}:{index}')
+    types = [interaction_type for interaction_type, _ in INTERACTION_TYPE_WEIGHTS]
+    weights = [weight for _, weight in INTERACTION_TYPE_WEIGHTS]
+    low, high = int(per_customer * 0.8), int(per_customer * 1.2)
+
+    # Segundos enteros dentro de [creación del cliente, fecha máxima]
+    end = math.floor(end_timestamp)
+    rows = []
+    for customer_id, start_timestamp in customers:
+        start = math.ceil(start_timestamp)
+        if start > end:
+            continue
+        span = end - start + 1
+        for interaction_type in rng.choices(types, weights, k=rng.randint(low, high)):
+            rows.append((
+                customer_id,
+                interaction_type,
+                format_timestamp(start + rng.randrange(span)),
+                rng.random() < ACTIVE_RATIO,
+                created_at,
+                created_at,
+            ))
+    return rows
+
+
+def generate_interactions_vectorized(task):
+    """Igual que generate_interactions, con arrays de NumPy para todo el bloque"""
+    seed, index, customers, per_customer, end_timestamp, created_at = task
+    if not customers:
+        return []
+    rng = np.random.default_rng([seed, index])
+    types = np.array([interaction_type for interaction_type, _ in INTERACTION_TYPE_WEIGHTS])
+    weights = np.array([weight for _, weight in INTERACTION_TYPE_WEIGHTS])
+    low, high = int(per_customer * 0.8), int(per_customer * 1.2)
+
+    customer_ids = np.array([customer_id for customer_id, _ in customers], dtype=np.int64)
+    starts = np.ceil([start_timestamp for _, start_timestamp in customers]).astype(np.int64)
+    end = math.floor(end_timestamp)
+    spans = np.maximum(0, end - starts + 1)
+
+    # Una fila por interacción: cada cliente repetido tantas veces como interacciones
+    # tenga; los creados después de la fecha máxima (span 0) no tienen ninguna
+    counts = rng.integers(low, high, size=len(customers), endpoint=True)
+    counts[spans == 0] = 0
+    customer_ids = np.repeat(customer_ids, counts)
+    offsets = (rng.random(customer_ids.size) * np.repeat(spans, counts)).astype(np.int64)
+    timestamps = np.repeat(starts, counts) + offsets
+
+    interaction_types = types[rng.choice(len(types), size=customer_ids.size, p=weights / weights.sum())]
+    is_active = rng.random(customer_ids.size) < ACTIVE_RATIO
+    dates = np.char.replace(
+        np.datetime_as_string(timestamps.astype('datetime64[s]'), unit='s'), 'T', ' '
+    )
+
+    return list(zip(
+        customer_ids.tolist(),
+        interaction_types.tolist(),
+        dates.tolist(),
+        is_active.tolist(),
+        repeat(created_at),
+        repeat(created_at),
+    ))
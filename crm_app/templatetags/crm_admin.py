@@ -0,0 +1,118 @@
+"""
+Etiquetas del admin del CRM para tablas grandes.
+
+indexed_date_hierarchy es el date_hierarchy de Django sin sus dos recorridos
+completos de la tabla (MIN/MAX en una sola consulta y SELECT DISTINCT de los
+años truncados): los límites se leen del extremo del índice de la fecha con
+ORDER BY ... LIMIT 1 y cada año, mes o día se comprueba con un EXISTS sobre
+su rango, que también es una búsqueda en el índice.
+"""
+
+import datetime
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.db import models
+from django.utils import timezone
+
+register = template.Library()
+
+
+def _period_start(value, kind):
+    if kind == 'year':
+        return value.replace(month=1, day=1)
+    if kind == 'month':
+        return value.replace(day=1)
+    return value
+
+
+def _next_period(value, kind):
+    if kind == 'year':
+        return value.replace(year=value.year + 1)
+    if kind == 'month':
+        return (value.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return value + datetime.timedelta(days=1)
+
+
+class IndexedDates:
+    """
+    Sustituye a cl.queryset en date_hierarchy: responde a aggregate(Min, Max)
+    y a dates()/datetimes() con búsquedas en el índice de la fecha.
+    """
+
+    def __init__(self, queryset, field_name):
+        self.queryset = queryset
+        self.field_name = field_name
+        field = queryset.model._meta.get_field(field_name)
+        self.is_datetime = isinstance(field, models.DateTimeField)
+
+    def _edge(self, descending):
+        ordering = f'-{self.field_name}' if descending else self.field_name
+        return self.queryset.order_by(ordering).values_list(self.field_name, flat=True).first()
+
+    def aggregate(self, **aggregates):
+        # date_hierarchy solo pide first=Min(campo) y last=Max(campo)
+        return {'first': self._edge(descending=False), 'last': self._edge(descending=True)}
+
+    def _to_local_date(self, value):
+        if self.is_datetime:
+            return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+        return value
+
+    def _bound(self, day):
+        if not self.is_datetime:
+            return day
+        moment = datetime.datetime.combine(day, datetime.time.min)
+        return timezone.make_aware(moment) if timezone.is_aware(timezone.now()) else moment
+
+    def _periods(self, kind):
+        first, last = self._edge(descending=False), self._edge(descending=True)
+        if first is None or last is None:
+            return []
+
+        periods = []
+        start, end = _period_start(self._to_local_date(first), kind), self._to_local_date(last)
+        while start <= end:
+            following = _next_period(start, kind)
+            if self.queryset.filter(**{
+                f'{self.field_name}__gte': self._bound(start),
+                f'{self.field_name}__lt': self._bound(following),
+            }).exists():
+                periods.append(self._bound(start))
+            start = following
+        return periods
+
+    def dates(self, field_name, kind, order='ASC'):
+        return self._periods(kind)
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None):
+        return self._periods(kind)
+
+
+class IndexedChangeList:
+    """La ChangeList con el queryset sustituido por IndexedDates"""
+
+    def __init__(self, changelist):
+        self._changelist = changelist
+        self.queryset = IndexedDates(changelist.queryset, changelist.date_hierarchy)
+
+    def __getattr__(self, name):
+        return getattr(self._changelist, name)
+
+
+def indexed_date_hierarchy(cl):
+    if not cl.date_hierarchy:
+        return {}
+    return date_hierarchy(IndexedChangeList(cl))
+
+
+@register.tag(name='indexed_date_hierarchy')
+def indexed_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=indexed_date_hierarchy,
+        template_name='date_hierarchy.html',
+        takes_context=False,
+    )
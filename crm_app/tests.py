@@ -1,3 +1,1587 @@
-from django.test import TestCase
+import asyncio
+import csv
+import datetime
+import io
+import json
+import re
+import tempfile
+import threading
+import zipfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.admin import site as admin_site
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.checks import run_checks
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F, Max
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import metrics, search, synthesis
+from .archive import archivable, archive_batch, archive_cutoff, full_history, purge_batch
+from .api import InteractionAPIView
+from .checks import check_shared_caches
+from .concurrency import gather_in_threads
+from .context_processors import crm_context
+from .integrity import adult_cutoff, integrity_issues
+from .counters import (
+    get_counters, get_customer_stats, get_data_version, invalidate_customer_stats, set_customer_stats,
+)
+from .models import ArchivedInteraction, Company, Customer, DashboardSnapshot, Interaction, birthday_key_ranges
+from .pagination import CachedCountPaginator, KeysetField, KeysetPaginator
+from .search import search_queryset
+from .templatetags.crm_admin import indexed_date_hierarchy
+
+
+# La caché de settings (en archivos) sobrevive entre ejecuciones: los tests usan una local
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'crm-tests'}}
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class CRMTestCase(TestCase):
+    """TestCase con la caché en memoria del proceso"""
+
+
+def create_customer(company, sales_rep, first_name, last_name, **fields):
+    return Customer.objects.create(
+        first_name=first_name, last_name=last_name, company=company, sales_rep=sales_rep, **fields
+    )
+
+
+def create_interaction(customer, days_ago, interaction_type='Call', **fields):
+    return Interaction.objects.create(
+        customer=customer, interaction_type=interaction_type,
+        interaction_date=timezone.now() - datetime.timedelta(days=days_ago), **fields
+    )
+
+
+# ========== ÚLTIMA INTERACCIÓN DESNORMALIZADA ==========
+
+class LastInteractionSyncTests(CRMTestCase):
+    """Las señales y bulk_write mantienen Customer.last_interaction_* como sync_last_interactions"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales_rep = User.objects.create_user('rep', password='x')
+        company = Company.objects.create(name='Acme')
+        cls.ana = create_customer(company, cls.sales_rep, 'Ana', 'Pérez')
+        cls.luis = create_customer(company, cls.sales_rep, 'Luis', 'Gómez')
+
+    def check_output(self):
+        output = io.StringIO()
+        call_command('sync_last_interactions', '--check', stdout=output)
+        return output.getvalue()
+
+    def assertSynced(self, customer, expected):
+        """La última interacción de ``customer`` es ``expected`` y --check no encuentra diferencias"""
+        customer.refresh_from_db()
+        self.assertEqual(customer.last_interaction_id, expected.pk if expected else None)
+        self.assertEqual(customer.last_interaction_at, expected.interaction_date if expected else None)
+        self.assertEqual(customer.last_interaction_type, expected.interaction_type if expected else '')
+        self.assertIn('Todos los clientes están sincronizados', self.check_output())
+
+    def test_create(self):
+        old = create_interaction(self.ana, days_ago=5)
+        self.assertSynced(self.ana, old)
+        new = create_interaction(self.ana, days_ago=1, interaction_type='Email')
+        self.assertSynced(self.ana, new)
+        # Una interacción más antigua no adelanta la última
+        create_interaction(self.ana, days_ago=10)
+        self.assertSynced(self.ana, new)
+
+    def test_update_date_and_customer(self):
+        old = create_interaction(self.ana, days_ago=5)
+        new = create_interaction(self.ana, days_ago=1)
+
+        new.interaction_date = timezone.now() - datetime.timedelta(days=9)
+        new.save()
+        self.assertSynced(self.ana, old)
+
+        old.customer = self.luis
+        old.save()
+        self.assertSynced(self.ana, new)
+        self.assertSynced(self.luis, old)
+
+    def test_soft_delete_and_restore(self):
+        old = create_interaction(self.ana, days_ago=5)
+        new = create_interaction(self.ana, days_ago=1)
+
+        new.deleted_at = timezone.now()
+        new.save()
+        self.assertSynced(self.ana, old)
+
+        Interaction.objects.filter(pk=old.pk).soft_delete()
+        self.assertSynced(self.ana, None)
+
+        Interaction.objects.filter(customer=self.ana).restore()
+        self.assertSynced(self.ana, new)
+
+        # Eliminar el cliente elimina sus interacciones; recuperarlo las recupera
+        Customer.objects.filter(pk=self.ana.pk).soft_delete()
+        Customer.objects.filter(pk=self.ana.pk).restore()
+        self.assertSynced(self.ana, new)
+
+    def test_delete(self):
+        old = create_interaction(self.ana, days_ago=5)
+        new = create_interaction(self.ana, days_ago=1)
+        new.delete()
+        self.assertSynced(self.ana, old)
+        Interaction.objects.filter(customer=self.ana).delete()
+        self.assertSynced(self.ana, None)
+
+    def test_bulk_create(self):
+        now = timezone.now()
+        created = Interaction.objects.bulk_create([
+            Interaction(customer=customer, interaction_type='SMS', interaction_date=now - datetime.timedelta(days=days))
+            for customer in (self.ana, self.luis) for days in (3, 2)
+        ])
+        self.assertSynced(self.ana, created[1])
+        self.assertSynced(self.luis, created[3])
+
+    def test_queryset_update(self):
+        old = create_interaction(self.ana, days_ago=5)
+        new = create_interaction(self.ana, days_ago=1)
+
+        Interaction.objects.filter(pk=old.pk).update(interaction_date=timezone.now())
+        old.refresh_from_db()
+        self.assertSynced(self.ana, old)
+
+        Interaction.objects.filter(pk=new.pk).update(interaction_type='Meeting')
+        Interaction.objects.filter(pk=old.pk).update(customer=self.luis)
+        new.refresh_from_db()
+        self.assertSynced(self.ana, new)
+        self.assertSynced(self.luis, old)
+
+    def test_update_reads_pks_only_when_needed(self):
+        interaction = create_interaction(self.ana, days_ago=1)
+        updates = Interaction.objects.filter(pk=interaction.pk)
+
+        # Ningún receptor necesita los ids para estos campos: solo el UPDATE
+        with CaptureQueriesContext(connection) as queries:
+            updates.update(is_active=False)
+        self.assertEqual([query['sql'].split()[0] for query in queries], ['UPDATE'])
+
+        with CaptureQueriesContext(connection) as queries:
+            updates.update(interaction_type='Email')
+        self.assertIn('SELECT', [query['sql'].split()[0] for query in queries])
+        self.assertEqual(Customer.objects.get(pk=self.ana.pk).last_interaction_type, 'Email')
+
+    def test_check_detects_raw_sql_and_sync_repairs(self):
+        interaction = create_interaction(self.ana, days_ago=1)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {Customer._meta.db_table} SET last_interaction_id = NULL, last_interaction_at = NULL '
+                f'WHERE id = %s', [self.ana.pk],
+            )
+        self.assertIn('1 clientes desactualizados', self.check_output())
+
+        call_command('sync_last_interactions', stdout=io.StringIO())
+        self.assertSynced(self.ana, interaction)
+
+
+# ========== SNAPSHOT DEL DASHBOARD ==========
+
+class DashboardSnapshotTests(CRMTestCase):
+    """Los deltas incrementales dejan el snapshot igual que una reconstrucción completa"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rep = User.objects.create_user('rep', password='x')
+        cls.other_rep = User.objects.create_user('other', password='x')
+        cls.company = Company.objects.create(name='Acme')
+        cls.customer = create_customer(cls.company, cls.rep, 'Ana', 'Pérez')
+        create_interaction(cls.customer, days_ago=1)
+        DashboardSnapshot.objects.rebuild()
+
+    def snapshot(self):
+        # Un contador que baja a 0 conserva su fila; la reconstrucción no la crea
+        return {
+            scope: {key: value for key, value in values.items() if value}
+            for scope, values in DashboardSnapshot.objects.as_dict().items()
+        }
+
+    def assertMatchesRebuild(self):
+        incremental = self.snapshot()
+        DashboardSnapshot.objects.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_create_update_and_delete(self):
+        customer = create_customer(self.company, self.other_rep, 'Luis', 'Gómez')
+        call = create_interaction(customer, days_ago=2)
+        email = create_interaction(customer, days_ago=3, interaction_type='Email')
+        Company.objects.create(name='Globex')
+        User.objects.create_user('new_rep', password='x')
+
+        call.interaction_type = 'Meeting'
+        call.save()
+        customer.sales_rep = self.rep
+        customer.save()
+        email.delete()
+        self.assertMatchesRebuild()
+
+        # El borrado en cascada descuenta también las interacciones
+        customer.delete()
+        self.assertMatchesRebuild()
+
+    def test_soft_delete_and_restore(self):
+        customer = create_customer(self.company, self.other_rep, 'Luis', 'Gómez')
+        interaction = create_interaction(customer, days_ago=2, interaction_type='SMS')
+
+        interaction.deleted_at = timezone.now()
+        interaction.save()
+        self.assertMatchesRebuild()
+
+        Customer.objects.filter(pk=customer.pk).soft_delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(self.snapshot()[DashboardSnapshot.SCOPE_TOTAL]['customers'], 1)
+
+        Customer.objects.filter(pk=customer.pk).restore()
+        Interaction.objects.filter(pk=interaction.pk).restore()
+        Company.objects.filter(pk=self.company.pk).soft_delete()
+        self.assertMatchesRebuild()
+
+    def test_bulk_writes(self):
+        customers = Customer.objects.bulk_create([
+            Customer(first_name=f'Nombre{index}', last_name='Lote', company=self.company, sales_rep=self.other_rep)
+            for index in range(3)
+        ])
+        Interaction.objects.bulk_create([
+            Interaction(
+                customer=customer, interaction_type='WhatsApp', interaction_date=timezone.now(),
+                # Las filas creadas ya eliminadas no cuentan
+                deleted_at=timezone.now() if index == 0 else None,
+            )
+            for index, customer in enumerate(customers)
+        ])
+        self.assertMatchesRebuild()
+
+        Interaction.objects.filter(interaction_type='WhatsApp').update(interaction_type='Other')
+        Customer.objects.filter(last_name='Lote').update(sales_rep=self.rep)
+        self.assertMatchesRebuild()
+
+        Interaction.objects.filter(interaction_type='Other').delete()
+        self.assertMatchesRebuild()
+
+
+# ========== CONTADORES Y FRAGMENTOS CACHEADOS ==========
+
+class CountersAndFragmentsTests(CRMTestCase):
+    """Los badges se sirven de la caché, se ajustan con las escrituras y los fragmentos se renuevan"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rep = User.objects.create_user('rep', password='x')
+        cls.company = Company.objects.create(name='Acme')
+        cls.customer = create_customer(cls.company, cls.rep, 'Ana', 'Pérez')
+        create_interaction(cls.customer, days_ago=1)
+        DashboardSnapshot.objects.rebuild()
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def expected_counters(self):
+        return {
+            'customers_count': Customer.objects.alive().count(),
+            'companies_count': Company.objects.alive().count(),
+            'interactions_count': Interaction.objects.alive().count(),
+            'sales_reps_count': User.objects.filter(is_superuser=False).count(),
+        }
+
+    def test_counters_load_once_from_snapshot(self):
+        expected = self.expected_counters()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_counters(), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_counters(), expected)
+
+    def test_writes_adjust_cached_counters(self):
+        get_counters()
+        with self.captureOnCommitCallbacks(execute=True):
+            customer = create_customer(self.company, self.rep, 'Luis', 'Gómez')
+            create_interaction(customer, days_ago=2)
+            Company.objects.create(name='Globex')
+        # Ajustados con incr(): se leen de la caché sin consultas
+        expected = self.expected_counters()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_counters(), expected)
+
+        # Los borrados lógicos en bloque recalculan los totales e invalidan los contadores
+        with self.captureOnCommitCallbacks(execute=True):
+            Interaction.objects.filter(customer=self.customer).soft_delete()
+        self.assertEqual(get_counters(), self.expected_counters())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            customer.delete()
+        self.assertEqual(get_counters(), self.expected_counters())
+
+    def test_rebuild_invalidates_counters(self):
+        get_counters()
+        # Carga sin señales (como populate_data): solo la reconstrucción lo corrige
+        Customer.objects.filter(pk=self.customer.pk).update(deleted_at=timezone.now())
+        with self.captureOnCommitCallbacks(execute=True):
+            DashboardSnapshot.objects.rebuild()
+        self.assertEqual(get_counters()['customers_count'], 0)
+
+    def test_writes_bump_data_version_on_commit(self):
+        writes = [
+            lambda: Company.objects.create(name='Globex'),
+            lambda: create_customer(self.company, self.rep, 'Luis', 'Gómez'),
+            lambda: create_interaction(self.customer, days_ago=3),
+            lambda: Customer.objects.filter(pk=self.customer.pk).update(is_active=False),
+            lambda: Interaction.objects.filter(customer=self.customer).delete(),
+        ]
+        for write in writes:
+            version = get_data_version()
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                write()
+                # Hasta el commit los fragmentos siguen con la versión anterior
+                self.assertEqual(get_data_version(), version)
+            self.assertTrue(callbacks)
+            self.assertGreater(get_data_version(), version)
+
+    def test_context_processor_is_lazy(self):
+        request = mock.Mock(user=self.rep)
+        with self.assertNumQueries(0):
+            context = crm_context(request)
+        self.assertFalse(caches['default'].get('crm:counter:customers'))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(context['customers_count'](), 1)
+            self.assertEqual(context['interactions_count'](), 1)
+
+        request.user = mock.Mock(is_authenticated=False)
+        self.assertNotIn('customers_count', crm_context(request))
+
+    def test_sidebar_badges_refresh_after_writes(self):
+        self.client.force_login(self.rep)
+        url = reverse('crm_app:company_list')
+
+        def badge():
+            content = self.client.get(url).content.decode()
+            return int(re.search(r'badge-success">(\d+)<', content).group(1))
+
+        self.assertEqual(badge(), 1)
+        # Con la misma versión el sidebar sale del fragmento cacheado sin leer los contadores
+        with mock.patch('crm_app.context_processors.get_counters') as counters:
+            self.assertEqual(badge(), 1)
+        counters.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_customer(self.company, self.rep, 'Luis', 'Gómez')
+        self.assertEqual(badge(), 2)
+
+
+# ========== BÚSQUEDA FTS5 ==========
+
+class FtsAvailabilityTests(CRMTestCase):
+    """fts_available() vuelve a comprobar las tablas y triggers pasado el intervalo"""
+
+    def setUp(self):
+        search.reset_fts_state()
+        self.addCleanup(search.reset_fts_state)
+
+    def drop_trigger(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER crm_app_customers_fts_au')
+
+    def test_result_is_reused_within_interval(self):
+        self.assertTrue(search.fts_available())
+        self.drop_trigger()
+        self.assertTrue(search.fts_available())
+
+    @override_settings(CRM_SEARCH_CHECK_INTERVAL=0)
+    def test_negative_result_is_rechecked(self):
+        self.drop_trigger()
+        self.assertFalse(search.fts_available())
+        self.assertEqual(search.create_triggers(), ['crm_app_customers_fts_au'])
+        self.assertTrue(search.fts_available())
+
+    def test_migrate_forgets_result(self):
+        self.drop_trigger()
+        self.assertFalse(search.fts_available())
+        with connection.cursor() as cursor:
+            for statement in search.trigger_statements(
+                'crm_app_customers', 'crm_app_customers_fts', ('first_name', 'last_name')
+            ):
+                cursor.execute(statement)
+        self.assertFalse(search.fts_available())
+        call_command('migrate', 'crm_app', verbosity=0)
+        self.assertTrue(search.fts_available())
+
+
+class SearchQuerysetTests(CRMTestCase):
+    """search_queryset() busca en el índice FTS5 sin acentos y por prefijo, y cae a icontains sin FTS5"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rep = User.objects.create_user('rep', password='x')
+        cls.company = Company.objects.create(name='Cafetería Ñandú')
+        cls.maria = create_customer(cls.company, cls.rep, 'María', 'Núñez')
+        cls.brien = create_customer(cls.company, cls.rep, 'Sean', "O'Brien")
+        create_customer(cls.company, cls.rep, 'Luis', 'Gómez')
+
+    def setUp(self):
+        search.reset_fts_state()
+        self.addCleanup(search.reset_fts_state)
+
+    def search(self, text, model=Customer):
+        queryset, ranked = search_queryset(model.objects.all(), text)
+        return list(queryset), ranked
+
+    def test_accent_insensitive_prefix_match(self):
+        for text in ('maria', 'MARÍA', 'nun', 'mar nuñ', 'Núñez'):
+            with self.subTest(text=text):
+                self.assertEqual(self.search(text), ([self.maria], True))
+        self.assertEqual(self.search('cafeteria nandu', Company), ([self.company], True))
+        self.assertEqual(self.search('maria gomez'), ([], True))
+
+    def test_results_are_ranked(self):
+        create_customer(self.company, self.rep, 'Mariano', 'Núñez')
+        customers, ranked = self.search('nunez')
+        self.assertTrue(ranked)
+        self.assertEqual(len(customers), 2)
+        self.assertTrue(all(isinstance(customer.search_rank, float) for customer in customers))
+
+    def test_triggers_follow_insert_update_and_delete(self):
+        ana = create_customer(self.company, self.rep, 'Ana', 'Zubizarreta')
+        self.assertEqual(self.search('zubi'), ([ana], True))
+
+        Customer.objects.filter(pk=ana.pk).update(last_name='Etxeberria')
+        self.assertEqual(self.search('zubi'), ([], True))
+        self.assertEqual(self.search('etxe'), ([ana], True))
+
+        ana.delete()
+        self.assertEqual(self.search('etxe'), ([], True))
+
+        Company.objects.filter(pk=self.company.pk).update(name='Panadería Sol')
+        self.assertEqual(self.search('cafeteria', Company), ([], True))
+        self.assertEqual(self.search('panaderia', Company), ([self.company], True))
+
+    def test_punctuation_and_quotes_do_not_raise(self):
+        self.assertEqual(self.search("o'brien"), ([self.brien], True))
+        self.assertEqual(self.search('"brien'), ([self.brien], True))
+        # Sin palabras no hay consulta FTS5: icontains sobre el texto tal cual
+        for text in ('"', '""', "'", '*', '(-)'):
+            with self.subTest(text=text):
+                customers, ranked = self.search(text)
+                self.assertFalse(ranked)
+        self.assertEqual(self.search("'")[0], [self.brien])
+
+    @override_settings(CRM_SEARCH_CHECK_INTERVAL=0)
+    def test_icontains_fallback_without_fts(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER crm_app_customers_fts_ai')
+        self.assertEqual(self.search('Núñ'), ([self.maria], False))
+        self.assertEqual(self.search("o'bri"), ([self.brien], False))
+
+    def test_customer_list_search(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        response = self.client.get(reverse('crm_app:customer_list'), {'search': 'maria'})
+        self.assertEqual(list(response.context['customers']), [self.maria])
+
+
+# ========== CUMPLEAÑOS ==========
+
+class BirthdayKeyRangeTests(CRMTestCase):
+    """Rangos de birthday_key: cruce de año y nacidos el 29 de febrero"""
+
+    def test_ranges(self):
+        date = datetime.date
+        cases = [
+            (date(2026, 3, 1), date(2026, 3, 31), [(301, 331)]),
+            # El periodo cruza el fin de año: dos rangos
+            (date(2026, 12, 20), date(2027, 1, 10), [(1220, 1231), (101, 110)]),
+            (date(2026, 12, 31), date(2027, 2, 28), [(1231, 1231), (101, 229)]),
+            # Año no bisiesto: los del 29 de febrero celebran el 28
+            (date(2027, 2, 20), date(2027, 2, 28), [(220, 229)]),
+            # Año bisiesto: el 29 existe y el 28 no lo incluye
+            (date(2028, 2, 20), date(2028, 2, 28), [(220, 228)]),
+            (date(2028, 2, 20), date(2028, 2, 29), [(220, 229)]),
+            (date(2026, 1, 1), date(2026, 12, 31), [(101, 1231)]),
+            (date(2026, 6, 15), date(2027, 6, 15), [(101, 1231)]),
+        ]
+        for start, end, expected in cases:
+            with self.subTest(start=start, end=end):
+                self.assertEqual(birthday_key_ranges(start, end), expected)
+
+    def test_upcoming_birthdays(self):
+        rep = User.objects.create_user('rep', password='x')
+        company = Company.objects.create(name='Acme')
+        birthdays = {
+            'Diciembre': datetime.date(1990, 12, 30),
+            'Enero': datetime.date(1985, 1, 2),
+            'Fuera': datetime.date(1985, 1, 10),
+            'Bisiesto': datetime.date(1988, 2, 29),
+        }
+        for name, birth_date in birthdays.items():
+            create_customer(company, rep, name, 'Cumple', birth_date=birth_date)
+
+        upcoming = Customer.objects.upcoming_birthdays(days=10, today=datetime.date(2026, 12, 25))
+        self.assertEqual([customer.first_name for customer in upcoming], ['Diciembre', 'Enero'])
+
+        def born_between(start, end):
+            return list(Customer.objects.birthdays_between(start, end).values_list('first_name', flat=True))
+
+        self.assertEqual(born_between(datetime.date(2027, 2, 28), datetime.date(2027, 2, 28)), ['Bisiesto'])
+        self.assertEqual(born_between(datetime.date(2028, 2, 28), datetime.date(2028, 2, 28)), [])
+        self.assertEqual(born_between(datetime.date(2028, 2, 29), datetime.date(2028, 3, 1)), ['Bisiesto'])
+
+
+# ========== ESTADÍSTICAS POR CLIENTE ==========
+
+class CustomerStatsCacheTests(CRMTestCase):
+    """Las estadísticas cacheadas del cliente se invalidan al cambiar sus interacciones"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rep = User.objects.create_user('rep', password='x')
+        company = Company.objects.create(name='Acme')
+        cls.ana = create_customer(company, cls.rep, 'Ana', 'Pérez')
+        cls.luis = create_customer(company, cls.rep, 'Luis', 'Gómez')
+
+    def setUp(self):
+        caches['default'].clear()
+        set_customer_stats(self.ana.pk, {'total': 0})
+        set_customer_stats(self.luis.pk, {'total': 0})
+
+    def test_create_and_delete_invalidate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            interaction = create_interaction(self.ana, days_ago=1)
+        self.assertIsNone(get_customer_stats(self.ana.pk))
+        self.assertEqual(get_customer_stats(self.luis.pk), {'total': 0})
+
+        set_customer_stats(self.ana.pk, {'total': 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            interaction.delete()
+        self.assertIsNone(get_customer_stats(self.ana.pk))
+
+    def test_raw_save_does_not_touch_cache(self):
+        # loaddata guarda con raw=True
+        now = timezone.now()
+        interaction = Interaction(
+            customer=self.ana, interaction_type='Call', interaction_date=now, created_at=now, updated_at=now
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            interaction.save_base(raw=True)
+        self.assertEqual(get_customer_stats(self.ana.pk), {'total': 0})
+
+    def test_detail_view_refreshes_stats(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        url = reverse('crm_app:customer_detail', args=[self.ana.pk])
+        caches['default'].clear()
+        create_interaction(self.ana, days_ago=2)
+        first = self.client.get(url).context['interaction_stats']
+        with self.captureOnCommitCallbacks(execute=True):
+            create_interaction(self.ana, days_ago=1, interaction_type='Email')
+        second = self.client.get(url).context['interaction_stats']
+        self.assertNotEqual(first, second)
+        self.assertEqual(get_customer_stats(self.ana.pk), second)
+
+
+# ========== CACHÉ DE QUERYSETS ==========
+
+@override_settings(CRM_QUERY_CACHE='default')
+class CachedQuerySetTests(CRMTestCase):
+    """cached() lee de la caché hasta que se escribe (y confirma) en alguna tabla de la consulta"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rep = User.objects.create_user('rep', password='x')
+        cls.acme = Company.objects.create(name='Acme')
+        create_customer(cls.acme, cls.rep, 'Ana', 'Pérez')
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def names(self):
+        return list(Company.objects.alive().order_by('name').cached().values_list('name', flat=True))
+
+    def assertInvalidatedBy(self, write, expected):
+        self.assertEqual(self.names(), ['Acme'])
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        self.assertEqual(self.names(), expected)
+
+    def test_repeated_reads_hit_cache(self):
+        self.names()
+        Customer.objects.filter(company=self.acme).cached().count()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), ['Acme'])
+            self.assertEqual(Customer.objects.filter(company=self.acme).cached().count(), 1)
+
+    def test_invalidated_by_save(self):
+        self.assertInvalidatedBy(lambda: Company.objects.create(name='Globex'), ['Acme', 'Globex'])
+
+    def test_invalidated_by_bulk_create(self):
+        self.assertInvalidatedBy(
+            lambda: Company.objects.bulk_create([Company(name='Globex'), Company(name='Initech')]),
+            ['Acme', 'Globex', 'Initech'],
+        )
+
+    def test_invalidated_by_update(self):
+        self.assertInvalidatedBy(lambda: Company.objects.filter(pk=self.acme.pk).update(name='Acme S.A.'), ['Acme S.A.'])
+
+    def test_invalidated_by_delete(self):
+        def write():
+            Company.objects.create(name='Globex').delete()
+            Company.objects.filter(pk=self.acme.pk).soft_delete()
+        self.assertInvalidatedBy(write, [])
+
+    def test_count_and_aggregate_follow_joined_tables(self):
+        customers = Customer.objects.filter(company__name='Acme').cached()
+        self.assertEqual(customers.count(), 1)
+        self.assertIsNotNone(customers.aggregate(latest=Max('created_at'))['latest'])
+
+        # La consulta lee también crm_app_companies: renombrar la empresa la invalida
+        with self.captureOnCommitCallbacks(execute=True):
+            Company.objects.filter(pk=self.acme.pk).update(name='Acme S.A.')
+        customers = Customer.objects.filter(company__name='Acme').cached()
+        self.assertEqual(customers.count(), 0)
+        self.assertIsNone(customers.aggregate(latest=Max('created_at'))['latest'])
+
+
+class SharedCacheCheckTests(CRMTestCase):
+    """manage.py check rechaza cachés locales al proceso para las invalidaciones del CRM"""
+
+    def test_locmem_is_refused(self):
+        errors = check_shared_caches(None)
+        self.assertEqual([error.id for error in errors], ['crm_app.E001', 'crm_app.E001'])
+        self.assertIn('CRM_COUNTERS_CACHE', errors[0].msg)
+
+    def test_shared_backends_pass(self):
+        for backend in ('filebased.FileBasedCache', 'db.DatabaseCache', 'redis.RedisCache'):
+            caches_setting = {'default': {'BACKEND': f'django.core.cache.backends.{backend}', 'LOCATION': 'crm'}}
+            with self.subTest(backend=backend), override_settings(CACHES=caches_setting):
+                self.assertEqual(check_shared_caches(None), [])
+
+    def test_registered(self):
+        self.assertIn('crm_app.E001', [error.id for error in run_checks(tags=['caches'])])
+
+
+# ========== MÉTRICAS ==========
+
+class MetricsEndpointTests(CRMTestCase):
+    """/metrics solo responde a staff, token o red permitida, en formato de texto de Prometheus"""
+
+    SAMPLE = re.compile(r'^(?P<name>[a-z_]+)\{(?P<labels>[^}]*)\} (?P<value>\d+|\d+\.\d+(e-?\d+)?)$')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch.object(metrics, '_sink', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        metrics_db = override_settings(CRM_METRICS_DB=f'{directory.name}/metrics.sqlite3')
+        metrics_db.enable()
+        self.addCleanup(metrics_db.disable)
+        metrics.reset_metrics()
+        self.url = reverse('crm_app:metrics')
+
+    def test_anonymous_and_non_staff_are_forbidden(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_login(User.objects.create_user('rep', password='x'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    @override_settings(CRM_METRICS_TOKEN='s3cret')
+    def test_bearer_token(self):
+        self.assertEqual(self.client.get(self.url, headers={'Authorization': 'Bearer s3cret'}).status_code, 200)
+        self.assertEqual(self.client.get(self.url, headers={'Authorization': 'Bearer otro'}).status_code, 403)
+        self.assertEqual(self.client.get(self.url, headers={'Authorization': 's3cret'}).status_code, 403)
+
+    @override_settings(CRM_METRICS_ALLOWED_IPS=['10.0.0.0/8', '192.168.1.5'])
+    def test_allowed_networks(self):
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR='10.1.2.3').status_code, 200)
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR='192.168.1.5').status_code, 200)
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR='192.168.1.6').status_code, 403)
+
+    def test_text_format(self):
+        self.client.force_login(User.objects.create_user('admin', password='x', is_staff=True))
+        self.client.get(reverse('crm_app:customer_list'))
+        self.client.get(reverse('crm_app:customer_list'))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        lines = response.content.decode().splitlines()
+
+        samples = {}
+        for line in lines:
+            if line.startswith('#'):
+                self.assertRegex(line, r'^# (HELP|TYPE) [a-z_]+ .+$')
+                continue
+            match = self.SAMPLE.match(line)
+            self.assertIsNotNone(match, line)
+            samples[(match['name'], match['labels'])] = match['value']
+
+        labels = 'view="crm_app:customer_list",method="GET"'
+        self.assertIn('# TYPE crm_http_request_duration_seconds histogram', lines)
+        self.assertEqual(samples[('crm_http_responses_total', labels + ',status="2xx"')], '2')
+        self.assertEqual(samples[('crm_http_request_duration_seconds_count', labels)], '2')
+
+        # Buckets acumulados, crecientes y con +Inf igual al total
+        buckets = [
+            int(value) for (name, sample_labels), value in samples.items()
+            if name == 'crm_db_queries_per_request_bucket' and sample_labels.startswith(labels)
+        ]
+        self.assertEqual(len(buckets), len(metrics.QUERY_BUCKETS) + 1)
+        self.assertEqual(buckets, sorted(buckets))
+        self.assertEqual(buckets[-1], 2)
+        self.assertIn(('crm_db_queries_per_request_bucket', labels + ',le="+Inf"'), samples)
+        self.assertNotIn('crm_app:metrics', response.content.decode())
+
+
+# ========== PAGINACIÓN POR CURSOR ==========
+
+class KeysetPaginatorTests(CRMTestCase):
+    """Cursores, condiciones de búsqueda con nulos al final y estabilidad entre páginas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales_rep = User.objects.create_user('rep', password='x')
+        cls.company = Company.objects.create(name='Acme')
+        # Apellidos repetidos para ejercitar el desempate por id; fechas nulas intercaladas
+        cls.customers = [
+            create_customer(
+                cls.company, cls.sales_rep, f'Nombre{index:02d}', f'Apellido{index // 3:02d}',
+                birth_date=None if index % 4 == 0 else datetime.date(1980 + index % 7, 1 + index % 12, 1),
+            )
+            for index in range(23)
+        ]
+
+    def walk(self, paginator, direction='next'):
+        """Recorre todas las páginas siguiendo los cursores y devuelve los ids en orden"""
+        page = paginator.page()
+        pages = [page]
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            pages.append(page)
+        if direction == 'prev':
+            pages = [page]
+            while page.has_previous():
+                page = paginator.page(page.previous_cursor)
+                pages.insert(0, page)
+        return [customer.pk for page in pages for customer in page]
+
+    def assertWalksInOrder(self, fields, ordering, per_page=5):
+        expected = list(Customer.objects.order_by(*ordering).values_list('pk', flat=True))
+        paginator = KeysetPaginator(Customer.objects.all(), fields, per_page)
+        self.assertEqual(self.walk(paginator), expected)
+        self.assertEqual(self.walk(paginator, direction='prev'), expected)
+
+    def test_cursor_round_trip(self):
+        paginator = KeysetPaginator(Customer.objects.all(), [KeysetField('created_at')], 5)
+        obj = paginator.page().object_list[0]
+        direction, values = paginator.decode(paginator.encode(obj, 'next'))
+        self.assertEqual(direction, 'next')
+        # Los microsegundos se conservan: un cursor recortado repetiría filas
+        self.assertEqual(values, [obj.created_at, obj.pk])
+
+    def test_cursor_round_trip_with_null(self):
+        paginator = KeysetPaginator(Customer.objects.all(), [KeysetField('birth_date', nulls_last=True)], 5)
+        obj = Customer.objects.filter(birth_date__isnull=True).annotate(**paginator.queryset.query.annotations).first()
+        self.assertEqual(paginator.decode(paginator.encode(obj, 'prev')), ('prev', [None, obj.pk]))
+
+    def test_invalid_cursors(self):
+        paginator = KeysetPaginator(Customer.objects.all(), [KeysetField('last_name')], 5)
+        obj = paginator.page().object_list[0]
+        cursor = paginator.encode(obj, 'next')
+        for invalid in ['', '!!!', 'e30', cursor[:-4], cursor + 'x']:
+            with self.subTest(cursor=invalid):
+                self.assertIsNone(paginator.decode(invalid))
+        # Un cursor de otro ordenamiento (número de columnas distinto) no se acepta
+        other = KeysetPaginator(Customer.objects.all(), [KeysetField('last_name'), KeysetField('first_name')], 5)
+        self.assertIsNone(other.decode(cursor))
+        # Un cursor inválido vuelve a la primera página
+        self.assertEqual(list(paginator.page('!!!')), list(paginator.page()))
+
+    def test_walk_matches_order_by(self):
+        cases = [
+            ([KeysetField('last_name'), KeysetField('first_name')], ['last_name', 'first_name', 'pk']),
+            ([KeysetField('first_name', descending=True)], ['-first_name', '-pk']),
+            ([KeysetField('company__name'), KeysetField('last_name')], ['company__name', 'last_name', 'pk']),
+        ]
+        for fields, ordering in cases:
+            with self.subTest(ordering=ordering):
+                self.assertWalksInOrder(fields, ordering)
+
+    def test_walk_with_nulls_last(self):
+        cases = [
+            ([KeysetField('birth_date', nulls_last=True)], [F('birth_date').asc(nulls_last=True), 'pk']),
+            ([KeysetField('birth_date', descending=True, nulls_last=True)], [F('birth_date').desc(nulls_last=True), '-pk']),
+        ]
+        for fields, ordering in cases:
+            with self.subTest(descending=fields[0].descending):
+                self.assertWalksInOrder(fields, ordering, per_page=4)
+
+    def test_previous_page_returns_first_page(self):
+        paginator = KeysetPaginator(Customer.objects.all(), [KeysetField('last_name')], 5)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        self.assertTrue(second.has_previous())
+        back = paginator.page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertEqual(back.next_cursor, first.next_cursor)
+
+    def test_pages_stable_across_inserts(self):
+        paginator = KeysetPaginator(Customer.objects.all(), [KeysetField('last_name'), KeysetField('first_name')], 5)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+
+        # Una fila nueva antes del cursor no desplaza la página siguiente (con OFFSET sí)
+        create_customer(self.company, self.sales_rep, 'Nuevo', 'Aaa')
+        self.assertEqual(list(paginator.page(first.next_cursor)), list(second))
+
+        # Y el cursor anterior de la segunda página vuelve a las mismas filas
+        back = paginator.page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertTrue(back.has_previous())
+
+
+class CustomerListKeysetTests(CRMTestCase):
+    """La lista de clientes pagina por cursor y mantiene ?page=N para enlaces antiguos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('rep', password='x')
+        company = Company.objects.create(name='Acme')
+        for index in range(30):
+            create_customer(company, cls.user, f'Nombre{index:02d}', f'Apellido{index:02d}')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_cursor_pages_cover_every_customer(self):
+        url = reverse('crm_app:customer_list')
+        response = self.client.get(url)
+        page = response.context['page_obj']
+        self.assertTrue(page.is_keyset)
+        names = [customer.last_name for customer in page]
+
+        response = self.client.get(url, {'cursor': page.next_cursor})
+        names += [customer.last_name for customer in response.context['page_obj']]
+        self.assertEqual(names, [f'Apellido{index:02d}' for index in range(30)])
+        self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_page_number_still_supported(self):
+        response = self.client.get(reverse('crm_app:customer_list'), {'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].number, 2)
+
+
+# ========== EXPORTACIÓN ==========
+
+class CustomerExportTests(CRMTestCase):
+    """Exportaciones en streaming sin inyección de fórmulas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('rep', password='x')
+        company = Company.objects.create(name='@Acme')
+        create_customer(company, cls.user, '=HYPERLINK("http://x")', '-1+2', birth_date=datetime.date(1990, 5, 17))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def export(self, fmt):
+        response = self.client.get(reverse('crm_app:customer_export'), {'format': fmt})
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_csv_neutralizes_formulas(self):
+        rows = list(csv.reader(io.StringIO(self.export('csv').decode('utf-8-sig'))))
+        self.assertEqual(rows[1][1:5], ["'=HYPERLINK(\"http://x\")", "'-1+2", '1990-05-17', "'@Acme"])
+
+    def test_xlsx_is_a_valid_workbook(self):
+        with zipfile.ZipFile(io.BytesIO(self.export('xlsx'))) as archive:
+            self.assertIsNone(archive.testzip())
+            sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+        # Textos como celdas de texto (nunca fórmulas) y fechas como número de serie con estilo
+        self.assertIn('t="inlineStr"><is><t xml:space="preserve">=HYPERLINK("http://x")</t>', sheet)
+        self.assertNotIn('<f>', sheet)
+        self.assertIn('<c r="D2" s="1"><v>33010</v></c>', sheet)
+
+
+# ========== API ==========
+
+class StreamingAPITests(CRMTestCase):
+    """Paginación por cursor, errores 400 en JSON y filas borradas fuera de la API"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('rep', password='x')
+        cls.company = Company.objects.create(name='Acme')
+        Company.objects.create(name='Borrada', deleted_at=timezone.now())
+        cls.customers = [
+            create_customer(cls.company, cls.user, f'Nombre{index:02d}', f'Apellido{index:02d}')
+            for index in range(12)
+        ]
+        cls.deleted_customer = create_customer(
+            cls.company, cls.user, 'Nombre99', 'Borrado', deleted_at=timezone.now()
+        )
+        # Fechas repetidas para ejercitar el desempate por id entre páginas
+        moment = timezone.now().replace(microsecond=0)
+        for index in range(10):
+            Interaction.objects.create(
+                customer=cls.customers[index % 3], interaction_type='Call',
+                interaction_date=moment - datetime.timedelta(days=index // 4),
+            )
+        cls.deleted_interaction = create_interaction(cls.customers[0], days_ago=0, deleted_at=timezone.now())
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def fetch(self, name, **params):
+        response = self.client.get(reverse(f'crm_app:{name}'), params)
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content).decode()
+        if params.get('format') == 'json':
+            return response, json.loads(body)
+        return response, [json.loads(line) for line in body.splitlines()]
+
+    def walk(self, name, limit, **params):
+        """Pide páginas siguiendo X-Next-Cursor hasta la última y devuelve los ids en orden"""
+        response, records = self.fetch(name, limit=limit, **params)
+        pages = [records]
+        while response.has_header('X-Next-Cursor'):
+            cursor = response['X-Next-Cursor']
+            self.assertIn(f'cursor={cursor}', response['Link'])
+            response, records = self.fetch(name, limit=limit, cursor=cursor, **params)
+            pages.append(records)
+        self.assertTrue(all(len(page) == limit for page in pages[:-1]))
+        return [record['id'] for page in pages for record in page]
+
+    def test_customer_cursor_pages_cover_every_customer(self):
+        expected = [customer.pk for customer in self.customers]
+        self.assertEqual(self.walk('api_customers', 5), expected)
+        self.assertEqual(self.walk('api_customers', 5, format='json'), expected)
+        self.assertEqual(self.walk('api_customers', 4, ordering='-first_name'), expected[::-1])
+
+    def test_interaction_cursor_pages_with_repeated_dates(self):
+        alive = Interaction.objects.alive()
+        for ordering, order_by in InteractionAPIView.ORDERINGS.items():
+            with self.subTest(ordering=ordering):
+                expected = list(alive.order_by(*order_by).values_list('pk', flat=True))
+                self.assertEqual(self.walk('api_interactions', 3, ordering=ordering), expected)
+
+    def test_limit_without_cursor_ordering_is_a_plain_slice(self):
+        response, records = self.fetch('api_customers', limit=3, ordering='is_active')
+        self.assertEqual(len(records), 3)
+        self.assertFalse(response.has_header('X-Next-Cursor'))
+
+    def test_invalid_parameters_return_json_400(self):
+        response, _ = self.fetch('api_interactions', limit=3)
+        cursor = response['X-Next-Cursor']
+        invalid = [
+            ('api_customers', {'limit': 5, 'cursor': '!!!'}),
+            ('api_customers', {'limit': 5, 'cursor': 'e30'}),
+            ('api_customers', {'cursor': cursor}),
+            ('api_customers', {'limit': 'abc'}),
+            ('api_customers', {'limit': 0}),
+            ('api_customers', {'limit': 5, 'ordering': 'is_active', 'cursor': cursor}),
+            # Un cursor de otro ordenamiento (número de columnas distinto)
+            ('api_interactions', {'limit': 3, 'ordering': 'id', 'cursor': cursor}),
+            ('api_interactions', {'type': 'Fax'}),
+            ('api_interactions', {'since': '2025-13-45'}),
+            ('api_interactions', {'until': 'ayer'}),
+            ('api_interactions', {'ordering': 'customer'}),
+            ('api_interactions', {'customer': 'abc'}),
+        ]
+        for name, params in invalid:
+            with self.subTest(name=name, params=params):
+                response = self.client.get(reverse(f'crm_app:{name}'), params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertIn('error', response.json())
+
+    def test_soft_deleted_rows_are_excluded(self):
+        expected = sorted(customer.pk for customer in self.customers)
+        _, customers = self.fetch('api_customers')
+        self.assertEqual(sorted(record['id'] for record in customers), expected)
+        self.assertEqual(sorted(self.walk('api_customers', 5)), expected)
+
+        _, companies = self.fetch('api_companies')
+        self.assertEqual([company['name'] for company in companies], ['Acme'])
+        self.assertEqual(companies[0]['customer_count'], 12)
+
+        _, interactions = self.fetch('api_interactions', customer=self.customers[0].pk)
+        self.assertEqual(len(interactions), 4)
+        self.assertNotIn(self.deleted_interaction.pk, [record['id'] for record in interactions])
+
+
+# ========== ADMIN ==========
+
+class LargeTableAdminTests(CRMTestCase):
+    """Changelists sin COUNT(*) del total, consultas constantes y date_hierarchy por índice"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='x')
+        cls.rep = User.objects.create_user('rep', password='x')
+        cls.acme = Company.objects.create(name='Acme')
+        cls.globex = Company.objects.create(name='Globex')
+        cls.ana = create_customer(cls.acme, cls.rep, 'Ana', 'Pérez')
+        cls.luis = create_customer(cls.globex, cls.rep, 'Luis', 'Gómez')
+        # Cerca de los cambios de año, mes y día
+        moments = [
+            (2024, 2, 29, 12), (2024, 12, 31, 23), (2025, 1, 1, 0), (2025, 1, 1, 5),
+            (2025, 3, 15, 10), (2025, 3, 31, 22), (2025, 11, 30, 2),
+        ]
+        for index, (year, month, day, hour) in enumerate(moments):
+            Interaction.objects.create(
+                customer=cls.ana if index % 2 else cls.luis,
+                interaction_type='Call' if index % 3 else 'Email',
+                interaction_date=timezone.make_aware(datetime.datetime(year, month, day, hour, 30)),
+            )
+        DashboardSnapshot.objects.rebuild()
+
+    def setUp(self):
+        caches['default'].clear()
+        self.client.force_login(self.admin)
+
+    def changelist(self, model, **params):
+        return self.client.get(reverse(f'admin:crm_app_{model}_changelist'), params)
+
+    def table_counts(self, queries, table):
+        return [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT COUNT(*)') and f'"{table}"' in query['sql']
+        ]
+
+    def test_unfiltered_list_takes_total_from_snapshot(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.changelist('interaction')
+        self.assertEqual(response.context['cl'].result_count, 7)
+        self.assertEqual(self.table_counts(queries, Interaction._meta.db_table), [])
+
+    def test_queries_do_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as before:
+            self.changelist('interaction')
+            self.changelist('customer')
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(10):
+                customer = create_customer(self.globex, self.rep, f'Nombre{index}', 'Lote')
+                Interaction.objects.create(
+                    customer=customer, interaction_type='SMS',
+                    interaction_date=timezone.make_aware(datetime.datetime(2025, 3, 20, index)),
+                )
+        caches['default'].clear()
+        with CaptureQueriesContext(connection) as after:
+            self.changelist('interaction')
+            self.changelist('customer')
+        self.assertEqual(len(after), len(before))
+
+    def test_filtered_count_is_cached_until_a_write(self):
+        first = self.changelist('interaction', interaction_type__exact='Call')
+        self.assertEqual(first.context['cl'].result_count, 4)
+        with CaptureQueriesContext(connection) as queries:
+            self.changelist('interaction', interaction_type__exact='Call')
+        self.assertEqual(self.table_counts(queries, Interaction._meta.db_table), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_interaction(self.ana, days_ago=1)
+        response = self.changelist('interaction', interaction_type__exact='Call')
+        self.assertEqual(response.context['cl'].result_count, 5)
+
+    def test_cached_count_paginator(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(CachedCountPaginator(Interaction.objects.all(), 10, total=123).count, 123)
+        self.assertEqual(CachedCountPaginator(Interaction.objects.all(), 10).count, 7)
+        self.assertEqual(CachedCountPaginator(list(range(3)), 10).count, 3)
+
+    def test_company_name_and_soft_delete_filters(self):
+        response = self.changelist('customer', company_name='glob')
+        self.assertEqual([customer.pk for customer in response.context['cl'].result_list], [self.luis.pk])
+
+        Customer.objects.filter(pk=self.luis.pk).soft_delete()
+        self.assertEqual(self.changelist('customer').context['cl'].result_count, 1)
+        dead = self.changelist('customer', deleted='dead').context['cl'].result_list
+        self.assertEqual([customer.pk for customer in dead], [self.luis.pk])
+
+    def test_soft_delete_and_restore_actions(self):
+        url = reverse('admin:crm_app_interaction_changelist')
+        pks = list(Interaction.objects.filter(customer=self.ana).values_list('pk', flat=True))
+        self.client.post(url, {'action': 'soft_delete_selected', '_selected_action': pks})
+        self.assertEqual(Interaction.objects.alive().filter(customer=self.ana).count(), 0)
+        self.client.post(url + '?deleted=dead', {'action': 'restore_selected', '_selected_action': pks})
+        self.assertEqual(Interaction.objects.alive().filter(customer=self.ana).count(), len(pks))
+
+    def assertSameHierarchy(self, **params):
+        request = self.client.get(reverse('admin:crm_app_interaction_changelist'), params).wsgi_request
+        changelist = admin_site.get_model_admin(Interaction).get_changelist_instance(request)
+        expected = date_hierarchy(changelist)
+        self.assertEqual(indexed_date_hierarchy(changelist), expected)
+        return len(expected['choices'])
+
+    def test_date_hierarchy_matches_django(self):
+        levels = [
+            {},
+            {'interaction_date__year': 2025},
+            {'interaction_date__year': 2025, 'interaction_date__month': 3},
+            {'interaction_date__year': 2025, 'interaction_date__month': 3, 'interaction_date__day': 31},
+            # 30/11 02:30 UTC es el 29/11 en Ciudad de México: el límite se pasa a la fecha local
+            {'interaction_date__year': 2025, 'interaction_date__month': 11},
+            # Filtros que dejan un solo valor o ninguno
+            {'interaction_type__exact': 'Email'},
+            {'interaction_type__exact': 'Meeting'},
+        ]
+        for time_zone in ('UTC', 'America/Mexico_City', 'Asia/Tokyo'):
+            for params in levels:
+                with self.subTest(time_zone=time_zone, params=params), timezone.override(time_zone):
+                    self.assertSameHierarchy(**params)
+
+        # Meses de 2024: en Tokio la interacción del 31/12/2024 23:30 UTC ya es de 2025
+        self.assertEqual(self.assertSameHierarchy(interaction_date__year=2024), 2)
+        with timezone.override('Asia/Tokyo'):
+            self.assertEqual(self.assertSameHierarchy(interaction_date__year=2024), 1)
+
+
+# ========== GENERACIÓN DE INTERACCIONES ==========
+
+class InteractionSynthesisTests(SimpleTestCase):
+    """Las fechas generadas quedan entre la creación del cliente y la fecha máxima"""
+
+    END = 1_700_000_000.7
+
+    def generate(self, customers):
+        return synthesis.generate_interactions((42, 0, customers, 10, self.END, 'ahora'))
+
+    def check_window(self):
+        end = synthesis.format_timestamp(1_700_000_000)
+        rows = self.generate([
+            (1, 1_699_000_000.2),
+            (2, 1_700_000_000.0),  # Creado justo en la fecha máxima
+            (3, 1_700_000_000.3),  # ceil() lo deja después de la fecha máxima
+            (4, self.END + 3600),  # Creado después de la fecha máxima
+        ])
+        dates = {}
+        for customer_id, _, interaction_date, *_ in rows:
+            dates.setdefault(customer_id, []).append(interaction_date)
+
+        self.assertEqual(set(dates), {1, 2})
+        self.assertTrue(8 <= len(dates[1]) <= 12)
+        self.assertTrue(all(synthesis.format_timestamp(1_699_000_001) <= date <= end for date in dates[1]))
+        self.assertEqual(set(dates[2]), {end})
+
+    def test_vectorized_window(self):
+        self.assertIsNotNone(synthesis.np)
+        self.check_window()
+
+    def test_pure_python_window(self):
+        with mock.patch.object(synthesis, 'np', None):
+            self.check_window()
+
+
+class PopulateDataOptionsTests(CRMTestCase):
+
+    def test_rejects_non_positive_interactions_per_customer(self):
+        for value in ('0', '-5'):
+            with self.subTest(value=value), self.assertRaisesMessage(CommandError, '--interactions-per-customer'):
+                call_command('populate_data', '--interactions-per-customer', value, stdout=io.StringIO())
+        self.assertFalse(Customer.objects.exists())
+
+
+# ========== LIMPIEZA RÁPIDA ==========
+
+class ClearDataFastTests(CRMTestCase):
+    """clear_data --fast vacía las tablas con SQL masivo sin cargar ids en Python"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_superuser('admin', password='x')
+        cls.rep = User.objects.create_user('rep', password='x')
+        company = Company.objects.create(name='Acme')
+        cls.ana = create_customer(company, cls.rep, 'Ana', 'Pérez')
+        create_interaction(cls.ana, days_ago=1)
+
+    def clear(self, *args):
+        call_command('clear_data', '--force', *args, stdout=io.StringIO())
+
+    def test_fast_clears_tables_and_customer_stats(self):
+        set_customer_stats(self.ana.pk, {'total': 1})
+        customer_ids = f'SELECT "{Customer._meta.db_table}"."id"'
+        with CaptureQueriesContext(connection) as queries:
+            self.clear('--fast')
+
+        self.assertFalse(any(query['sql'].startswith(customer_ids) for query in queries))
+        self.assertIsNone(get_customer_stats(self.ana.pk))
+        self.assertEqual(
+            [Interaction.objects.count(), Customer.objects.count(), Company.objects.count()], [0, 0, 0]
+        )
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['admin'])
+        self.assertEqual(DashboardSnapshot.objects.as_dict()[DashboardSnapshot.SCOPE_TOTAL].get('customers', 0), 0)
+
+    def test_single_customer_invalidation_keeps_others(self):
+        set_customer_stats(1, {'total': 1})
+        set_customer_stats(2, {'total': 2})
+        invalidate_customer_stats([1])
+        self.assertIsNone(get_customer_stats(1))
+        self.assertEqual(get_customer_stats(2), {'total': 2})
+
+    def test_drop_indexes_requires_fast(self):
+        with self.assertRaisesMessage(CommandError, '--drop-indexes solo se puede usar con --fast'):
+            self.clear('--drop-indexes')
+        self.assertTrue(Customer.objects.exists())
+
+
+# ========== ARCHIVO DE INTERACCIONES ==========
+
+class InteractionArchiveTests(CRMTestCase):
+    """El archivo mueve exactamente los lotes pedidos, conserva la última interacción y se reanuda"""
+
+    @classmethod
+    def setUpTestData(cls):
+        rep = User.objects.create_user('rep', password='x')
+        company = Company.objects.create(name='Acme')
+        cls.ana = create_customer(company, rep, 'Ana', 'Pérez')
+        cls.luis = create_customer(company, rep, 'Luis', 'Gómez')
+        cls.eva = create_customer(company, rep, 'Eva', 'Ruiz')
+        old = timezone.now() - datetime.timedelta(days=500)
+        for index in range(8):
+            create_interaction(cls.ana, days_ago=400 + index * 10, interaction_type=['Call', 'Email'][index % 2])
+        create_interaction(cls.ana, days_ago=3, interaction_type='Meeting')
+        # Luis solo tiene interacciones antiguas: la más reciente se queda en la tabla activa
+        for index in range(4):
+            create_interaction(cls.luis, days_ago=600 - index * 50, interaction_type='SMS')
+        # Eliminadas hace tiempo: se archivan con su deleted_at y después se purgan
+        create_interaction(cls.ana, days_ago=900, deleted_at=old)
+        create_interaction(cls.luis, days_ago=5, deleted_at=old)
+        DashboardSnapshot.objects.rebuild()
+
+    def setUp(self):
+        caches['default'].clear()
+        self.cutoff = archive_cutoff(days=365)
+
+    def row(self, model, pk):
+        return model.objects.filter(pk=pk).values(
+            'customer_id', 'interaction_type', 'interaction_date',
+            'is_active', 'created_at', 'updated_at', 'deleted_at',
+        ).get()
+
+    def history(self, customer):
+        """Ids (más recientes primero) y estadísticas por tipo antes de archivar"""
+        timeline = Interaction.objects.alive().filter(customer=customer).order_by('-interaction_date', '-pk')
+        return list(timeline.values_list('pk', flat=True)), timeline.type_stats()
+
+    def run_archive(self, *args):
+        output = io.StringIO()
+        call_command(
+            'archive_interactions', '--older-than-days', '365', '--batch-size', '3', '--sleep', '0', *args,
+            stdout=output,
+        )
+        return output.getvalue()
+
+    def sync_check(self):
+        output = io.StringIO()
+        call_command('sync_last_interactions', '--check', stdout=output)
+        return output.getvalue()
+
+    def test_batch_moves_exactly_its_id_range(self):
+        candidates = sorted(archivable(self.cutoff).values_list('pk', flat=True))
+        first_pk, last_pk = candidates[2], candidates[6]
+        expected = [pk for pk in candidates if first_pk <= pk <= last_pk]
+        originals = {pk: self.row(Interaction, pk) for pk in expected}
+        others = set(Interaction.objects.values_list('pk', flat=True)) - set(expected)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            archived, customer_ids = archive_batch(self.cutoff, first_pk, last_pk)
+
+        self.assertEqual(archived, len(expected))
+        self.assertEqual(sorted(ArchivedInteraction.objects.values_list('pk', flat=True)), expected)
+        self.assertEqual(set(Interaction.objects.values_list('pk', flat=True)), others)
+        self.assertEqual(customer_ids, {originals[pk]['customer_id'] for pk in expected})
+        for pk, original in originals.items():
+            self.assertEqual(self.row(ArchivedInteraction, pk), original)
+
+    def test_newest_interaction_is_never_archived(self):
+        last_ids = dict(Customer.objects.values_list('pk', 'last_interaction'))
+        # La última de Luis es anterior al horizonte: sin la exclusión se archivaría
+        self.assertLess(Interaction.objects.get(pk=last_ids[self.luis.pk]).interaction_date, self.cutoff)
+        self.run_archive('--only', 'archive')
+
+        for customer in Customer.objects.all():
+            self.assertEqual(customer.last_interaction_id, last_ids[customer.pk])
+            if customer.last_interaction_id:
+                self.assertTrue(Interaction.objects.filter(pk=customer.last_interaction_id).exists())
+        self.assertEqual(
+            list(Interaction.objects.alive().filter(customer=self.luis).values_list('pk', flat=True)),
+            [last_ids[self.luis.pk]],
+        )
+        self.assertFalse(archivable(self.cutoff).exists())
+        self.assertIn('Todos los clientes están sincronizados', self.sync_check())
+
+    def test_snapshot_and_full_history_stay_consistent(self):
+        before = {customer: self.history(customer) for customer in (self.ana, self.luis, self.eva)}
+        total = Interaction.objects.alive().count()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_archive('--only', 'archive')
+        self.assertTrue(ArchivedInteraction.objects.exists())
+
+        # El snapshot cuenta la tabla activa: igual que una reconstrucción completa
+        snapshot = DashboardSnapshot.objects.as_dict()
+        DashboardSnapshot.objects.rebuild()
+        self.assertEqual(snapshot, DashboardSnapshot.objects.as_dict())
+        self.assertEqual(snapshot[DashboardSnapshot.SCOPE_TOTAL]['interactions'], Interaction.objects.alive().count())
+        self.assertEqual(Interaction.objects.alive().count() + ArchivedInteraction.objects.alive().count(), total)
+
+        for customer, (ids, stats) in before.items():
+            timeline, full_stats = full_history(customer)
+            self.assertEqual([row['id'] for row in timeline], ids)
+            self.assertEqual(full_stats, stats)
+
+    def test_purge_refreshes_last_interaction_before_commit(self):
+        newest = Interaction.objects.get(pk=Customer.objects.get(pk=self.ana.pk).last_interaction_id)
+        purge_before = timezone.now() - datetime.timedelta(days=30)
+        # Eliminada con SQL crudo (sin señales, como una carga masiva): la columna desnormalizada queda desfasada
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {Interaction._meta.db_table} SET deleted_at = %s WHERE id = %s',
+                [purge_before - datetime.timedelta(days=1), newest.pk],
+            )
+        self.assertEqual(Customer.objects.get(pk=self.ana.pk).last_interaction_id, newest.pk)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            purged = purge_batch(Interaction, purge_before, 0, newest.pk)
+            # Antes del commit: la clave ya no apunta a la fila borrada
+            ana = Customer.objects.get(pk=self.ana.pk)
+            expected = Interaction.objects.alive().filter(customer=self.ana).order_by('-interaction_date', '-pk').first()
+            self.assertEqual(ana.last_interaction_id, expected.pk)
+            self.assertEqual(
+                (ana.last_interaction_at, ana.last_interaction_type),
+                (expected.interaction_date, expected.interaction_type),
+            )
+            connection.check_constraints()
+        self.assertEqual(purged, 1)
+        self.assertFalse(Interaction.objects.filter(pk=newest.pk).exists())
+        # Las eliminadas fuera del rango de ids siguen esperando su lote
+        self.assertEqual(Interaction.objects.filter(deleted_at__lt=purge_before).count(), 2)
+        self.assertTrue(callbacks)
+
+    def test_resumed_run_skips_finished_batches(self):
+        expected = sorted(archivable(self.cutoff).values_list('pk', flat=True))
+        calls = []
+
+        def interrupt_after_two(cutoff, first_pk, last_pk, now=None):
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            calls.append((first_pk, last_pk))
+            return archive_batch(cutoff, first_pk, last_pk, now)
+
+        command = 'crm_app.management.commands.archive_interactions.archive_batch'
+        with mock.patch(command, side_effect=interrupt_after_two):
+            output = self.run_archive('--only', 'archive')
+        self.assertIn('Quedan filas pendientes', output)
+        done = sorted(ArchivedInteraction.objects.values_list('pk', flat=True))
+        self.assertEqual(done, expected[:6])
+
+        with mock.patch(command, wraps=archive_batch) as resumed:
+            output = self.run_archive('--only', 'archive')
+        self.assertIn('ARCHIVO COMPLETADO', output)
+        # La segunda ejecución solo recorre los ids que quedaban: dos lotes de 3
+        self.assertEqual(len(resumed.call_args_list), 2)
+        self.assertGreater(resumed.call_args_list[0].args[1], calls[-1][1])
+        self.assertEqual(sorted(ArchivedInteraction.objects.values_list('pk', flat=True)), expected)
+
+
+# ========== REPARACIÓN DE DATOS ==========
+
+class RepairDataTests(CRMTestCase):
+    """repair_data corrige cada IntegrityIssue, resincroniza los datos derivados y es idempotente"""
+
+    @classmethod
+    def setUpTestData(cls):
+        rep = User.objects.create_user('rep', password='x')
+        company = Company.objects.create(name='Acme')
+        today = timezone.localdate()
+        cls.ana = create_customer(company, rep, 'Ana', 'Pérez', birth_date=datetime.date(1980, 5, 17))
+        cls.luis = create_customer(company, rep, 'Luis', 'Gómez', birth_date=today + datetime.timedelta(days=30))
+        cls.eva = create_customer(company, rep, 'Eva', 'Ruiz', birth_date=today - datetime.timedelta(days=365 * 10))
+        # Justo en la mayoría de edad: no es un problema
+        cls.sofia = create_customer(company, rep, 'Sofía', 'Díaz', birth_date=adult_cutoff(today))
+        Customer.objects.update(created_at=timezone.now() - datetime.timedelta(days=100))
+
+        cls.valid = create_interaction(cls.ana, days_ago=10)
+        cls.future = create_interaction(cls.ana, days_ago=-5, interaction_type='Email')
+        cls.early = create_interaction(cls.ana, days_ago=200)
+        # La única interacción de Luis es anterior a su alta
+        cls.luis_early = create_interaction(cls.luis, days_ago=300, interaction_type='SMS')
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def repair(self, *args):
+        output = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('repair_data', *args, stdout=output)
+        return output.getvalue()
+
+    def state(self):
+        return (
+            list(Interaction.objects.order_by('pk').values_list('pk', 'interaction_date', 'updated_at')),
+            list(Customer.objects.order_by('pk').values_list(
+                'pk', 'birth_date', 'birthday_key', 'last_interaction', 'last_interaction_at', 'updated_at',
+            )),
+        )
+
+    def issue_counts(self):
+        return {issue.name: issue.queryset().count() for issue in integrity_issues()}
+
+    def test_dry_run_counts_without_changes(self):
+        expected = {
+            'interactions_before_customer': 2,
+            'future_interactions': 1,
+            'future_birth_dates': 1,
+            'underage_customers': 1,
+        }
+        self.assertEqual(self.issue_counts(), expected)
+        before = self.state()
+
+        output = self.repair('--dry-run')
+        for issue in integrity_issues():
+            self.assertIn(f'❗ {expected[issue.name]:,} filas: {issue.fix_label}', output)
+        self.assertIn(f'Ejemplos (id): {self.early.pk}, {self.luis_early.pk}', output)
+        self.assertIn('📋 5 filas a corregir (no se modificó nada)', output)
+        self.assertEqual(self.state(), before)
+
+    def test_repair_fixes_each_issue(self):
+        start = timezone.now()
+        output = self.repair('--batch-size', '1')
+        self.assertIn('✅ 5 filas corregidas', output)
+        self.assertEqual(set(self.issue_counts().values()), {0})
+
+        ana, luis, eva, sofia = (
+            Customer.objects.get(pk=customer.pk) for customer in (self.ana, self.luis, self.eva, self.sofia)
+        )
+        self.assertEqual(Interaction.objects.get(pk=self.early.pk).interaction_date, ana.created_at)
+        self.assertEqual(Interaction.objects.get(pk=self.luis_early.pk).interaction_date, luis.created_at)
+        future = Interaction.objects.get(pk=self.future.pk)
+        self.assertTrue(start <= future.interaction_date <= timezone.now())
+        self.assertEqual(Interaction.objects.get(pk=self.valid.pk).interaction_date, self.valid.interaction_date)
+
+        for customer in (luis, eva):
+            self.assertEqual((customer.birth_date, customer.birthday_key), (None, None))
+        self.assertEqual(ana.birth_date, datetime.date(1980, 5, 17))
+        self.assertEqual(sofia.birth_date, self.sofia.birth_date)
+        self.assertIsNotNone(sofia.birthday_key)
+
+    def test_repair_resyncs_derived_data(self):
+        self.repair('--batch-size', '1')
+
+        # La interacción futura sigue siendo la última, ahora con la fecha corregida
+        ana = Customer.objects.get(pk=self.ana.pk)
+        future = Interaction.objects.get(pk=self.future.pk)
+        self.assertEqual((ana.last_interaction_id, ana.last_interaction_at), (future.pk, future.interaction_date))
+        luis = Customer.objects.get(pk=self.luis.pk)
+        self.assertEqual(luis.last_interaction_at, luis.created_at)
+        self.assertFalse(Customer.objects.stale_last_interaction().exists())
+
+        # Los filtros de cumpleaños ya no encuentran las fechas eliminadas
+        birthdays = Customer.objects.birthdays_between(datetime.date(2000, 1, 1), datetime.date(2000, 12, 31))
+        self.assertEqual(sorted(birthdays.values_list('pk', flat=True)), sorted([self.ana.pk, self.sofia.pk]))
+
+    def test_second_run_is_a_no_op(self):
+        self.repair()
+        after = self.state()
+
+        with CaptureQueriesContext(connection) as queries:
+            output = self.repair()
+        self.assertEqual([query['sql'] for query in queries if query['sql'].startswith('UPDATE')], [])
+        self.assertEqual(output.count('✅ Sin problemas'), 4)
+        self.assertIn('✅ 0 filas corregidas', output)
+        self.assertEqual(self.state(), after)
+
+    def test_only_selected_issue(self):
+        self.repair('--only', 'future_birth_dates')
+        self.assertEqual(self.issue_counts(), {
+            'interactions_before_customer': 2,
+            'future_interactions': 1,
+            'future_birth_dates': 0,
+            'underage_customers': 1,
+        })
+
+
+# ========== VALIDACIÓN ==========
+
+# Las consultas de validate_data van en otros hilos con su propia conexión: los datos
+# tienen que estar confirmados, no dentro de la transacción de un TestCase
+@override_settings(CACHES=LOCAL_CACHES)
+class ValidateDataTests(TransactionTestCase):
+    """validate_data informa de los problemas sembrados igual en texto y en JSON"""
+
+    def setUp(self):
+        sales_rep = User.objects.create_user('rep', password='x')
+        company = Company.objects.create(name='Acme')
+        ana = create_customer(company, sales_rep, 'Ana', 'Pérez', birth_date=datetime.date(1980, 1, 1))
+        create_interaction(ana, days_ago=0)
+        # Un problema de cada clase de integrity_issues()
+        create_interaction(ana, days_ago=30)
+        create_interaction(ana, days_ago=-3)
+        create_customer(company, sales_rep, 'Luis', 'Gómez', birth_date=timezone.localdate() + datetime.timedelta(days=10))
+        create_customer(company, sales_rep, 'Eva', 'Ruiz', birth_date=timezone.localdate() - datetime.timedelta(days=365 * 10))
+
+    def validate(self, *args):
+        output = io.StringIO()
+        call_command('validate_data', *args, stdout=output)
+        return output.getvalue()
+
+    def test_json_report(self):
+        report = json.loads(self.validate('--json', '--detailed'))
+        self.assertEqual(report['counts'], {
+            'sales_reps': 1, 'companies': 1, 'customers': 3, 'interactions': 3, 'superusers': 0,
+        })
+        self.assertEqual(report['business'], {
+            'interactions_before_customer': 1,
+            'future_interactions': 1,
+            'future_birth_dates': 1,
+            'underage_customers': 1,
+            'sales_rep_imbalance_ratio': 1.0,
+        })
+        self.assertEqual(set(report['integrity'].values()), {0})
+        self.assertEqual(report['issues']['integrity'], [])
+        self.assertEqual(report['issues']['business'], [
+            'Interacciones antes de creación del cliente: 1',
+            'Interacciones en el futuro: 1',
+            'Fechas de nacimiento futuras: 1',
+            'Clientes menores de edad: 1',
+        ])
+        self.assertEqual(report['sales_rep_distribution'], {'rep': 3})
+        self.assertEqual(report['detailed']['customers']['with_birth_date'], 3)
+        self.assertEqual(report['detailed']['interactions']['by_type']['Call']['count'], 3)
+
+    def test_text_report(self):
+        report = json.loads(self.validate('--json'))
+        output = self.validate()
+        # Los mismos problemas que el JSON, uno por línea en su sección
+        self.assertEqual(len(report['issues']['business']), 4)
+        for issue in report['issues']['business']:
+            self.assertIn(f'  ❗ {issue}\n', output)
+        self.assertIn('⚠️  PROBLEMAS DE LÓGICA DE NEGOCIO:', output)
+        self.assertIn('✅ Integridad referencial correcta', output)
+        self.assertIn('💡 Corregir: python manage.py repair_data --dry-run', output)
+        self.assertIn('  rep: 3 clientes', output)
+
+    def test_clean_data(self):
+        call_command('repair_data', stdout=io.StringIO())
+        report = json.loads(self.validate('--json'))
+        self.assertEqual(report['issues']['business'], [])
+        self.assertIn('✅ Lógica de negocio correcta', self.validate())
+
+
+class GatherInThreadsTests(SimpleTestCase):
+    """gather_in_threads() solapa los bloques y devuelve sus resultados en orden"""
+
+    def test_runs_concurrently_in_order(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def block(value):
+            # Solo termina si los tres bloques están en marcha a la vez
+            barrier.wait()
+            return value, threading.get_ident()
+
+        results = asyncio.run(gather_in_threads(*(lambda value=value: block(value) for value in 'abc')))
+        self.assertEqual([value for value, _ in results], ['a', 'b', 'c'])
+        self.assertEqual(len({ident for _, ident in results}), 3)
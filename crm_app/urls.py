@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, exports, views
 
 app_name = 'crm_app'
 
@@ -9,11 +9,20 @@ urlpatterns = [
     
     # Clientes
     path('customers/', views.CustomerListView.as_view(), name='customer_list'),
+    path('customers/export/', exports.CustomerExportView.as_view(), name='customer_export'),
     path('customers/<int:pk>/', views.CustomerDetailView.as_view(), name='customer_detail'),
     
     # Empresas
     path('companies/', views.CompanyListView.as_view(), name='company_list'),
     
+    # API de solo lectura (NDJSON / JSON)
+    path('api/customers/', api.CustomerAPIView.as_view(), name='api_customers'),
+    path('api/companies/', api.CompanyAPIView.as_view(), name='api_companies'),
+    path('api/interactions/', api.InteractionAPIView.as_view(), name='api_interactions'),
+    
+    # Métricas de rendimiento (Prometheus)
+    path('metrics', views.metrics, name='metrics'),
+    
     # Vista temporal (mantener por compatibilidad)
     path('test/', views.index, name='index'),
 ]
@@ -1,103 +1,170 @@
-from django.shortcuts import render, get_object_or_404
 from django.views.generic import ListView, DetailView, TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q, Count, Max, F, CharField, Value, Subquery, OuterRef
-from django.db.models.functions import Concat, Extract
+from django.db.models import Q, Count
 from django.contrib.auth.models import User
-from django.http import HttpResponse
-from .models import Customer, Company, Interaction
-from datetime import datetime, date, timedelta
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.functional import SimpleLazyObject
+from .archive import full_history
+from .counters import get_customer_stats, set_customer_stats
+from .metrics import metrics_access_allowed, render_metrics
+from .models import Customer, Company, DashboardSnapshot, month_bounds
+from .pagination import KeysetField, KeysetPaginationMixin
+from .routers import ReplicaReadMixin
+from .search import search_queryset
+from datetime import date, timedelta
 
 
-class DashboardView(TemplateView):
+class DashboardView(ReplicaReadMixin, TemplateView):
     """Vista principal del dashboard con estadísticas generales"""
     template_name = 'crm_app/dashboard.html'
     
+    def get_context_blocks(self):
+        """Bloques de contexto independientes entre sí"""
+        return [
+            self.get_lazy_snapshot_context,
+            self.get_recent_customers_context,
+            self.get_upcoming_birthdays_context,
+        ]
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        for block in self.get_context_blocks():
+            context.update(block())
+        return context
+    
+    def get_lazy_snapshot_context(self):
+        # Los paneles del snapshot están en fragmentos cacheados por versión de
+        # datos: solo se consulta si la plantilla los renderiza (fallo de caché)
+        snapshot = SimpleLazyObject(self.get_snapshot_context)
+        return {
+            name: (lambda name=name: snapshot[name])
+            for name in ('stats', 'sales_rep_stats', 'interaction_type_stats')
+        }
+    
+    def get_snapshot_context(self):
+        # Contadores materializados: una sola lectura pequeña
+        snapshot = DashboardSnapshot.objects.as_dict()
+        if not snapshot[DashboardSnapshot.SCOPE_TOTAL]:
+            DashboardSnapshot.objects.rebuild()
+            snapshot = DashboardSnapshot.objects.as_dict()
         
         # Estadísticas generales
-        context['stats'] = {
-            'total_customers': Customer.objects.count(),
-            'total_companies': Company.objects.count(),
-            'total_interactions': Interaction.objects.count(),
-            'total_sales_reps': User.objects.filter(is_superuser=False).count(),
+        totals = snapshot[DashboardSnapshot.SCOPE_TOTAL]
+        stats = {
+            'total_customers': totals.get('customers', 0),
+            'total_companies': totals.get('companies', 0),
+            'total_interactions': totals.get('interactions', 0),
+            'total_sales_reps': totals.get('sales_reps', 0),
         }
         
-        # Clientes recientes con última interacción
-        latest_interaction_subquery = Interaction.objects.filter(
-            customer=OuterRef('pk')
-        ).order_by('-interaction_date')
-        
-        context['recent_customers'] = Customer.objects.select_related(
-            'company', 'sales_rep'
-        ).annotate(
-            last_interaction_date=Max('interactions__interaction_date'),
-            last_interaction_type=Subquery(latest_interaction_subquery.values('interaction_type')[:1])
-        ).order_by('-created_at')[:10]
-        
-        # Estadísticas por sales rep
-        sales_rep_stats = Customer.objects.values(
-            'sales_rep__first_name', 'sales_rep__last_name'
-        ).annotate(
-            customer_count=Count('id'),
-            sales_rep__get_full_name=Concat(
-                'sales_rep__first_name', 
-                Value(' '), 
-                'sales_rep__last_name',
-                output_field=CharField()
-            )
-        ).order_by('-customer_count')
-        
-        total_customers = context['stats']['total_customers']
+        # Estadísticas por sales rep (agrupadas por id, no por nombre)
+        rep_counts = {
+            int(rep_id): count
+            for rep_id, count in snapshot[DashboardSnapshot.SCOPE_SALES_REP].items()
+            if count > 0
+        }
+        sales_reps = User.objects.in_bulk(list(rep_counts))
+        
+        sales_rep_stats = sorted(
+            (
+                {
+                    'sales_rep_id': rep_id,
+                    'sales_rep__get_full_name': sales_reps[rep_id].get_full_name() if rep_id in sales_reps else '',
+                    'customer_count': count,
+                }
+                for rep_id, count in rep_counts.items()
+            ),
+            key=lambda stat: -stat['customer_count']
+        )
+        
+        total_customers = stats['total_customers']
         if total_customers > 0:
             for stat in sales_rep_stats:
                 stat['percentage'] = (stat['customer_count'] / total_customers) * 100
         
-        context['sales_rep_stats'] = sales_rep_stats
-        
         # Estadísticas de tipos de interacción
-        interaction_type_stats = Interaction.objects.values('interaction_type').annotate(
-            count=Count('id')
-        ).order_by('-count')
+        interaction_type_stats = sorted(
+            (
+                {'interaction_type': interaction_type, 'count': count}
+                for interaction_type, count in snapshot[DashboardSnapshot.SCOPE_INTERACTION_TYPE].items()
+                if count > 0
+            ),
+            key=lambda stat: -stat['count']
+        )
         
-        total_interactions = context['stats']['total_interactions']
+        total_interactions = stats['total_interactions']
         if total_interactions > 0:
             for stat in interaction_type_stats:
                 stat['percentage'] = (stat['count'] / total_interactions) * 100
         
-        context['interaction_type_stats'] = interaction_type_stats
-        
-        return context
+        return {
+            'stats': stats,
+            'sales_rep_stats': sales_rep_stats,
+            'interaction_type_stats': interaction_type_stats,
+        }
+    
+    def get_recent_customers_context(self):
+        # Clientes recientes con última interacción (columnas desnormalizadas)
+        return {
+            'recent_customers': Customer.objects.alive().select_related(
+                'company', 'sales_rep'
+            ).order_by('-created_at')[:10]
+        }
+    
+    def get_upcoming_birthdays_context(self):
+        # Próximos cumpleaños: rango sobre el índice de birthday_key
+        return {
+            'upcoming_birthdays': Customer.objects.alive().select_related(
+                'company'
+            ).upcoming_birthdays(days=30)[:8]
+        }
 
 
-class CustomerListView(ListView):
+class CustomerListView(ReplicaReadMixin, KeysetPaginationMixin, ListView):
     """Vista de lista de clientes con filtros y búsqueda"""
     model = Customer
     template_name = 'crm_app/customer_list.html'
     context_object_name = 'customers'
     paginate_by = 25
     
+    # Ordenamientos con paginación por cursor (el resto usa OFFSET)
+    KEYSET_ORDERINGS = {
+        '': [KeysetField('last_name'), KeysetField('first_name')],
+        'first_name': [KeysetField('first_name')],
+        '-first_name': [KeysetField('first_name', descending=True)],
+        'company__name': [KeysetField('company__name')],
+        '-company__name': [KeysetField('company__name', descending=True)],
+        # birth_date ascendente = más mayores primero; sin fecha de nacimiento al final
+        'birth_date': [KeysetField('birth_date', nulls_last=True)],
+        '-birth_date': [KeysetField('birth_date', descending=True, nulls_last=True)],
+        # Los clientes sin interacciones van al final
+        'last_interaction_date': [KeysetField('last_interaction_at', nulls_last=True)],
+        '-last_interaction_date': [KeysetField('last_interaction_at', descending=True, nulls_last=True)],
+        # Rango bm25 de la búsqueda FTS5 (menor es más relevante)
+        'relevance': [KeysetField('search_rank')],
+    }
+    
+    search_ranked = False
+    
+    def get_ordering(self):
+        # Con búsqueda FTS5 el orden por defecto es la relevancia
+        default = 'relevance' if self.search_ranked else 'first_name'
+        ordering = self.request.GET.get('ordering', default)
+        if ordering == 'relevance' and not self.search_ranked:
+            return default
+        return ordering
+    
+    def get_keyset(self):
+        return self.KEYSET_ORDERINGS.get(self.get_ordering())
+    
     def get_queryset(self):
-        # Subquery para obtener el tipo de la interacción más reciente
-        latest_interaction = Interaction.objects.filter(
-            customer=OuterRef('pk')
-        ).order_by('-interaction_date')
-        
-        queryset = Customer.objects.select_related(
-            'company', 'sales_rep'
-        ).annotate(
-            last_interaction_date=Max('interactions__interaction_date'),
-            last_interaction_type=Subquery(latest_interaction.values('interaction_type')[:1])
-        )
+        # La última interacción se lee de columnas desnormalizadas en Customer
+        queryset = Customer.objects.alive().select_related('company', 'sales_rep')
         
-        # Filtro de búsqueda por nombre
+        # Filtro de búsqueda por nombre (FTS5 sin acentos, o icontains si no está disponible)
         search = self.request.GET.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) | 
-                Q(last_name__icontains=search)
-            )
+            queryset, self.search_ranked = search_queryset(queryset, search)
         
         # Filtro por empresa
         company_id = self.request.GET.get('company')
@@ -116,109 +183,115 @@ class CustomerListView(ListView):
         if birthday_filter:
             today = date.today()
             
+            # Rangos sobre birthday_key (indexada) en lugar de EXTRACT por fila
             if birthday_filter == 'today':
-                queryset = queryset.filter(
-                    birth_date__month=today.month,
-                    birth_date__day=today.day
-                )
+                queryset = queryset.birthdays_between(today, today)
             elif birthday_filter == 'this_week':
-                # Cumpleaños en los próximos 7 días
-                week_dates = []
-                for i in range(7):
-                    day = today + timedelta(days=i)
-                    week_dates.append((day.month, day.day))
-                
-                birthday_q = Q()
-                for month, day in week_dates:
-                    birthday_q |= Q(birth_date__month=month, birth_date__day=day)
-                queryset = queryset.filter(birthday_q)
+                # Cumpleaños en los próximos 7 días (puede cruzar el fin de año)
+                queryset = queryset.birthdays_between(today, today + timedelta(days=6))
             
             elif birthday_filter == 'this_month':
-                queryset = queryset.filter(birth_date__month=today.month)
+                queryset = queryset.birthdays_between(*month_bounds(today))
             
             elif birthday_filter == 'next_month':
                 next_month = today.replace(day=28) + timedelta(days=4)
-                next_month = next_month.replace(day=1)
-                queryset = queryset.filter(birth_date__month=next_month.month)
+                queryset = queryset.birthdays_between(*month_bounds(next_month))
         
-        # Ordenamiento
-        ordering = self.request.GET.get('ordering', 'first_name')
-        if ordering:
-            # Para ordenamiento por fecha de última interacción, manejar valores nulos
-            if ordering in ['last_interaction_date', '-last_interaction_date']:
-                # Los clientes sin interacciones van al final
-                if ordering == 'last_interaction_date':
-                    queryset = queryset.order_by(F('last_interaction_date').asc(nulls_last=True))
-                else:
-                    queryset = queryset.order_by(F('last_interaction_date').desc(nulls_last=True))
-            # Para ordenamiento por cumpleaños, manejar valores nulos
-            elif ordering in ['birth_date', '-birth_date']:
-                # Los clientes sin fecha de nacimiento van al final
-                if ordering == 'birth_date':
-                    # birth_date ascendente = más mayores primero (fechas más antiguas)
-                    queryset = queryset.order_by(F('birth_date').asc(nulls_last=True))
-                else:
-                    # -birth_date descendente = más jóvenes primero (fechas más recientes)
-                    queryset = queryset.order_by(F('birth_date').desc(nulls_last=True))
-            else:
-                queryset = queryset.order_by(ordering)
+        # Ordenamiento (los valores nulos van al final según KEYSET_ORDERINGS)
+        ordering = self.get_ordering()
+        keyset = self.get_keyset()
+        if keyset is not None:
+            queryset = queryset.order_by(*[field.order_by(field.name) for field in keyset])
+        elif ordering:
+            queryset = queryset.order_by(ordering)
         
         return queryset
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['companies'] = Company.objects.filter(is_active=True).order_by('name')
+        # Igual para todos los usuarios: se cachea hasta que cambian las empresas
+        context['companies'] = Company.objects.alive().filter(is_active=True).order_by('name').cached()
         return context
 
 
-class CustomerDetailView(DetailView):
+class CustomerDetailView(ReplicaReadMixin, DetailView):
     """Vista de detalle de un cliente específico"""
     model = Customer
     template_name = 'crm_app/customer_detail.html'
     context_object_name = 'customer'
     
     def get_queryset(self):
-        return Customer.objects.select_related('company', 'sales_rep')
+        return Customer.objects.alive().select_related('company', 'sales_rep')
+    
+    # Interacciones mostradas con ?history=full (tabla activa + archivo)
+    full_history_limit = 200
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         customer = self.object
         
-        # Estadísticas de interacciones del cliente
-        interactions = customer.interactions.all()
-        context['interaction_stats'] = {
-            'total_count': interactions.count(),
-            'call_count': interactions.filter(interaction_type='Call').count(),
-            'email_count': interactions.filter(interaction_type='Email').count(),
-            'meeting_count': interactions.filter(interaction_type='Meeting').count(),
-            'sms_count': interactions.filter(interaction_type='SMS').count(),
-            'other_count': interactions.exclude(
-                interaction_type__in=['Call', 'Email', 'Meeting', 'SMS']
-            ).count(),
-        }
+        # Historial completo solo bajo petición: el archivo no se lee por defecto
+        if self.request.GET.get('history') == 'full':
+            recent_interactions, stats = full_history(customer, limit=self.full_history_limit)
+            context['interaction_stats'] = stats
+            context['recent_interactions'] = recent_interactions
+            context['full_history'] = True
+            return context
+        
+        # Estadísticas por tipo desde la caché; si faltan, una sola consulta
+        # trae la línea de tiempo y los conteos (ventanas sobre el mismo SELECT)
+        interactions = customer.interactions.alive()
+        stats = get_customer_stats(customer.pk)
+        if stats is None:
+            recent_interactions, stats = interactions.timeline_with_stats(limit=10)
+            set_customer_stats(customer.pk, stats)
+        else:
+            recent_interactions = interactions.order_by('-interaction_date', '-pk')[:10]
         
-        # Interacciones recientes (últimas 10)
-        context['recent_interactions'] = interactions.order_by('-interaction_date')[:10]
+        context['interaction_stats'] = stats
+        context['recent_interactions'] = recent_interactions
         
         return context
 
 
-class CompanyListView(ListView):
+class CompanyListView(ReplicaReadMixin, KeysetPaginationMixin, ListView):
     """Vista de lista de empresas con estadísticas de clientes"""
     model = Company
     template_name = 'crm_app/company_list.html'
     context_object_name = 'companies'
     paginate_by = 20
     
+    # Ordenamientos con paginación por cursor (el resto usa OFFSET)
+    KEYSET_ORDERINGS = {
+        'name': [KeysetField('name')],
+        '-name': [KeysetField('name', descending=True)],
+        'customer_count': [KeysetField('customer_count')],
+        '-customer_count': [KeysetField('customer_count', descending=True)],
+        'relevance': [KeysetField('search_rank')],
+    }
+    
+    search_ranked = False
+    
+    def get_ordering(self):
+        # Con búsqueda FTS5 el orden por defecto es la relevancia
+        default = 'relevance' if self.search_ranked else 'name'
+        ordering = self.request.GET.get('ordering') or default
+        if ordering == 'relevance' and not self.search_ranked:
+            return default
+        return ordering
+    
+    def get_keyset(self):
+        return self.KEYSET_ORDERINGS.get(self.get_ordering())
+    
     def get_queryset(self):
-        queryset = Company.objects.annotate(
-            customer_count=Count('customers')
+        queryset = Company.objects.alive().annotate(
+            customer_count=Count('customers', filter=Q(customers__deleted_at__isnull=True))
         )
         
-        # Filtro de búsqueda por nombre
+        # Filtro de búsqueda por nombre (FTS5 sin acentos, o icontains si no está disponible)
         search = self.request.GET.get('search')
         if search:
-            queryset = queryset.filter(name__icontains=search)
+            queryset, self.search_ranked = search_queryset(queryset, search)
         
         # Filtro por estado
         status = self.request.GET.get('status')
@@ -228,8 +301,11 @@ class CompanyListView(ListView):
             queryset = queryset.filter(is_active=False)
         
         # Ordenamiento
-        ordering = self.request.GET.get('ordering', 'name')
-        if ordering:
+        ordering = self.get_ordering()
+        keyset = self.get_keyset()
+        if keyset is not None:
+            queryset = queryset.order_by(*[field.order_by(field.name) for field in keyset])
+        elif ordering:
             queryset = queryset.order_by(ordering)
         
         return queryset
@@ -238,3 +314,10 @@ class CompanyListView(ListView):
 def index(request):
     """Vista temporal para verificar que la aplicación funciona"""
     return HttpResponse("¡CRM App funcionando correctamente! 🚀")
+
+
+def metrics(request):
+    """Métricas de rendimiento en formato de texto de Prometheus"""
+    if not metrics_access_allowed(request):
+        return HttpResponseForbidden('Acceso denegado a las métricas\n', content_type='text/plain; charset=utf-8')
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +42,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero, para medir la petición completa
+    'crm_app.metrics.MetricsMiddleware',
+    # Lecturas de las vistas con ReplicaReadMixin a la réplica (si está configurada y al día)
+    'crm_app.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,9 +83,98 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Conexiones persistentes (segundos; 0 = una por petición) y comprobadas antes de reutilizarse
+        'CONN_MAX_AGE': int(os.environ.get('CRM_DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.environ.get('CRM_DB_CONN_HEALTH_CHECKS', '1') == '1',
     }
 }
 
+# Archivo de interacciones (archive_interactions): antigüedad a partir de la cual se
+# archivan y días que se conservan las filas con deleted_at antes de purgarlas
+CRM_ARCHIVE_AFTER_DAYS = int(os.environ.get('CRM_ARCHIVE_AFTER_DAYS', 730))
+CRM_SOFT_DELETE_RETENTION_DAYS = int(os.environ.get('CRM_SOFT_DELETE_RETENTION_DAYS', 90))
+
+# Réplica de lectura (crm_app.routers): CRM_REPLICA_DB es el archivo SQLite que mantiene
+# refresh_replica. Sin réplica todas las lecturas van a la base principal
+if os.environ.get('CRM_REPLICA_DB'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['CRM_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['crm_app.routers.ReplicaRouter']
+CRM_REPLICA_ALIAS = 'replica'
+# Retraso máximo tolerado (segundos) y cada cuántos segundos se revisa por proceso
+CRM_REPLICA_MAX_LAG = float(os.environ.get('CRM_REPLICA_MAX_LAG', 30))
+CRM_REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('CRM_REPLICA_LAG_CHECK_INTERVAL', 5))
+
+# Perfil de conexión SQLite (crm_app.sqlite_profile): PRAGMA aplicados a cada conexión nueva.
+# Un valor vacío deja el de SQLite; cache_size negativo son KiB
+CRM_SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('CRM_SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('CRM_SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': os.environ.get('CRM_SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)),
+    'cache_size': os.environ.get('CRM_SQLITE_CACHE_SIZE', '-65536'),
+    'temp_store': os.environ.get('CRM_SQLITE_TEMP_STORE', 'MEMORY'),
+    'busy_timeout': os.environ.get('CRM_SQLITE_BUSY_TIMEOUT', '10000'),
+}
+
+
+# Búsqueda FTS5 (crm_app.search): cada cuántos segundos se vuelve a comprobar por
+# proceso que existen las tablas FTS5 y sus triggers (si no, se busca con icontains)
+CRM_SEARCH_CHECK_INTERVAL = float(os.environ.get('CRM_SEARCH_CHECK_INTERVAL', 60))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Los contadores, la versión de los fragmentos y las generaciones de crm_app.querycache
+# se invalidan desde el worker que escribe, así que la caché tiene que ser compartida
+# (crm_app.checks rechaza locmem): en archivos por defecto (DJANGO_CACHE_DIR) o
+# Redis con DJANGO_REDIS_URL
+
+if os.environ.get('DJANGO_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['DJANGO_REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('DJANGO_CACHE_DIR', BASE_DIR / 'django_cache'),
+        }
+    }
+
+# Contadores del sidebar (crm_app.counters): alias de caché y desfase máximo en segundos
+CRM_COUNTERS_CACHE = 'default'
+CRM_COUNTERS_TIMEOUT = int(os.environ.get('CRM_COUNTERS_TIMEOUT', 300))
+
+# Estadísticas por cliente (se invalidan al cambiar sus interacciones; el timeout es solo un respaldo)
+CRM_CUSTOMER_STATS_TIMEOUT = int(os.environ.get('CRM_CUSTOMER_STATS_TIMEOUT', 3600))
+
+# Fragmentos de plantilla cacheados (paneles del dashboard, sidebar): la clave lleva la
+# versión de los datos (crm_app.counters), así que el timeout solo limita la memoria
+CRM_FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('CRM_FRAGMENT_CACHE_TIMEOUT', 3600))
+
+# Resultados de QuerySet.cached() (crm_app.querycache): se invalidan por generación de
+# tabla en cada escritura; el timeout acota la memoria y el desfase de la réplica
+CRM_QUERY_CACHE = 'default'
+CRM_QUERY_CACHE_TIMEOUT = int(os.environ.get('CRM_QUERY_CACHE_TIMEOUT', 300))
+
+# Métricas por petición (crm_app.metrics, /metrics): archivo SQLite compartido por
+# todos los workers y cada cuántos segundos vuelca cada proceso sus incrementos
+CRM_METRICS_ENABLED = os.environ.get('CRM_METRICS_ENABLED', '1') == '1'
+CRM_METRICS_DB = os.environ.get('CRM_METRICS_DB', BASE_DIR / 'metrics.sqlite3')
+CRM_METRICS_FLUSH_INTERVAL = float(os.environ.get('CRM_METRICS_FLUSH_INTERVAL', 5))
+# Acceso a /metrics además del staff: token Bearer y direcciones o redes separadas por comas
+CRM_METRICS_TOKEN = os.environ.get('CRM_METRICS_TOKEN', '')
+CRM_METRICS_ALLOWED_IPS = [
+    network.strip() for network in os.environ.get('CRM_METRICS_ALLOWED_IPS', '').split(',') if network.strip()
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators